@@ -21,23 +21,218 @@
 #
 #  Unauthorized commercial use is strictly prohibited.
 # ===============================================================
-from scapy.all import *
+# scapy, requests, mac_vendor_lookup and prettytable are imported where they are
+# used, so each mode only pays for what it needs (see --benchmark startup)
+import sys
 import time
 import socket
 import subprocess
-from mac_vendor_lookup import MacLookup, BaseMacLookup
-from prettytable import PrettyTable
 import random
 import os
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED
+from concurrent.futures import wait as wait_futures
 import ipaddress
-import requests
 import re
+import csv
+import argparse
+import mmap
+import struct
+import sqlite3
+import selectors
+import heapq
+import errno
+import collections
+import itertools
+import resource
+import queue
+import hashlib
+import select
+import shutil
+import json
+import ctypes
+import fcntl
+import grp
+import stat
+import signal
+import multiprocessing
+import ast
+import bisect
+import array
+import xml.etree.ElementTree as ElementTree
 
 # Global variables
 original_mac = None
 interface = "eth0"
+vendor_index = None
+vendor_snapshot = None
+vendor_index_lock = threading.Lock()
+enrichment_cache = None
+cache_enabled = True
+port_scan_engine = None
+syn_scan_engine = None
+risk_engine = None
+hostname_executor = ThreadPoolExecutor(max_workers=128, thread_name_prefix='hostname')
+stage_timings = None  # {stage: [seconds, ...]} while a benchmark is collecting them
+metrics_dir = None  # where --metrics writes metrics.prom / metrics.json
+
+IEEE_DATA_DIR = '/usr/share/ieee-data'
+SCANNER_CACHE_DIR = os.path.expanduser('~/.cache/ak-scanner')
+VENDOR_SNAPSHOT_FILE = os.path.join(SCANNER_CACHE_DIR, 'vendors.bin')
+VENDOR_SNAPSHOT_MAX_AGE = 90 * 24 * 3600
+BENCHMARK_RESULTS_DIR = os.path.join(SCANNER_CACHE_DIR, 'benchmarks')
+# Daemon mode: Unix socket, jobs run at once, finished jobs kept for status
+DAEMON_SOCKET = os.path.join(SCANNER_CACHE_DIR, 'daemon.sock')
+DAEMON_WORKERS = 1
+DAEMON_JOB_HISTORY = 100
+# Startup budget checked by --benchmark startup: import time of the scanner module,
+# and the heavy libraries that must not be loaded until a mode needs them
+STARTUP_IMPORT_BUDGET_MS = 150
+STARTUP_LAZY_MODULES = ('scapy', 'requests', 'mac_vendor_lookup', 'prettytable')
+ENRICHMENT_CACHE_FILE = os.path.join(SCANNER_CACHE_DIR, 'enrichment.db')
+ENRICHMENT_CACHE_MAX_ROWS = 50000
+# Seconds a cached answer stays valid, per source; "Unknown" results use the negative TTL
+ENRICHMENT_TTLS = {
+    'vendor': {'positive': 30 * 24 * 3600, 'negative': 24 * 3600},
+    'hostname': {'positive': 24 * 3600, 'negative': 3600},
+}
+COMMON_PORTS = [21, 22, 23, 25, 53, 80, 110, 135, 139, 143, 443, 445, 3306, 3389, 5432, 5900, 8080, 8443]
+# Connection attempts in flight at once, shared by every host being scanned
+PORT_SCAN_CONCURRENCY = 4000
+# A port scan that records no result for this long is given up (each probe ends within its own timeout)
+PORT_SCAN_STALL = 10.0
+NETBIOS_PORT = 137
+# One listening window for the whole NetBIOS sweep, in seconds
+NETBIOS_TIMEOUT = 1.0
+MDNS_GROUP = ('224.0.0.251', 5353)
+LLMNR_PORT = 5355
+MDNS_TIMEOUT = 1.0
+# DNS-SD service types that identify what kind of device announced them
+MDNS_DEVICE_TYPES = {
+    '_ipp._tcp': 'Printer',
+    '_ipps._tcp': 'Printer',
+    '_printer._tcp': 'Printer',
+    '_pdl-datastream._tcp': 'Printer',
+    '_scanner._tcp': 'Printer',
+    '_rtsp._tcp': 'IP Camera',
+    '_googlecast._tcp': 'Media Device',
+    '_airplay._tcp': 'Media Device',
+    '_raop._tcp': 'Media Device',
+    '_spotify-connect._tcp': 'Media Device',
+    '_hap._tcp': 'Smart Home',
+    '_homekit._tcp': 'Smart Home',
+    '_adisk._tcp': 'NAS/Storage',
+    '_afpovertls._tcp': 'NAS/Storage',
+    '_nfs._tcp': 'NAS/Storage',
+    '_workstation._tcp': 'Computer',
+    '_companion-link._tcp': 'Computer',
+}
+SNMP_PORT = 161
+SNMP_TIMEOUT = 1.0
+# Communities tried against every host, in order
+SNMP_COMMUNITIES = ['public']
+SNMP_OIDS = {
+    'sysDescr': '1.3.6.1.2.1.1.1.0',
+    'sysObjectID': '1.3.6.1.2.1.1.2.0',
+    'sysName': '1.3.6.1.2.1.1.5.0',
+}
+ICMP_TIMEOUT = 1.0
+# Passive mode: kernel BPF filter so only ARP, DHCP, NBNS, SSDP and mDNS frames reach Python
+PASSIVE_BPF = 'arp or (udp and (port 67 or port 68 or port 137 or port 1900 or port 5353))'
+# Reply TTLs that identify an OS family (default TTL, or one hop away)
+TTL_OS = {
+    128: 'Windows', 127: 'Windows',
+    64: 'Linux/Unix', 63: 'Linux/Unix',
+    255: 'Router/Network Device', 254: 'Router/Network Device',
+}
+# Batched nmap: per-host time limit and how many hosts nmap finishes per group
+# (smaller groups stream results sooner, larger ones parallelise better)
+NMAP_HOST_TIMEOUT = '30s'
+NMAP_MAX_HOSTGROUP = 16
+NMAP_MAX_PROCESSES = 4
+# Hostname sources in priority order; all run at once and the best answer
+# available when the deadline (seconds per host) expires wins
+HOSTNAME_METHODS = ['dns', 'netbios', 'smb', 'snmp', 'mdns']
+HOSTNAME_DEADLINE = 3.0
+# Default transmit rate for the half-open SYN scan (packets/second, all hosts)
+SYN_SCAN_RATE = 5000
+# ARP discovery: requests per second and how often answered hosts are handed
+# on to enrichment
+ARP_RATE = 5000
+ARP_BATCH_INTERVAL = 0.5
+# Send times kept for measuring reply latency (bounds memory on large ranges)
+ARP_RTT_TRACKED = 4096
+# ARP retransmission policy. After each pass the sweeper waits until no new
+# reply has arrived for rtt_factor x the slowest reply time seen so far
+# (never less than min_wait, initial_wait before any reply, at most max_wait
+# after the last request), then re-probes only silent addresses, up to
+# retries times, stopping early once a retry pass finds nobody new.
+ARP_POLICY = {
+    'retries': 2,
+    'min_wait': 0.2,
+    'initial_wait': 0.5,
+    'max_wait': 3.0,
+    'rtt_factor': 3.0,
+}
+# Sharded scans: worker processes (default one per CPU), how many subnets
+# per worker a range is cut into, so a dense part of the range is shared out,
+# and how often (seconds) the parent checks on shards while none is reporting
+SHARD_WORKERS = os.cpu_count() or 1
+SHARD_SPLIT = 4
+SHARD_POLL = 1.0
+# Monitor mode: seconds between ARP liveness sweeps, how often an unchanged
+# host is enriched again, how many such hosts are refreshed per cycle and
+# with how many workers per pipeline stage
+MONITOR_INTERVAL = 15
+MONITOR_REENRICH_INTERVAL = 3600
+MONITOR_REENRICH_BATCH = 8
+MONITOR_REENRICH_WORKERS = 1
+# Per-profile scan settings: worker count for each pipeline stage, the bounded
+# queue size between stages, the port set ('fast', 'aggressive', 'syn' or a
+# port list like '22,80,8000-8100') and the per-host pacing delay.
+# Optional keys: 'hostname_methods' / 'hostname_deadline' override the defaults,
+# 'arp_rate' / 'arp_policy' the ARP discovery rate and retransmission policy.
+SCAN_PROFILES = {
+    'regular': {
+        'ports': 'fast',
+        'delay': 0,
+        'queue_size': 256,
+        'stages': {'vendor': 4, 'hostname': 32, 'ports': 16, 'os': 16, 'services': 16, 'analysis': 2},
+    },
+    'stealth': {
+        'ports': 'fast',
+        'delay': 0.5,
+        'arp_rate': 200,
+        'queue_size': 64,
+        'stages': {'vendor': 2, 'hostname': 8, 'ports': 2, 'os': 4, 'services': 2, 'analysis': 1},
+    },
+    'aggressive': {
+        'ports': 'aggressive',
+        'delay': 0,
+        'queue_size': 256,
+        'stages': {'vendor': 4, 'hostname': 32, 'ports': 32, 'os': 16, 'services': 24, 'analysis': 2},
+    },
+    'syn': {
+        'ports': 'syn',
+        'rate': SYN_SCAN_RATE,
+        'delay': 0,
+        'queue_size': 256,
+        'stages': {'vendor': 4, 'hostname': 32, 'ports': 32, 'os': 16, 'services': 24, 'analysis': 2},
+    },
+}
+# Online MAC vendor APIs, tried in order: 'text' ones answer with the vendor
+# name as the body (macvendors.com), 'json' ones with {'found', 'company'}
+# (maclookup.app). Pointed at a local fake by the e2e benchmark.
+VENDOR_API_URLS = [
+    ('text', 'https://api.macvendors.com/{mac}'),
+    ('json', 'https://api.maclookup.app/v2/macs/{mac}'),
+]
+IEEE_REGISTRY_URLS = {
+    'oui': 'https://standards-oui.ieee.org/oui/oui.csv',
+    'mam': 'https://standards-oui.ieee.org/oui28/mam.csv',
+    'oui36': 'https://standards-oui.ieee.org/oui36/oui36.csv',
+    'iab': 'https://standards-oui.ieee.org/iab/iab.csv',
+}
 
 def show_banner():
     """Display the tool banner"""
@@ -93,1335 +288,5584 @@ def menu():
     print("[2] Stealth Mode Scan")
     print("[3] Monitoring Mode")
     print("[4] Deep Scan (Aggressive)")
+    print("[5] SYN Scan (Half-open)")
+    print("[6] Passive Discovery (Sniff Only)")
     choice = input("\n🔥 Select option: ")
     return choice
 
 
+class Metrics:
+    """Attempt/outcome counters and latency histograms for scan stages and lookup methods
+
+    Series are keyed by (kind, name): kind is 'stage', 'hostname', 'vendor'
+    or 'nmap', name the stage or method. answer() counts which method
+    produced the result that was used. One lock and a few dict updates per
+    observation, so it stays on for every scan.
+    """
+
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.answers = collections.Counter()
+
+    def observe(self, kind, name, seconds, outcome='success'):
+        """Record one attempt: outcome is 'success', 'failure' (no answer), 'timeout', 'error' or 'skipped'"""
+        with self.lock:
+            series = self.series.get((kind, name))
+            if series is None:
+                series = self.series[(kind, name)] = {'outcomes': collections.Counter(), 'sum': 0.0, 'max': 0.0,
+                                                      'buckets': [0] * len(self.BUCKETS)}
+            series['outcomes'][outcome] += 1
+            series['sum'] += seconds
+            series['max'] = max(series['max'], seconds)
+            index = bisect.bisect_left(self.BUCKETS, seconds)
+            if index < len(self.BUCKETS):
+                series['buckets'][index] += 1
+
+    def answer(self, kind, name):
+        with self.lock:
+            self.answers[(kind, name)] += 1
+
+    def merge(self, series, answers):
+        """Add another process's series and answers (from a shard) into this one"""
+        with self.lock:
+            for key, other in series.items():
+                mine = self.series.setdefault(key, {'outcomes': collections.Counter(), 'sum': 0.0, 'max': 0.0,
+                                                    'buckets': [0] * len(self.BUCKETS)})
+                mine['outcomes'].update(other['outcomes'])
+                mine['sum'] += other['sum']
+                mine['max'] = max(mine['max'], other['max'])
+                mine['buckets'] = [a + b for a, b in zip(mine['buckets'], other['buckets'])]
+            self.answers.update(answers)
+
+    def prometheus(self):
+        """Prometheus text exposition format"""
+        lines = ['# HELP ak_scanner_duration_seconds Time spent per scan stage or lookup method',
+                 '# TYPE ak_scanner_duration_seconds histogram']
+        with self.lock:
+            series = sorted(self.series.items())
+            answers = sorted(self.answers.items())
+        for (kind, name), s in series:
+            labels = f'kind="{kind}",name="{name}"'
+            total = 0
+            for bound, count in zip(self.BUCKETS, s['buckets']):
+                total += count
+                lines.append(f'ak_scanner_duration_seconds_bucket{{{labels},le="{bound}"}} {total}')
+            count = sum(s['outcomes'].values())
+            lines.append(f'ak_scanner_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'ak_scanner_duration_seconds_sum{{{labels}}} {s["sum"]:.6f}')
+            lines.append(f'ak_scanner_duration_seconds_count{{{labels}}} {count}')
+        lines += ['# HELP ak_scanner_attempts_total Attempts per scan stage or lookup method, by outcome',
+                  '# TYPE ak_scanner_attempts_total counter']
+        for (kind, name), s in series:
+            for outcome, count in sorted(s['outcomes'].items()):
+                lines.append(f'ak_scanner_attempts_total{{kind="{kind}",name="{name}",outcome="{outcome}"}} {count}')
+        lines += ['# HELP ak_scanner_answers_total Results used, by the method that produced them',
+                  '# TYPE ak_scanner_answers_total counter']
+        for (kind, name), count in answers:
+            lines.append(f'ak_scanner_answers_total{{kind="{kind}",name="{name}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """{kind: {name: {attempts, outcomes, answers, mean_ms, max_ms, total_s}}}"""
+        result = {}
+        with self.lock:
+            for (kind, name), s in sorted(self.series.items()):
+                attempts = sum(s['outcomes'].values())
+                result.setdefault(kind, {})[name] = {
+                    'attempts': attempts,
+                    'outcomes': dict(s['outcomes']),
+                    'answers': self.answers.get((kind, name), 0),
+                    'mean_ms': round(s['sum'] / attempts * 1000, 2),
+                    'max_ms': round(s['max'] * 1000, 2),
+                    'total_s': round(s['sum'], 3),
+                }
+            for (kind, name), count in self.answers.items():
+                if (kind, name) not in self.series:
+                    result.setdefault(kind, {})[name] = {'attempts': 0, 'outcomes': {}, 'answers': count}
+        return result
+
+    def report(self):
+        """Print attempts, answers and time per lookup method (dead-weight fallbacks stand out)"""
+        from prettytable import PrettyTable
+        table = PrettyTable()
+        table.field_names = ['Kind', 'Name', 'Attempts', 'Answers', 'Timeouts', 'Mean ms', 'Max ms', 'Total s']
+        table.align = 'l'
+        for kind, names in self.summary().items():
+            for name, s in names.items():
+                table.add_row([kind, name, s['attempts'], s['answers'], s['outcomes'].get('timeout', 0),
+                               s.get('mean_ms', '-'), s.get('max_ms', '-'), s.get('total_s', '-')])
+        print(table)
+
+    def write(self, directory):
+        """Write metrics.prom and metrics.json into directory"""
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'metrics.prom'), 'w') as f:
+            f.write(self.prometheus())
+        with open(os.path.join(directory, 'metrics.json'), 'w') as f:
+            json.dump(self.summary(), f, indent=4)
+        print(f"📈 Metrics written to {directory}/metrics.prom and metrics.json")
+
+
+metrics = Metrics()
+
+
 def get_mac_vendor_online(mac):
     """Get MAC vendor from online API"""
-    try:
-        mac_clean = mac.replace(':', '').replace('-', '').upper()[:6]
-        
-        # Try macvendors.com API
-        url = f"https://api.macvendors.com/{mac}"
-        response = requests.get(url, timeout=2)
-        if response.status_code == 200:
-            return response.text.strip()
-    except:
-        pass
-    
-    try:
-        # Try maclookup.app API
-        url = f"https://api.maclookup.app/v2/macs/{mac}"
-        response = requests.get(url, timeout=2)
-        if response.status_code == 200:
+    import requests
+    for kind, url in VENDOR_API_URLS:
+        name = 'online:' + url.split('/')[2]
+        started = time.perf_counter()
+        outcome = 'failure'
+        try:
+            response = requests.get(url.format(mac=mac), timeout=2)
+            if response.status_code != 200:
+                continue
+            if kind == 'text':
+                outcome = 'success'
+                return response.text.strip()
             data = response.json()
             if data.get('found') and data.get('company'):
+                outcome = 'success'
                 return data['company']
-    except:
-        pass
+        except requests.Timeout:
+            outcome = 'timeout'
+        except:
+            outcome = 'error'
+        finally:
+            metrics.observe('vendor', name, time.perf_counter() - started, outcome)
     
     return None
 
 
-def get_mac_vendor(mac):
-    """Enhanced MAC vendor lookup with multiple methods"""
-    # Method 1: Local database
+# Manual OUI database (common vendors)
+OUI_DATABASE = {
+    '00-50-56': 'VMware',
+    '00-0C-29': 'VMware',
+    '00-05-69': 'VMware',
+    '00-1C-42': 'Parallels',
+    '08-00-27': 'Oracle VirtualBox',
+    '52-54-00': 'QEMU/KVM',
+    'DC-A6-32': 'Raspberry Pi Foundation',
+    'B8-27-EB': 'Raspberry Pi Foundation',
+    'E4-5F-01': 'Raspberry Pi Trading',
+    '00-15-5D': 'Microsoft Hyper-V',
+    '00-25-90': 'Super Micro',
+    '00-1B-21': 'Intel',
+    '00-1A-A0': 'Dell',
+    'D0-50-99': 'Micro-Star International (MSI)',
+    '00-23-24': 'Freescale Semiconductor',
+    '00-22-19': 'Cisco Systems',
+    '00-0D-B9': 'D-Link',
+    '00-C0-CA': 'ALFA Network',
+    '00-1F-3C': 'Hewlett Packard',
+    '3C-A9-F4': 'Hewlett Packard Enterprise',
+    '00-50-B6': 'Hon Hai Precision (Foxconn)',
+    '00-1E-C9': 'BUFFALO.INC',
+    '00-24-D7': 'Cisco-Linksys',
+    '00-E0-4C': 'Realtek',
+    '70-85-C2': 'Realtek',
+    'AC-22-0B': 'Realtek',
+    '00-E0-4B': 'Nokia',
+    '38-D5-47': 'Nokia',
+    '00-1B-63': 'Apple',
+    '00-03-93': 'Apple',
+    '00-0A-27': 'Apple',
+    '00-0D-93': 'Apple',
+    '00-14-51': 'Apple',
+    '00-16-CB': 'Apple',
+    '00-17-F2': 'Apple',
+    '00-19-E3': 'Apple',
+    '00-1B-63': 'Apple',
+    '00-1C-B3': 'Apple',
+    '00-1D-4F': 'Apple',
+    '00-1E-52': 'Apple',
+    '00-1E-C2': 'Apple',
+    '00-1F-5B': 'Apple',
+    '00-1F-F3': 'Apple',
+    '00-21-E9': 'Apple',
+    '00-22-41': 'Apple',
+    '00-23-12': 'Apple',
+    '00-23-32': 'Apple',
+    '00-23-6C': 'Apple',
+    '00-23-DF': 'Apple',
+    '00-24-36': 'Apple',
+    '00-25-00': 'Apple',
+    '00-25-4B': 'Apple',
+    '00-25-BC': 'Apple',
+    '00-26-08': 'Apple',
+    '00-26-4A': 'Apple',
+    '00-26-B0': 'Apple',
+    '00-26-BB': 'Apple',
+    '04-0C-CE': 'Apple',
+    '04-15-52': 'Apple',
+    '04-26-65': 'Apple',
+    '04-48-9A': 'Apple',
+    '04-54-53': 'Apple',
+    '08-66-98': 'Apple',
+    '08-70-45': 'Apple',
+    '0C-3E-9F': 'Apple',
+    '0C-4D-E9': 'Apple',
+    '0C-74-C2': 'Apple',
+    '10-93-E9': 'Apple',
+    '10-9A-DD': 'Apple',
+    '10-DD-B1': 'Apple',
+    '14-10-9F': 'Apple',
+    '14-8F-C6': 'Apple',
+    '14-BD-61': 'Apple',
+    '18-34-51': 'Apple',
+    '18-3D-A2': 'Apple',
+    '18-AF-61': 'Apple',
+    '18-E7-F4': 'Apple',
+    '1C-AB-A7': 'Apple',
+    '20-C9-D0': 'Apple',
+    '24-A0-74': 'Apple',
+    '24-AB-81': 'Apple',
+    '28-37-37': 'Apple',
+    '28-CF-E9': 'Apple',
+    '28-E1-4C': 'Apple',
+    '2C-1F-23': 'Apple',
+    '2C-33-61': 'Apple',
+    '2C-BE-08': 'Apple',
+    '30-63-6B': 'Apple',
+    '30-90-AB': 'Apple',
+    '30-F7-C5': 'Apple',
+    '34-15-9E': 'Apple',
+    '34-36-3B': 'Apple',
+    '34-51-C9': 'Apple',
+    '34-A3-95': 'Apple',
+    '38-0F-4A': 'Apple',
+    '38-C9-86': 'Apple',
+    '3C-15-C2': 'Apple',
+    '40-30-04': 'Apple',
+    '40-33-1A': 'Apple',
+    '40-4D-7F': 'Apple',
+    '40-6C-8F': 'Apple',
+    '40-A6-D9': 'Apple',
+    '40-B3-95': 'Apple',
+    '44-2A-60': 'Apple',
+    '44-4C-0C': 'Apple',
+    '44-D8-84': 'Apple',
+    '48-43-7C': 'Apple',
+    '48-60-BC': 'Apple',
+    '48-A1-95': 'Apple',
+    '4C-74-BF': 'Apple',
+    '4C-B1-99': 'Apple',
+    '50-EA-D6': 'Apple',
+    '54-26-96': 'Apple',
+    '54-72-4F': 'Apple',
+    '54-E4-3A': 'Apple',
+    '58-40-4E': 'Apple',
+    '5C-59-48': 'Apple',
+    '5C-95-AE': 'Apple',
+    '5C-97-F3': 'Apple',
+    '60-33-4B': 'Apple',
+    '60-69-44': 'Apple',
+    '60-C5-47': 'Apple',
+    '60-F8-1D': 'Apple',
+    '60-FA-CD': 'Apple',
+    '60-FB-42': 'Apple',
+    '64-20-0C': 'Apple',
+    '64-76-BA': 'Apple',
+    '64-A3-CB': 'Apple',
+    '64-B9-E8': 'Apple',
+    '68-5B-35': 'Apple',
+    '68-9C-70': 'Apple',
+    '68-A8-6D': 'Apple',
+    '68-D9-3C': 'Apple',
+    '68-FE-F7': 'Apple',
+    '6C-3E-6D': 'Apple',
+    '6C-40-08': 'Apple',
+    '6C-4D-73': 'Apple',
+    '6C-70-9F': 'Apple',
+    '6C-72-E7': 'Apple',
+    '6C-94-F8': 'Apple',
+    '70-11-24': 'Apple',
+    '70-48-0F': 'Apple',
+    '70-56-81': 'Apple',
+    '70-73-CB': 'Apple',
+    '70-CD-60': 'Apple',
+    '70-DE-E2': 'Apple',
+    '70-EC-E4': 'Apple',
+    '74-1B-B2': 'Apple',
+    '74-E1-B6': 'Apple',
+    '74-E2-F5': 'Apple',
+    '78-31-C1': 'Apple',
+    '78-67-D7': 'Apple',
+    '78-7B-8A': 'Apple',
+    '78-A3-E4': 'Apple',
+    '78-CA-39': 'Apple',
+    '78-D7-5F': 'Apple',
+    '78-FD-94': 'Apple',
+    '7C-01-91': 'Apple',
+    '7C-11-BE': 'Apple',
+    '7C-5C-F8': 'Apple',
+    '7C-6D-62': 'Apple',
+    '7C-C3-A1': 'Apple',
+    '7C-D1-C3': 'Apple',
+    '7C-F0-5F': 'Apple',
+    '80-49-71': 'Apple',
+    '80-92-9F': 'Apple',
+    '80-E6-50': 'Apple',
+    '84-38-35': 'Apple',
+    '84-85-06': 'Apple',
+    '84-8E-0C': 'Apple',
+    '84-FC-FE': 'Apple',
+    '88-1F-A1': 'Apple',
+    '88-53-95': 'Apple',
+    '88-63-DF': 'Apple',
+    '88-66-5A': 'Apple',
+    '88-C6-63': 'Apple',
+    '8C-29-37': 'Apple',
+    '8C-2D-AA': 'Apple',
+    '8C-7C-92': 'Apple',
+    '8C-85-90': 'Apple',
+    '8C-FA-BA': 'Apple',
+    '90-27-E4': 'Apple',
+    '90-72-40': 'Apple',
+    '90-8D-6C': 'Apple',
+    '90-B0-ED': 'Apple',
+    '90-B9-31': 'Apple',
+    '94-E9-6A': 'Apple',
+    '98-03-D8': 'Apple',
+    '98-5A-EB': 'Apple',
+    '98-B8-E3': 'Apple',
+    '98-CA-33': 'Apple',
+    '98-D6-BB': 'Apple',
+    '98-E0-D9': 'Apple',
+    '98-F0-AB': 'Apple',
+    '98-FE-94': 'Apple',
+    '9C-20-7B': 'Apple',
+    '9C-35-EB': 'Apple',
+    '9C-84-BF': 'Apple',
+    '9C-F4-8E': 'Apple',
+    '9C-FC-E8': 'Apple',
+    'A0-99-9B': 'Apple',
+    'A0-D7-95': 'Apple',
+    'A0-ED-CD': 'Apple',
+    'A4-5E-60': 'Apple',
+    'A4-67-06': 'Apple',
+    'A4-83-E7': 'Apple',
+    'A4-B1-97': 'Apple',
+    'A4-C3-61': 'Apple',
+    'A4-D1-8C': 'Apple',
+    'A8-20-66': 'Apple',
+    'A8-60-B6': 'Apple',
+    'A8-66-7F': 'Apple',
+    'A8-86-DD': 'Apple',
+    'A8-88-08': 'Apple',
+    'A8-96-75': 'Apple',
+    'A8-BE-27': 'Apple',
+    'A8-FA-D8': 'Apple',
+    'AC-29-3A': 'Apple',
+    'AC-3C-0B': 'Apple',
+    'AC-61-EA': 'Apple',
+    'AC-87-A3': 'Apple',
+    'AC-BC-32': 'Apple',
+    'AC-CF-5C': 'Apple',
+    'B0-34-95': 'Apple',
+    'B0-65-BD': 'Apple',
+    'B0-CA-68': 'Apple',
+    'B4-18-D1': 'Apple',
+    'B4-8B-19': 'Apple',
+    'B4-F0-AB': 'Apple',
+    'B4-F6-1C': 'Apple',
+    'B8-17-C2': 'Apple',
+    'B8-41-A4': 'Apple',
+    'B8-53-AC': 'Apple',
+    'B8-63-4D': 'Apple',
+    'B8-78-2E': 'Apple',
+    'B8-C7-5D': 'Apple',
+    'B8-E8-56': 'Apple',
+    'B8-F6-B1': 'Apple',
+    'BC-3B-AF': 'Apple',
+    'BC-52-B7': 'Apple',
+    'BC-6C-21': 'Apple',
+    'BC-92-6B': 'Apple',
+    'BC-9F-EF': 'Apple',
+    'C0-1A-DA': 'Apple',
+    'C0-2F-2D': 'Google Nest/Chromecast',
+    'C4-2C-03': 'Apple',
+    'C8-2A-14': 'Apple',
+    'C8-33-4B': 'Apple',
+    'C8-69-CD': 'Apple',
+    'C8-85-50': 'Apple',
+    'C8-B5-B7': 'Apple',
+    'C8-BC-C8': 'Apple',
+    'CC-08-8D': 'Apple',
+    'CC-25-EF': 'Apple',
+    'CC-29-F5': 'Apple',
+    'CC-44-63': 'Apple',
+    'CC-78-5F': 'Apple',
+    'D0-03-4B': 'Apple',
+    'D0-23-DB': 'Apple',
+    'D0-33-11': 'Apple',
+    'D0-7E-35': 'Apple',
+    'D0-81-7A': 'Apple',
+    'D0-A6-37': 'Apple',
+    'D0-C5-F3': 'Apple',
+    'D0-D2-B0': 'Apple',
+    'D0-E1-40': 'Apple',
+    'D4-9A-20': 'Apple',
+    'D4-A3-3D': 'Apple',
+    'D4-DC-CD': 'Apple',
+    'D4-F4-6F': 'Apple',
+    'D8-00-4D': 'Apple',
+    'D8-30-62': 'Apple',
+    'D8-96-95': 'Apple',
+    'D8-9E-3F': 'Apple',
+    'D8-A2-5E': 'Apple',
+    'D8-BB-2C': 'Apple',
+    'D8-CF-9C': 'Apple',
+    'DC-2B-2A': 'Apple',
+    'DC-2B-61': 'Apple',
+    'DC-56-E7': 'Apple',
+    'DC-86-D8': 'Apple',
+    'DC-9B-9C': 'Apple',
+    'E0-5F-45': 'Apple',
+    'E0-66-78': 'Apple',
+    'E0-AC-CB': 'Apple',
+    'E0-B5-2D': 'Apple',
+    'E0-B9-E5': 'Apple',
+    'E0-C9-7A': 'Apple',
+    'E0-F5-C6': 'Apple',
+    'E0-F8-47': 'Apple',
+    'E4-25-E7': 'Apple',
+    'E4-8B-7F': 'Apple',
+    'E4-98-D6': 'Apple',
+    'E4-9A-79': 'Apple',
+    'E4-CE-8F': 'Apple',
+    'E8-04-0B': 'Apple',
+    'E8-06-88': 'Apple',
+    'E8-80-2E': 'Apple',
+    'E8-B2-AC': 'Apple',
+    'EC-35-86': 'Apple',
+    'EC-85-2F': 'Apple',
+    'F0-18-98': 'Apple',
+    'F0-24-75': 'Apple',
+    'F0-98-9D': 'Apple',
+    'F0-B4-79': 'Apple',
+    'F0-C1-F1': 'Apple',
+    'F0-CB-A1': 'Apple',
+    'F0-D1-A9': 'Apple',
+    'F0-DB-E2': 'Apple',
+    'F0-DC-E2': 'Apple',
+    'F0-F6-1C': 'Apple',
+    'F4-0F-24': 'Apple',
+    'F4-1B-A1': 'Apple',
+    'F4-37-B7': 'Apple',
+    'F4-5C-89': 'Apple',
+    'F4-F1-5A': 'Apple',
+    'F4-F9-51': 'Apple',
+    'F8-1E-DF': 'Apple',
+    'F8-27-93': 'Apple',
+    'F8-2D-7C': 'Apple',
+    'F8-95-C7': 'Apple',
+    'FC-25-3F': 'Apple',
+    'FC-E9-98': 'Apple',
+    'FC-FC-48': 'Apple',
+    '00-1D-C0': 'TP-Link',
+    '00-27-19': 'TP-Link',
+    '14-CF-92': 'TP-Link',
+    '50-C7-BF': 'TP-Link',
+    '74-DA-88': 'TP-Link',
+    '84-16-F9': 'TP-Link',
+    'A0-F3-C1': 'TP-Link',
+    'C0-4A-00': 'TP-Link',
+    'EC-08-6B': 'TP-Link',
+    'F4-F2-6D': 'TP-Link',
+    '00-18-E7': 'Netgear',
+    '00-14-6C': 'Netgear',
+    '00-26-F2': 'Netgear',
+    '2C-30-33': 'Netgear',
+    '84-1B-5E': 'Netgear',
+    'A0-63-91': 'Netgear',
+    'B0-7F-B9': 'Netgear',
+    'C4-04-15': 'Netgear',
+    'E0-46-9A': 'Netgear',
+    '00-04-20': 'ASUS',
+    '00-1E-8C': 'ASUS',
+    '00-22-15': 'ASUS',
+    '04-D9-F5': 'ASUS',
+    '08-60-6E': 'ASUS',
+    '10-BF-48': 'ASUS',
+    '14-DD-A9': 'ASUS',
+    '1C-B7-2C': 'ASUS',
+    '2C-FD-A1': 'ASUS',
+    '30-5A-3A': 'ASUS',
+    '38-D5-47': 'ASUS',
+    '50-46-5D': 'ASUS',
+    '54-A0-50': 'ASUS',
+    '70-4D-7B': 'ASUS',
+    '74-D0-2B': 'ASUS',
+    '9C-5C-8E': 'ASUS',
+    'AC-9E-17': 'ASUS',
+    'D8-50-E6': 'ASUS',
+    'F4-6D-04': 'ASUS',
+    '00-07-32': 'Belkin',
+    '00-11-50': 'Belkin',
+    '00-17-3F': 'Belkin',
+    '00-1C-DF': 'Belkin',
+    '08-86-3B': 'Belkin',
+    '14-91-82': 'Belkin',
+    '94-10-3E': 'Belkin',
+    'C0-56-27': 'Belkin',
+    'EC-1A-59': 'Belkin',
+    '00-13-10': 'Linksys (Cisco)',
+    '00-14-BF': 'Linksys (Cisco)',
+    '00-18-39': 'Linksys (Cisco)',
+    '00-1A-70': 'Linksys (Cisco)',
+    '00-1D-7E': 'Linksys (Cisco)',
+    '00-21-29': 'Linksys (Cisco)',
+    '00-22-6B': 'Linksys (Cisco)',
+    '00-23-69': 'Linksys (Cisco)',
+    '00-25-9C': 'Linksys (Cisco)',
+    '10-BF-48': 'Linksys (Cisco)',
+    '20-AA-4B': 'Linksys (Cisco)',
+    '48-F8-B3': 'Linksys (Cisco)',
+    '58-6D-8F': 'Linksys (Cisco)',
+    'C0-C1-C0': 'Linksys (Cisco)',
+    'E8-9F-80': 'Linksys (Cisco)',
+    '00-0F-B5': 'Samsung',
+    '00-12-FB': 'Samsung',
+    '00-13-77': 'Samsung',
+    '00-15-99': 'Samsung',
+    '00-16-32': 'Samsung',
+    '00-16-6C': 'Samsung',
+    '00-17-C9': 'Samsung',
+    '00-18-AF': 'Samsung',
+    '00-1A-8A': 'Samsung',
+    '00-1B-98': 'Samsung',
+    '00-1C-43': 'Samsung',
+    '00-1D-25': 'Samsung',
+    '00-1E-7D': 'Samsung',
+    '00-1F-CC': 'Samsung',
+    '00-21-19': 'Samsung',
+    '00-21-4C': 'Samsung',
+    '00-21-D1': 'Samsung',
+    '00-21-D2': 'Samsung',
+    '00-23-39': 'Samsung',
+    '00-23-C2': 'Samsung',
+    '00-23-D6': 'Samsung',
+    '00-23-D7': 'Samsung',
+    '00-24-54': 'Samsung',
+    '00-24-90': 'Samsung',
+    '00-24-91': 'Samsung',
+    '00-24-E9': 'Samsung',
+    '00-25-38': 'Samsung',
+    '00-25-66': 'Samsung',
+    '00-25-67': 'Samsung',
+    '00-26-37': 'Samsung',
+    '00-26-5D': 'Samsung',
+    '00-26-5F': 'Samsung',
+    '04-18-0F': 'Samsung',
+    '04-FE-31': 'Samsung',
+    '08-08-C2': 'Samsung',
+    '08-37-3D': 'Samsung',
+    '08-D4-2B': 'Samsung',
+    '08-EE-8B': 'Samsung',
+    '0C-14-20': 'Samsung',
+    '0C-89-10': 'Samsung',
+    '10-30-47': 'Samsung',
+    '10-77-B1': 'Samsung',
+    '14-7D-C5': 'Samsung',
+    '14-A5-1A': 'Samsung',
+    '18-3A-2D': 'Samsung',
+    '18-3F-47': 'Samsung',
+    '18-46-17': 'Samsung',
+    '18-4F-32': 'Samsung',
+    '1C-62-B8': 'Samsung',
+    '1C-66-AA': 'Samsung',
+    '1C-AF-05': 'Samsung',
+    '20-13-E0': 'Samsung',
+    '20-64-32': 'Samsung',
+    '20-A6-CD': 'Samsung',
+    '24-4B-03': 'Samsung',
+    '28-3D-C2': 'Samsung',
+    '28-63-36': 'Samsung',
+    '28-BA-B5': 'Samsung',
+    '2C-44-01': 'Samsung',
+    '2C-44-FD': 'Samsung',
+    '30-07-4D': 'Samsung',
+    '30-19-66': 'Samsung',
+    '34-08-BC': 'Samsung',
+    '34-23-87': 'Samsung',
+    '34-AA-8B': 'Samsung',
+    '38-01-97': 'Samsung',
+    '38-0A-94': 'Samsung',
+    '38-16-D1': 'Samsung',
+    '38-AA-3C': 'Samsung',
+    '3C-5A-37': 'Samsung',
+    '3C-8B-FE': 'Samsung',
+    '40-0E-85': 'Samsung',
+    '40-0E-DE': 'Samsung',
+    '40-23-43': 'Samsung',
+    '40-5B-D8': 'Samsung',
+    '40-B8-9A': 'Samsung',
+    '44-78-3E': 'Samsung',
+    '44-87-FC': 'Samsung',
+    '44-D6-E2': 'Samsung',
+    '48-5A-3F': 'Samsung',
+    '4C-3C-16': 'Samsung',
+    '4C-BC-A5': 'Samsung',
+    '50-01-BB': 'Samsung',
+    '50-32-37': 'Samsung',
+    '50-78-B3': 'Samsung',
+    '50-A7-2B': 'Samsung',
+    '50-B7-C3': 'Samsung',
+    '50-CC-F8': 'Samsung',
+    '54-88-0E': 'Samsung',
+    '54-92-BE': 'Samsung',
+    '5C-0A-5B': 'Samsung',
+    '5C-0E-8B': 'Samsung',
+    '5C-3C-27': 'Samsung',
+    '5C-51-4F': 'Samsung',
+    '5C-F6-DC': 'Samsung',
+    '5C-F7-E6': 'Samsung',
+    '60-6B-BD': 'Samsung',
+    '60-D0-A9': 'Samsung',
+    '60-F4-45': 'Samsung',
+    '64-6E-97': 'Samsung',
+    '64-77-91': 'Samsung',
+    '64-B8-53': 'Samsung',
+    '68-27-37': 'Samsung',
+    '68-DF-DD': 'Samsung',
+    '6C-2F-2C': 'Samsung',
+    '6C-40-D9': 'Samsung',
+    '70-5A-0F': 'Samsung',
+    '70-F9-27': 'Samsung',
+    '74-45-8A': 'Samsung',
+    '74-5F-00': 'Samsung',
+    '78-1F-DB': 'Samsung',
+    '78-25-AD': 'Samsung',
+    '78-47-1D': 'Samsung',
+    '78-59-5E': 'Samsung',
+    '78-9E-D0': 'Samsung',
+    '78-A8-73': 'Samsung',
+    '78-D6-F0': 'Samsung',
+    '7C-11-CB': 'Samsung',
+    '7C-61-66': 'Samsung',
+    '7C-7A-91': 'Samsung',
+    '7C-B0-C2': 'Samsung',
+    '7C-F8-54': 'Samsung',
+    '80-18-A7': 'Samsung',
+    '80-57-19': 'Samsung',
+    '80-65-6D': 'Samsung',
+    '80-7A-BF': 'Samsung',
+    '84-00-D2': 'Samsung',
+    '84-25-DB': 'Samsung',
+    '84-38-38': 'Samsung',
+    '84-51-81': 'Samsung',
+    '88-32-9B': 'Samsung',
+    '88-36-6C': 'Samsung',
+    '88-BD-45': 'Samsung',
+    '8C-77-12': 'Samsung',
+    '8C-79-F5': 'Samsung',
+    '8C-DE-F9': 'Samsung',
+    '90-18-7C': 'Samsung',
+    '90-61-AE': 'Samsung',
+    '94-35-0A': 'Samsung',
+    '94-51-03': 'Samsung',
+    '94-63-D1': 'Samsung',
+    '94-D7-29': 'Samsung',
+    '98-0C-A5': 'Samsung',
+    '98-52-B1': 'Samsung',
+    '98-E8-FA': 'Samsung',
+    '9C-02-98': 'Samsung',
+    '9C-3A-AF': 'Samsung',
+    '9C-E6-E7': 'Samsung',
+    'A0-0B-BA': 'Samsung',
+    'A0-21-95': 'Samsung',
+    'A0-75-91': 'Samsung',
+    'A0-82-1F': 'Samsung',
+    'A4-EB-D3': 'Samsung',
+    'A8-F2-74': 'Samsung',
+    'AC-36-13': 'Samsung',
+    'AC-5A-14': 'Samsung',
+    'AC-5F-3E': 'Samsung',
+    'AC-7F-3E': 'Samsung',
+    'B0-72-BF': 'Samsung',
+    'B0-EC-71': 'Samsung',
+    'B4-07-F9': 'Samsung',
+    'B4-79-A7': 'Samsung',
+    'B8-5E-7B': 'Samsung',
+    'BC-20-BA': 'Samsung',
+    'BC-44-86': 'Samsung',
+    'BC-72-B1': 'Samsung',
+    'BC-76-70': 'Samsung',
+    'BC-8C-CD': 'Samsung',
+    'BC-B1-F3': 'Samsung',
+    'C0-65-99': 'Samsung',
+    'C0-BD-D1': 'Samsung',
+    'C4-42-02': 'Samsung',
+    'C4-57-6E': 'Samsung',
+    'C4-73-1E': 'Samsung',
+    'C8-19-F7': 'Samsung',
+    'C8-3D-FC': 'Samsung',
+    'C8-A8-23': 'Samsung',
+    'C8-BA-94': 'Samsung',
+    'CC-07-AB': 'Samsung',
+    'CC-3A-61': 'Samsung',
+    'CC-C7-60': 'Samsung',
+    'CC-FE-3C': 'Samsung',
+    'D0-22-BE': 'Samsung',
+    'D0-25-98': 'Samsung',
+    'D0-59-E4': 'Samsung',
+    'D0-66-7B': 'Samsung',
+    'D0-87-E2': 'Samsung',
+    'D4-6A-6A': 'Samsung',
+    'D4-87-D8': 'Samsung',
+    'D4-88-90': 'Samsung',
+    'D4-E8-B2': 'Samsung',
+    'D8-31-CF': 'Samsung',
+    'D8-57-EF': 'Samsung',
+    'D8-90-E8': 'Samsung',
+    'DC-71-44': 'Samsung',
+    'E0-99-71': 'Samsung',
+    'E4-12-1D': 'Samsung',
+    'E4-32-CB': 'Samsung',
+    'E4-3E-D7': 'Samsung',
+    'E4-40-E2': 'Samsung',
+    'E4-92-FB': 'Samsung',
+    'E4-B0-21': 'Samsung',
+    'E8-03-9A': 'Samsung',
+    'E8-11-32': 'Samsung',
+    'E8-50-8B': 'Samsung',
+    'E8-E5-D6': 'Samsung',
+    'EC-1D-8B': 'Samsung',
+    'EC-9B-F3': 'Samsung',
+    'F0-08-F1': 'Samsung',
+    'F0-25-B7': 'Samsung',
+    'F0-5A-09': 'Samsung',
+    'F0-72-8C': 'Samsung',
+    'F4-0E-01': 'Samsung',
+    'F4-7B-5E': 'Samsung',
+    'F4-90-EA': 'Samsung',
+    'F8-04-2E': 'Samsung',
+    'F8-D0-BD': 'Samsung',
+    'FC-00-12': 'Samsung',
+    'FC-03-9F': 'Samsung',
+    'FC-A1-3E': 'Samsung',
+    '00-0C-76': 'Hon Hai (Foxconn)',
+    '00-16-B8': 'Hon Hai (Foxconn)',
+    '00-1B-FC': 'Hon Hai (Foxconn)',
+    '00-22-43': 'Hon Hai (Foxconn)',
+    '00-24-1D': 'Hon Hai (Foxconn)',
+    '00-90-26': 'Technicolor',
+    '00-14-7D': 'Technicolor',
+    '00-17-EE': 'Technicolor',
+    '00-1F-1F': 'Technicolor',
+    '00-24-17': 'Technicolor',
+    '14-0C-76': 'Technicolor',
+    '30-D9-D9': 'Technicolor',
+    '44-00-10': 'Technicolor',
+    '5C-F4-AB': 'Technicolor',
+    '64-31-50': 'Technicolor',
+    '68-A3-78': 'Technicolor',
+    '84-1E-0D': 'Technicolor',
+    '90-8D-78': 'Technicolor',
+    'A4-42-3B': 'Technicolor',
+    'B8-A3-86': 'Technicolor',
+    'C4-71-54': 'Technicolor',
+    'CC-05-2D': 'Technicolor',
+    'E0-B9-4D': 'Technicolor',
+    'E4-48-C7': 'Technicolor',
+    '00-1A-79': 'Huawei',
+    '00-25-9E': 'Huawei',
+    '00-46-4B': 'Huawei',
+    '00-66-4B': 'Huawei',
+    '00-9A-CD': 'Huawei',
+    '00-E0-FC': 'Huawei',
+    '04-02-1F': 'Huawei',
+    '04-6D-6C': 'Huawei',
+    '0C-37-DC': 'Huawei',
+    '0C-96-BF': 'Huawei',
+    '10-51-72': 'Huawei',
+    '10-C6-1F': 'Huawei',
+    '18-0F-76': 'Huawei',
+    '18-54-CF': 'Huawei',
+    '1C-1D-67': 'Huawei',
+    '1C-48-CE': 'Huawei',
+    '1C-FA-68': 'Huawei',
+    '20-08-ED': 'Huawei',
+    '20-2B-C1': 'Huawei',
+    '20-F3-A3': 'Huawei',
+    '24-09-95': 'Huawei',
+    '24-69-A5': 'Huawei',
+    '28-31-52': 'Huawei',
+    '28-6E-D4': 'Huawei',
+    '2C-AB-25': 'Huawei',
+    '30-3A-64': 'Huawei',
+    '34-6B-D3': 'Huawei',
+    '34-CD-BE': 'Huawei',
+    '38-BC-01': 'Huawei',
+    '3C-DF-BD': 'Huawei',
+    '40-4D-8E': 'Huawei',
+    '40-CB-A8': 'Huawei',
+    '44-6E-E5': 'Huawei',
+    '48-46-FB': 'Huawei',
+    '48-DB-50': 'Huawei',
+    '4C-54-99': 'Huawei',
+    '50-2E-5C': 'Huawei',
+    '54-25-EA': 'Huawei',
+    '58-1F-28': 'Huawei',
+    '58-2A-F7': 'Huawei',
+    '5C-63-BF': 'Huawei',
+    '60-DE-44': 'Huawei',
+    '64-3E-8C': 'Huawei',
+    '64-A6-51': 'Huawei',
+    '68-3E-34': 'Huawei',
+    '6C-4A-85': 'Huawei',
+    '6C-96-CF': 'Huawei',
+    '70-72-3C': 'Huawei',
+    '74-A5-28': 'Huawei',
+    '78-D7-52': 'Huawei',
+    '7C-60-97': 'Huawei',
+    '80-26-89': 'Huawei',
+    '80-71-7A': 'Huawei',
+    '80-FB-06': 'Huawei',
+    '84-A8-E4': 'Huawei',
+    '88-28-B3': 'Huawei',
+    '88-CF-98': 'Huawei',
+    '8C-34-FD': 'Huawei',
+    '90-2E-16': 'Huawei',
+    '90-67-1C': 'Huawei',
+    '94-04-9C': 'Huawei',
+    '98-52-3D': 'Huawei',
+    '9C-28-EF': 'Huawei',
+    'A0-C5-89': 'Huawei',
+    'A4-C4-94': 'Huawei',
+    'A8-16-B2': 'Huawei',
+    'AC-4E-91': 'Huawei',
+    'AC-85-3D': 'Huawei',
+    'AC-E2-15': 'Huawei',
+    'B4-CD-27': 'Huawei',
+    'B8-08-CF': 'Huawei',
+    'BC-25-E0': 'Huawei',
+    'BC-76-5E': 'Huawei',
+    'C0-18-50': 'Huawei',
+    'C4-0B-CB': 'Huawei',
+    'C8-14-79': 'Huawei',
+    'C8-3A-35': 'Huawei',
+    'C8-65-8F': 'Huawei',
+    'CC-0E-DA': 'Huawei',
+    'CC-B1-1A': 'Huawei',
+    'D0-74-C2': 'Huawei',
+    'D0-7E-35': 'Huawei',
+    'D4-6E-0E': 'Huawei',
+    'D4-F6-FC': 'Huawei',
+    'D8-49-0B': 'Huawei',
+    'D8-C7-71': 'Huawei',
+    'DC-2C-26': 'Huawei',
+    'DC-D9-16': 'Huawei',
+    'E0-19-1D': 'Huawei',
+    'E0-28-6D': 'Huawei',
+    'E0-97-96': 'Huawei',
+    'E4-36-14': 'Huawei',
+    'E4-C1-46': 'Huawei',
+    'E8-CD-2D': 'Huawei',
+    'EC-23-3D': 'Huawei',
+    'EC-38-8F': 'Huawei',
+    'F0-B4-29': 'Huawei',
+    'F4-4E-FC': 'Huawei',
+    'F8-7B-8C': 'Huawei',
+    'F8-E7-1E': 'Huawei',
+    'FC-48-EF': 'Huawei',
+    '18-A9-05': 'Google',
+    '3C-5A-B4': 'Google',
+    '54-60-09': 'Google',
+    '6C-AD-F8': 'Google',
+    '84-F5-A7': 'Google',
+    'AC-CF-85': 'Google',
+    'B4-F6-1C': 'Google',
+    'C0-2F-2D': 'Google',
+    'CC-C0-79': 'Google',
+    'D0-2D-B3': 'Google',
+    'DC-4F-22': 'Google',
+    'F0-B0-E7': 'Google',
+    'F4-F5-A5': 'Google',
+    'F4-F5-D8': 'Google',
+}
+
+
+def mac_to_int(mac):
+    """Convert a MAC address string (any common notation) to a 48-bit integer"""
+    digits = mac.replace(':', '').replace('-', '').replace('.', '')
+    if len(digits) != 12:
+        raise ValueError(f"Invalid MAC address: {mac}")
+    return int(digits, 16)
+
+
+def parse_ieee_registry(path):
+    """Yield (bits, prefix, vendor) entries from an IEEE oui/mam/oui36/iab .csv or .txt file"""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8', errors='replace') as f:
+            for row in csv.reader(f):
+                if len(row) < 3 or row[0] == 'Registry':
+                    continue
+                assignment = row[1].strip()
+                if assignment and len(assignment) in (6, 7, 9):
+                    yield len(assignment) * 4, int(assignment, 16), row[2].strip()
+        return
+
+    # Text registries list an "(hex)" line with the 24-bit block, followed by a
+    # "(base 16)" line; for MA-M/MA-S/IAB that line carries the sub-range.
+    block = None
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if '(hex)' in line:
+                block = line.split('(hex)')[0].strip().replace('-', '')
+            elif '(base 16)' in line and block:
+                left, vendor = line.split('(base 16)', 1)
+                left = left.strip()
+                vendor = vendor.strip()
+                if not vendor:
+                    continue
+                if '-' in left:
+                    low, high = left.split('-', 1)
+                    extra = ''
+                    for a, b in zip(low, high):
+                        if a != b:
+                            break
+                        extra += a
+                    assignment = block + extra
+                else:
+                    assignment = block
+                if len(assignment) in (6, 7, 9):
+                    yield len(assignment) * 4, int(assignment, 16), vendor
+
+
+def vendor_sources(ieee_dirs=None):
+    """Yield (bits, prefix, vendor) from every local source, lowest priority first"""
+    # IEEE registries (ieee-data package or a refresh download); first directory
+    # holding a registry wins, CSV preferred over TXT
+    for registry in ('oui', 'mam', 'oui36', 'iab'):
+        candidates = [os.path.join(d, registry + ext) for d in ieee_dirs or [IEEE_DATA_DIR] for ext in ('.csv', '.txt')]
+        for path in candidates:
+            if os.path.exists(path):
+                try:
+                    yield from parse_ieee_registry(path)
+                except OSError:
+                    pass
+                break
+
+    # Built-in table of common vendors
+    for prefix, vendor in OUI_DATABASE.items():
+        yield 24, int(prefix.replace('-', ''), 16), vendor
+
+    # mac-vendor-lookup's downloaded vendor list
     try:
-        lookup = MacLookup()
-        lookup.load_vendors()
-        vendor = lookup.lookup(mac)
-        if vendor and vendor != 'Unknown':
-            return vendor
-    except:
+        from mac_vendor_lookup import BaseMacLookup
+        location = BaseMacLookup().find_vendors_list()
+        if location:
+            with open(location, 'rb') as f:
+                for line in f.read().splitlines():
+                    prefix, _, vendor = line.partition(b':')
+                    if len(prefix) == 6 and vendor:
+                        yield 24, int(prefix, 16), vendor.decode('utf-8', errors='replace').strip()
+    except (ImportError, OSError, ValueError):
         pass
-    
-    # Method 2: Update and retry
+
+
+def build_vendor_index(ieee_dirs=None):
+    """Merge all local vendor sources into MA-S/MA-M/MA-L tables keyed by integer prefix"""
+    index = {36: {}, 28: {}, 24: {}}
+    for bits, prefix, vendor in vendor_sources(ieee_dirs):
+        index[bits][prefix] = vendor
+    return index
+
+
+def get_vendor_index():
+    """Return the process-wide vendor index, building it on first use"""
+    global vendor_index
+    if vendor_index is None:
+        with vendor_index_lock:
+            if vendor_index is None:
+                vendor_index = build_vendor_index()
+    return vendor_index
+
+
+class VendorSnapshot:
+    """Read-only, memory-mapped view of a compiled vendor snapshot
+
+    Layout (big-endian): header, then one sorted section of (prefix, name offset)
+    records per prefix length (36, 28, 24 bits), then a blob of length-prefixed
+    UTF-8 vendor names. Nothing is parsed up front; lookups binary-search the map.
+    """
+
+    MAGIC = b'AKOUI'
+    VERSION = 1
+    HEADER = struct.Struct('>5sHQIII')
+    RECORD = struct.Struct('>QI')
+    BITS = (36, 28, 24)
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"Empty vendor snapshot: {path}")
+        magic, version, self.built, *counts = self.HEADER.unpack_from(self.map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self.close()
+            raise ValueError(f"Unsupported vendor snapshot: {path}")
+        self.sections = []
+        offset = self.HEADER.size
+        for bits, count in zip(self.BITS, counts):
+            self.sections.append((bits, offset, count))
+            offset += count * self.RECORD.size
+        self.names_offset = offset
+        self.entries = sum(counts)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def lookup(self, value):
+        """Longest-prefix match of a 48-bit MAC integer, or None"""
+        record = self.RECORD
+        for bits, offset, count in self.sections:
+            key = value >> (48 - bits)
+            lo, hi = 0, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                prefix, name = record.unpack_from(self.map, offset + mid * record.size)
+                if prefix < key:
+                    lo = mid + 1
+                elif prefix > key:
+                    hi = mid
+                else:
+                    start = self.names_offset + name
+                    length = int.from_bytes(self.map[start:start + 2], 'big')
+                    return self.map[start + 2:start + 2 + length].decode('utf-8', errors='replace')
+        return None
+
+
+def compile_vendor_snapshot(index, path):
+    """Write a vendor index to a versioned, sorted binary snapshot (atomically)"""
+    names = {}
+    blob = bytearray()
+    sections = []
+    for bits in VendorSnapshot.BITS:
+        records = bytearray()
+        for prefix in sorted(index[bits]):
+            vendor = index[bits][prefix]
+            if vendor not in names:
+                encoded = vendor.encode('utf-8')[:0xFFFF]
+                names[vendor] = len(blob)
+                blob += len(encoded).to_bytes(2, 'big') + encoded
+            records += VendorSnapshot.RECORD.pack(prefix, names[vendor])
+        sections.append(records)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    header = VendorSnapshot.HEADER.pack(VendorSnapshot.MAGIC, VendorSnapshot.VERSION, int(time.time()),
+                                        *(len(index[bits]) for bits in VendorSnapshot.BITS))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for records in sections:
+            f.write(records)
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def update_vendor_snapshot(path=VENDOR_SNAPSHOT_FILE, download=True):
+    """Refresh command: fetch the IEEE registries and compile the vendor snapshot"""
+    download_dir = os.path.join(SCANNER_CACHE_DIR, 'ieee')
+    if download:
+        import requests
+        os.makedirs(download_dir, exist_ok=True)
+        for registry, url in IEEE_REGISTRY_URLS.items():
+            print(f"📥 Downloading {registry} registry...")
+            try:
+                response = requests.get(url, timeout=30, headers={'User-Agent': 'Mozilla/5.0'})
+                response.raise_for_status()
+                with open(os.path.join(download_dir, registry + '.csv'), 'wb') as f:
+                    f.write(response.content)
+            except Exception as e:
+                print(f"⚠️  Could not download {registry}: {e} - using local copy if any")
+
+    start = time.time()
+    index = build_vendor_index([download_dir, IEEE_DATA_DIR])
+    compile_vendor_snapshot(index, path)
+    entries = sum(len(table) for table in index.values())
+    print(f"✅ Vendor snapshot written to {path} ({entries:,} prefixes, {round(time.time() - start, 2)}s)")
+
+
+def get_vendor_snapshot():
+    """Open the vendor snapshot once per process; None if it is missing or invalid"""
+    global vendor_snapshot
+    if vendor_snapshot is None:
+        with vendor_index_lock:
+            if vendor_snapshot is None:
+                try:
+                    snapshot = VendorSnapshot(VENDOR_SNAPSHOT_FILE)
+                except (OSError, ValueError, struct.error):
+                    snapshot = False
+                if snapshot and time.time() - snapshot.built > VENDOR_SNAPSHOT_MAX_AGE:
+                    days = int((time.time() - snapshot.built) / 86400)
+                    print(f"⚠️  Vendor snapshot is {days} days old - refresh with --update-vendors")
+                vendor_snapshot = snapshot
+    return vendor_snapshot or None
+
+
+def lookup_vendor_index(mac):
+    """Longest-prefix vendor match (36, 28 then 24 bits) against the snapshot or local index"""
     try:
-        BaseMacLookup.update_vendors()
-        lookup = MacLookup()
-        vendor = lookup.lookup(mac)
-        if vendor and vendor != 'Unknown':
+        value = mac_to_int(mac)
+    except ValueError:
+        return None
+    snapshot = get_vendor_snapshot()
+    if snapshot:
+        return snapshot.lookup(value)
+    index = get_vendor_index()
+    for bits in (36, 28, 24):
+        vendor = index[bits].get(value >> (48 - bits))
+        if vendor:
             return vendor
-    except:
-        pass
+    return None
+
+
+def get_mac_vendor(mac):
+    """Enhanced MAC vendor lookup with multiple methods"""
+    # Method 1: Vendor snapshot, or the local OUI index when no snapshot exists.
+    # The registry is never downloaded here - that is --update-vendors' job.
+    started = time.perf_counter()
+    vendor = lookup_vendor_index(mac)
+    metrics.observe('vendor', 'index', time.perf_counter() - started, 'success' if vendor else 'failure')
+    if vendor:
+        metrics.answer('vendor', 'index')
+        return vendor
     
-    # Method 3: Online API
+    # Method 2: Online API
     online_vendor = get_mac_vendor_online(mac)
     if online_vendor:
+        metrics.answer('vendor', 'online')
         return online_vendor
     
-    # Method 4: IEEE OUI lookup using system
+    # Method 3: IEEE OUI lookup using system
+    started = time.perf_counter()
+    outcome = 'failure'
     try:
         output = subprocess.check_output(['ieee-oui', mac[:8]], timeout=2, stderr=subprocess.DEVNULL).decode()
         if output and 'not found' not in output.lower():
             vendor = output.strip().split('\n')[0]
             if vendor:
+                outcome = 'success'
+                metrics.answer('vendor', 'ieee-oui')
                 return vendor
+    except subprocess.TimeoutExpired:
+        outcome = 'timeout'
     except:
-        pass
-    
-    # Method 5: Manual OUI database (common vendors)
-    mac_prefix = mac[:8].upper().replace(':', '-')
-    
-    oui_database = {
-        '00-50-56': 'VMware',
-        '00-0C-29': 'VMware',
-        '00-05-69': 'VMware',
-        '00-1C-42': 'Parallels',
-        '08-00-27': 'Oracle VirtualBox',
-        '52-54-00': 'QEMU/KVM',
-        'DC-A6-32': 'Raspberry Pi Foundation',
-        'B8-27-EB': 'Raspberry Pi Foundation',
-        'E4-5F-01': 'Raspberry Pi Trading',
-        '00-15-5D': 'Microsoft Hyper-V',
-        '00-25-90': 'Super Micro',
-        '00-1B-21': 'Intel',
-        '00-1A-A0': 'Dell',
-        'D0-50-99': 'Micro-Star International (MSI)',
-        '00-23-24': 'Freescale Semiconductor',
-        '00-22-19': 'Cisco Systems',
-        '00-0D-B9': 'D-Link',
-        '00-C0-CA': 'ALFA Network',
-        '00-1F-3C': 'Hewlett Packard',
-        '3C-A9-F4': 'Hewlett Packard Enterprise',
-        '00-50-B6': 'Hon Hai Precision (Foxconn)',
-        '00-1E-C9': 'BUFFALO.INC',
-        '00-24-D7': 'Cisco-Linksys',
-        '00-E0-4C': 'Realtek',
-        '70-85-C2': 'Realtek',
-        'AC-22-0B': 'Realtek',
-        '00-E0-4B': 'Nokia',
-        '38-D5-47': 'Nokia',
-        '00-1B-63': 'Apple',
-        '00-03-93': 'Apple',
-        '00-0A-27': 'Apple',
-        '00-0D-93': 'Apple',
-        '00-14-51': 'Apple',
-        '00-16-CB': 'Apple',
-        '00-17-F2': 'Apple',
-        '00-19-E3': 'Apple',
-        '00-1B-63': 'Apple',
-        '00-1C-B3': 'Apple',
-        '00-1D-4F': 'Apple',
-        '00-1E-52': 'Apple',
-        '00-1E-C2': 'Apple',
-        '00-1F-5B': 'Apple',
-        '00-1F-F3': 'Apple',
-        '00-21-E9': 'Apple',
-        '00-22-41': 'Apple',
-        '00-23-12': 'Apple',
-        '00-23-32': 'Apple',
-        '00-23-6C': 'Apple',
-        '00-23-DF': 'Apple',
-        '00-24-36': 'Apple',
-        '00-25-00': 'Apple',
-        '00-25-4B': 'Apple',
-        '00-25-BC': 'Apple',
-        '00-26-08': 'Apple',
-        '00-26-4A': 'Apple',
-        '00-26-B0': 'Apple',
-        '00-26-BB': 'Apple',
-        '04-0C-CE': 'Apple',
-        '04-15-52': 'Apple',
-        '04-26-65': 'Apple',
-        '04-48-9A': 'Apple',
-        '04-54-53': 'Apple',
-        '08-66-98': 'Apple',
-        '08-70-45': 'Apple',
-        '0C-3E-9F': 'Apple',
-        '0C-4D-E9': 'Apple',
-        '0C-74-C2': 'Apple',
-        '10-93-E9': 'Apple',
-        '10-9A-DD': 'Apple',
-        '10-DD-B1': 'Apple',
-        '14-10-9F': 'Apple',
-        '14-8F-C6': 'Apple',
-        '14-BD-61': 'Apple',
-        '18-34-51': 'Apple',
-        '18-3D-A2': 'Apple',
-        '18-AF-61': 'Apple',
-        '18-E7-F4': 'Apple',
-        '1C-AB-A7': 'Apple',
-        '20-C9-D0': 'Apple',
-        '24-A0-74': 'Apple',
-        '24-AB-81': 'Apple',
-        '28-37-37': 'Apple',
-        '28-CF-E9': 'Apple',
-        '28-E1-4C': 'Apple',
-        '2C-1F-23': 'Apple',
-        '2C-33-61': 'Apple',
-        '2C-BE-08': 'Apple',
-        '30-63-6B': 'Apple',
-        '30-90-AB': 'Apple',
-        '30-F7-C5': 'Apple',
-        '34-15-9E': 'Apple',
-        '34-36-3B': 'Apple',
-        '34-51-C9': 'Apple',
-        '34-A3-95': 'Apple',
-        '38-0F-4A': 'Apple',
-        '38-C9-86': 'Apple',
-        '3C-15-C2': 'Apple',
-        '40-30-04': 'Apple',
-        '40-33-1A': 'Apple',
-        '40-4D-7F': 'Apple',
-        '40-6C-8F': 'Apple',
-        '40-A6-D9': 'Apple',
-        '40-B3-95': 'Apple',
-        '44-2A-60': 'Apple',
-        '44-4C-0C': 'Apple',
-        '44-D8-84': 'Apple',
-        '48-43-7C': 'Apple',
-        '48-60-BC': 'Apple',
-        '48-A1-95': 'Apple',
-        '4C-74-BF': 'Apple',
-        '4C-B1-99': 'Apple',
-        '50-EA-D6': 'Apple',
-        '54-26-96': 'Apple',
-        '54-72-4F': 'Apple',
-        '54-E4-3A': 'Apple',
-        '58-40-4E': 'Apple',
-        '5C-59-48': 'Apple',
-        '5C-95-AE': 'Apple',
-        '5C-97-F3': 'Apple',
-        '60-33-4B': 'Apple',
-        '60-69-44': 'Apple',
-        '60-C5-47': 'Apple',
-        '60-F8-1D': 'Apple',
-        '60-FA-CD': 'Apple',
-        '60-FB-42': 'Apple',
-        '64-20-0C': 'Apple',
-        '64-76-BA': 'Apple',
-        '64-A3-CB': 'Apple',
-        '64-B9-E8': 'Apple',
-        '68-5B-35': 'Apple',
-        '68-9C-70': 'Apple',
-        '68-A8-6D': 'Apple',
-        '68-D9-3C': 'Apple',
-        '68-FE-F7': 'Apple',
-        '6C-3E-6D': 'Apple',
-        '6C-40-08': 'Apple',
-        '6C-4D-73': 'Apple',
-        '6C-70-9F': 'Apple',
-        '6C-72-E7': 'Apple',
-        '6C-94-F8': 'Apple',
-        '70-11-24': 'Apple',
-        '70-48-0F': 'Apple',
-        '70-56-81': 'Apple',
-        '70-73-CB': 'Apple',
-        '70-CD-60': 'Apple',
-        '70-DE-E2': 'Apple',
-        '70-EC-E4': 'Apple',
-        '74-1B-B2': 'Apple',
-        '74-E1-B6': 'Apple',
-        '74-E2-F5': 'Apple',
-        '78-31-C1': 'Apple',
-        '78-67-D7': 'Apple',
-        '78-7B-8A': 'Apple',
-        '78-A3-E4': 'Apple',
-        '78-CA-39': 'Apple',
-        '78-D7-5F': 'Apple',
-        '78-FD-94': 'Apple',
-        '7C-01-91': 'Apple',
-        '7C-11-BE': 'Apple',
-        '7C-5C-F8': 'Apple',
-        '7C-6D-62': 'Apple',
-        '7C-C3-A1': 'Apple',
-        '7C-D1-C3': 'Apple',
-        '7C-F0-5F': 'Apple',
-        '80-49-71': 'Apple',
-        '80-92-9F': 'Apple',
-        '80-E6-50': 'Apple',
-        '84-38-35': 'Apple',
-        '84-85-06': 'Apple',
-        '84-8E-0C': 'Apple',
-        '84-FC-FE': 'Apple',
-        '88-1F-A1': 'Apple',
-        '88-53-95': 'Apple',
-        '88-63-DF': 'Apple',
-        '88-66-5A': 'Apple',
-        '88-C6-63': 'Apple',
-        '8C-29-37': 'Apple',
-        '8C-2D-AA': 'Apple',
-        '8C-7C-92': 'Apple',
-        '8C-85-90': 'Apple',
-        '8C-FA-BA': 'Apple',
-        '90-27-E4': 'Apple',
-        '90-72-40': 'Apple',
-        '90-8D-6C': 'Apple',
-        '90-B0-ED': 'Apple',
-        '90-B9-31': 'Apple',
-        '94-E9-6A': 'Apple',
-        '98-03-D8': 'Apple',
-        '98-5A-EB': 'Apple',
-        '98-B8-E3': 'Apple',
-        '98-CA-33': 'Apple',
-        '98-D6-BB': 'Apple',
-        '98-E0-D9': 'Apple',
-        '98-F0-AB': 'Apple',
-        '98-FE-94': 'Apple',
-        '9C-20-7B': 'Apple',
-        '9C-35-EB': 'Apple',
-        '9C-84-BF': 'Apple',
-        '9C-F4-8E': 'Apple',
-        '9C-FC-E8': 'Apple',
-        'A0-99-9B': 'Apple',
-        'A0-D7-95': 'Apple',
-        'A0-ED-CD': 'Apple',
-        'A4-5E-60': 'Apple',
-        'A4-67-06': 'Apple',
-        'A4-83-E7': 'Apple',
-        'A4-B1-97': 'Apple',
-        'A4-C3-61': 'Apple',
-        'A4-D1-8C': 'Apple',
-        'A8-20-66': 'Apple',
-        'A8-60-B6': 'Apple',
-        'A8-66-7F': 'Apple',
-        'A8-86-DD': 'Apple',
-        'A8-88-08': 'Apple',
-        'A8-96-75': 'Apple',
-        'A8-BE-27': 'Apple',
-        'A8-FA-D8': 'Apple',
-        'AC-29-3A': 'Apple',
-        'AC-3C-0B': 'Apple',
-        'AC-61-EA': 'Apple',
-        'AC-87-A3': 'Apple',
-        'AC-BC-32': 'Apple',
-        'AC-CF-5C': 'Apple',
-        'B0-34-95': 'Apple',
-        'B0-65-BD': 'Apple',
-        'B0-CA-68': 'Apple',
-        'B4-18-D1': 'Apple',
-        'B4-8B-19': 'Apple',
-        'B4-F0-AB': 'Apple',
-        'B4-F6-1C': 'Apple',
-        'B8-17-C2': 'Apple',
-        'B8-41-A4': 'Apple',
-        'B8-53-AC': 'Apple',
-        'B8-63-4D': 'Apple',
-        'B8-78-2E': 'Apple',
-        'B8-C7-5D': 'Apple',
-        'B8-E8-56': 'Apple',
-        'B8-F6-B1': 'Apple',
-        'BC-3B-AF': 'Apple',
-        'BC-52-B7': 'Apple',
-        'BC-6C-21': 'Apple',
-        'BC-92-6B': 'Apple',
-        'BC-9F-EF': 'Apple',
-        'C0-1A-DA': 'Apple',
-        'C0-2F-2D': 'Google Nest/Chromecast',
-        'C4-2C-03': 'Apple',
-        'C8-2A-14': 'Apple',
-        'C8-33-4B': 'Apple',
-        'C8-69-CD': 'Apple',
-        'C8-85-50': 'Apple',
-        'C8-B5-B7': 'Apple',
-        'C8-BC-C8': 'Apple',
-        'CC-08-8D': 'Apple',
-        'CC-25-EF': 'Apple',
-        'CC-29-F5': 'Apple',
-        'CC-44-63': 'Apple',
-        'CC-78-5F': 'Apple',
-        'D0-03-4B': 'Apple',
-        'D0-23-DB': 'Apple',
-        'D0-33-11': 'Apple',
-        'D0-7E-35': 'Apple',
-        'D0-81-7A': 'Apple',
-        'D0-A6-37': 'Apple',
-        'D0-C5-F3': 'Apple',
-        'D0-D2-B0': 'Apple',
-        'D0-E1-40': 'Apple',
-        'D4-9A-20': 'Apple',
-        'D4-A3-3D': 'Apple',
-        'D4-DC-CD': 'Apple',
-        'D4-F4-6F': 'Apple',
-        'D8-00-4D': 'Apple',
-        'D8-30-62': 'Apple',
-        'D8-96-95': 'Apple',
-        'D8-9E-3F': 'Apple',
-        'D8-A2-5E': 'Apple',
-        'D8-BB-2C': 'Apple',
-        'D8-CF-9C': 'Apple',
-        'DC-2B-2A': 'Apple',
-        'DC-2B-61': 'Apple',
-        'DC-56-E7': 'Apple',
-        'DC-86-D8': 'Apple',
-        'DC-9B-9C': 'Apple',
-        'E0-5F-45': 'Apple',
-        'E0-66-78': 'Apple',
-        'E0-AC-CB': 'Apple',
-        'E0-B5-2D': 'Apple',
-        'E0-B9-E5': 'Apple',
-        'E0-C9-7A': 'Apple',
-        'E0-F5-C6': 'Apple',
-        'E0-F8-47': 'Apple',
-        'E4-25-E7': 'Apple',
-        'E4-8B-7F': 'Apple',
-        'E4-98-D6': 'Apple',
-        'E4-9A-79': 'Apple',
-        'E4-CE-8F': 'Apple',
-        'E8-04-0B': 'Apple',
-        'E8-06-88': 'Apple',
-        'E8-80-2E': 'Apple',
-        'E8-B2-AC': 'Apple',
-        'EC-35-86': 'Apple',
-        'EC-85-2F': 'Apple',
-        'F0-18-98': 'Apple',
-        'F0-24-75': 'Apple',
-        'F0-98-9D': 'Apple',
-        'F0-B4-79': 'Apple',
-        'F0-C1-F1': 'Apple',
-        'F0-CB-A1': 'Apple',
-        'F0-D1-A9': 'Apple',
-        'F0-DB-E2': 'Apple',
-        'F0-DC-E2': 'Apple',
-        'F0-F6-1C': 'Apple',
-        'F4-0F-24': 'Apple',
-        'F4-1B-A1': 'Apple',
-        'F4-37-B7': 'Apple',
-        'F4-5C-89': 'Apple',
-        'F4-F1-5A': 'Apple',
-        'F4-F9-51': 'Apple',
-        'F8-1E-DF': 'Apple',
-        'F8-27-93': 'Apple',
-        'F8-2D-7C': 'Apple',
-        'F8-95-C7': 'Apple',
-        'FC-25-3F': 'Apple',
-        'FC-E9-98': 'Apple',
-        'FC-FC-48': 'Apple',
-        '00-1D-C0': 'TP-Link',
-        '00-27-19': 'TP-Link',
-        '14-CF-92': 'TP-Link',
-        '50-C7-BF': 'TP-Link',
-        '74-DA-88': 'TP-Link',
-        '84-16-F9': 'TP-Link',
-        'A0-F3-C1': 'TP-Link',
-        'C0-4A-00': 'TP-Link',
-        'EC-08-6B': 'TP-Link',
-        'F4-F2-6D': 'TP-Link',
-        '00-18-E7': 'Netgear',
-        '00-14-6C': 'Netgear',
-        '00-26-F2': 'Netgear',
-        '2C-30-33': 'Netgear',
-        '84-1B-5E': 'Netgear',
-        'A0-63-91': 'Netgear',
-        'B0-7F-B9': 'Netgear',
-        'C4-04-15': 'Netgear',
-        'E0-46-9A': 'Netgear',
-        '00-04-20': 'ASUS',
-        '00-1E-8C': 'ASUS',
-        '00-22-15': 'ASUS',
-        '04-D9-F5': 'ASUS',
-        '08-60-6E': 'ASUS',
-        '10-BF-48': 'ASUS',
-        '14-DD-A9': 'ASUS',
-        '1C-B7-2C': 'ASUS',
-        '2C-FD-A1': 'ASUS',
-        '30-5A-3A': 'ASUS',
-        '38-D5-47': 'ASUS',
-        '50-46-5D': 'ASUS',
-        '54-A0-50': 'ASUS',
-        '70-4D-7B': 'ASUS',
-        '74-D0-2B': 'ASUS',
-        '9C-5C-8E': 'ASUS',
-        'AC-9E-17': 'ASUS',
-        'D8-50-E6': 'ASUS',
-        'F4-6D-04': 'ASUS',
-        '00-07-32': 'Belkin',
-        '00-11-50': 'Belkin',
-        '00-17-3F': 'Belkin',
-        '00-1C-DF': 'Belkin',
-        '08-86-3B': 'Belkin',
-        '14-91-82': 'Belkin',
-        '94-10-3E': 'Belkin',
-        'C0-56-27': 'Belkin',
-        'EC-1A-59': 'Belkin',
-        '00-13-10': 'Linksys (Cisco)',
-        '00-14-BF': 'Linksys (Cisco)',
-        '00-18-39': 'Linksys (Cisco)',
-        '00-1A-70': 'Linksys (Cisco)',
-        '00-1D-7E': 'Linksys (Cisco)',
-        '00-21-29': 'Linksys (Cisco)',
-        '00-22-6B': 'Linksys (Cisco)',
-        '00-23-69': 'Linksys (Cisco)',
-        '00-25-9C': 'Linksys (Cisco)',
-        '10-BF-48': 'Linksys (Cisco)',
-        '20-AA-4B': 'Linksys (Cisco)',
-        '48-F8-B3': 'Linksys (Cisco)',
-        '58-6D-8F': 'Linksys (Cisco)',
-        'C0-C1-C0': 'Linksys (Cisco)',
-        'E8-9F-80': 'Linksys (Cisco)',
-        '00-0F-B5': 'Samsung',
-        '00-12-FB': 'Samsung',
-        '00-13-77': 'Samsung',
-        '00-15-99': 'Samsung',
-        '00-16-32': 'Samsung',
-        '00-16-6C': 'Samsung',
-        '00-17-C9': 'Samsung',
-        '00-18-AF': 'Samsung',
-        '00-1A-8A': 'Samsung',
-        '00-1B-98': 'Samsung',
-        '00-1C-43': 'Samsung',
-        '00-1D-25': 'Samsung',
-        '00-1E-7D': 'Samsung',
-        '00-1F-CC': 'Samsung',
-        '00-21-19': 'Samsung',
-        '00-21-4C': 'Samsung',
-        '00-21-D1': 'Samsung',
-        '00-21-D2': 'Samsung',
-        '00-23-39': 'Samsung',
-        '00-23-C2': 'Samsung',
-        '00-23-D6': 'Samsung',
-        '00-23-D7': 'Samsung',
-        '00-24-54': 'Samsung',
-        '00-24-90': 'Samsung',
-        '00-24-91': 'Samsung',
-        '00-24-E9': 'Samsung',
-        '00-25-38': 'Samsung',
-        '00-25-66': 'Samsung',
-        '00-25-67': 'Samsung',
-        '00-26-37': 'Samsung',
-        '00-26-5D': 'Samsung',
-        '00-26-5F': 'Samsung',
-        '04-18-0F': 'Samsung',
-        '04-FE-31': 'Samsung',
-        '08-08-C2': 'Samsung',
-        '08-37-3D': 'Samsung',
-        '08-D4-2B': 'Samsung',
-        '08-EE-8B': 'Samsung',
-        '0C-14-20': 'Samsung',
-        '0C-89-10': 'Samsung',
-        '10-30-47': 'Samsung',
-        '10-77-B1': 'Samsung',
-        '14-7D-C5': 'Samsung',
-        '14-A5-1A': 'Samsung',
-        '18-3A-2D': 'Samsung',
-        '18-3F-47': 'Samsung',
-        '18-46-17': 'Samsung',
-        '18-4F-32': 'Samsung',
-        '1C-62-B8': 'Samsung',
-        '1C-66-AA': 'Samsung',
-        '1C-AF-05': 'Samsung',
-        '20-13-E0': 'Samsung',
-        '20-64-32': 'Samsung',
-        '20-A6-CD': 'Samsung',
-        '24-4B-03': 'Samsung',
-        '28-3D-C2': 'Samsung',
-        '28-63-36': 'Samsung',
-        '28-BA-B5': 'Samsung',
-        '2C-44-01': 'Samsung',
-        '2C-44-FD': 'Samsung',
-        '30-07-4D': 'Samsung',
-        '30-19-66': 'Samsung',
-        '34-08-BC': 'Samsung',
-        '34-23-87': 'Samsung',
-        '34-AA-8B': 'Samsung',
-        '38-01-97': 'Samsung',
-        '38-0A-94': 'Samsung',
-        '38-16-D1': 'Samsung',
-        '38-AA-3C': 'Samsung',
-        '3C-5A-37': 'Samsung',
-        '3C-8B-FE': 'Samsung',
-        '40-0E-85': 'Samsung',
-        '40-0E-DE': 'Samsung',
-        '40-23-43': 'Samsung',
-        '40-5B-D8': 'Samsung',
-        '40-B8-9A': 'Samsung',
-        '44-78-3E': 'Samsung',
-        '44-87-FC': 'Samsung',
-        '44-D6-E2': 'Samsung',
-        '48-5A-3F': 'Samsung',
-        '4C-3C-16': 'Samsung',
-        '4C-BC-A5': 'Samsung',
-        '50-01-BB': 'Samsung',
-        '50-32-37': 'Samsung',
-        '50-78-B3': 'Samsung',
-        '50-A7-2B': 'Samsung',
-        '50-B7-C3': 'Samsung',
-        '50-CC-F8': 'Samsung',
-        '54-88-0E': 'Samsung',
-        '54-92-BE': 'Samsung',
-        '5C-0A-5B': 'Samsung',
-        '5C-0E-8B': 'Samsung',
-        '5C-3C-27': 'Samsung',
-        '5C-51-4F': 'Samsung',
-        '5C-F6-DC': 'Samsung',
-        '5C-F7-E6': 'Samsung',
-        '60-6B-BD': 'Samsung',
-        '60-D0-A9': 'Samsung',
-        '60-F4-45': 'Samsung',
-        '64-6E-97': 'Samsung',
-        '64-77-91': 'Samsung',
-        '64-B8-53': 'Samsung',
-        '68-27-37': 'Samsung',
-        '68-DF-DD': 'Samsung',
-        '6C-2F-2C': 'Samsung',
-        '6C-40-D9': 'Samsung',
-        '70-5A-0F': 'Samsung',
-        '70-F9-27': 'Samsung',
-        '74-45-8A': 'Samsung',
-        '74-5F-00': 'Samsung',
-        '78-1F-DB': 'Samsung',
-        '78-25-AD': 'Samsung',
-        '78-47-1D': 'Samsung',
-        '78-59-5E': 'Samsung',
-        '78-9E-D0': 'Samsung',
-        '78-A8-73': 'Samsung',
-        '78-D6-F0': 'Samsung',
-        '7C-11-CB': 'Samsung',
-        '7C-61-66': 'Samsung',
-        '7C-7A-91': 'Samsung',
-        '7C-B0-C2': 'Samsung',
-        '7C-F8-54': 'Samsung',
-        '80-18-A7': 'Samsung',
-        '80-57-19': 'Samsung',
-        '80-65-6D': 'Samsung',
-        '80-7A-BF': 'Samsung',
-        '84-00-D2': 'Samsung',
-        '84-25-DB': 'Samsung',
-        '84-38-38': 'Samsung',
-        '84-51-81': 'Samsung',
-        '88-32-9B': 'Samsung',
-        '88-36-6C': 'Samsung',
-        '88-BD-45': 'Samsung',
-        '8C-77-12': 'Samsung',
-        '8C-79-F5': 'Samsung',
-        '8C-DE-F9': 'Samsung',
-        '90-18-7C': 'Samsung',
-        '90-61-AE': 'Samsung',
-        '94-35-0A': 'Samsung',
-        '94-51-03': 'Samsung',
-        '94-63-D1': 'Samsung',
-        '94-D7-29': 'Samsung',
-        '98-0C-A5': 'Samsung',
-        '98-52-B1': 'Samsung',
-        '98-E8-FA': 'Samsung',
-        '9C-02-98': 'Samsung',
-        '9C-3A-AF': 'Samsung',
-        '9C-E6-E7': 'Samsung',
-        'A0-0B-BA': 'Samsung',
-        'A0-21-95': 'Samsung',
-        'A0-75-91': 'Samsung',
-        'A0-82-1F': 'Samsung',
-        'A4-EB-D3': 'Samsung',
-        'A8-F2-74': 'Samsung',
-        'AC-36-13': 'Samsung',
-        'AC-5A-14': 'Samsung',
-        'AC-5F-3E': 'Samsung',
-        'AC-7F-3E': 'Samsung',
-        'B0-72-BF': 'Samsung',
-        'B0-EC-71': 'Samsung',
-        'B4-07-F9': 'Samsung',
-        'B4-79-A7': 'Samsung',
-        'B8-5E-7B': 'Samsung',
-        'BC-20-BA': 'Samsung',
-        'BC-44-86': 'Samsung',
-        'BC-72-B1': 'Samsung',
-        'BC-76-70': 'Samsung',
-        'BC-8C-CD': 'Samsung',
-        'BC-B1-F3': 'Samsung',
-        'C0-65-99': 'Samsung',
-        'C0-BD-D1': 'Samsung',
-        'C4-42-02': 'Samsung',
-        'C4-57-6E': 'Samsung',
-        'C4-73-1E': 'Samsung',
-        'C8-19-F7': 'Samsung',
-        'C8-3D-FC': 'Samsung',
-        'C8-A8-23': 'Samsung',
-        'C8-BA-94': 'Samsung',
-        'CC-07-AB': 'Samsung',
-        'CC-3A-61': 'Samsung',
-        'CC-C7-60': 'Samsung',
-        'CC-FE-3C': 'Samsung',
-        'D0-22-BE': 'Samsung',
-        'D0-25-98': 'Samsung',
-        'D0-59-E4': 'Samsung',
-        'D0-66-7B': 'Samsung',
-        'D0-87-E2': 'Samsung',
-        'D4-6A-6A': 'Samsung',
-        'D4-87-D8': 'Samsung',
-        'D4-88-90': 'Samsung',
-        'D4-E8-B2': 'Samsung',
-        'D8-31-CF': 'Samsung',
-        'D8-57-EF': 'Samsung',
-        'D8-90-E8': 'Samsung',
-        'DC-71-44': 'Samsung',
-        'E0-99-71': 'Samsung',
-        'E4-12-1D': 'Samsung',
-        'E4-32-CB': 'Samsung',
-        'E4-3E-D7': 'Samsung',
-        'E4-40-E2': 'Samsung',
-        'E4-92-FB': 'Samsung',
-        'E4-B0-21': 'Samsung',
-        'E8-03-9A': 'Samsung',
-        'E8-11-32': 'Samsung',
-        'E8-50-8B': 'Samsung',
-        'E8-E5-D6': 'Samsung',
-        'EC-1D-8B': 'Samsung',
-        'EC-9B-F3': 'Samsung',
-        'F0-08-F1': 'Samsung',
-        'F0-25-B7': 'Samsung',
-        'F0-5A-09': 'Samsung',
-        'F0-72-8C': 'Samsung',
-        'F4-0E-01': 'Samsung',
-        'F4-7B-5E': 'Samsung',
-        'F4-90-EA': 'Samsung',
-        'F8-04-2E': 'Samsung',
-        'F8-D0-BD': 'Samsung',
-        'FC-00-12': 'Samsung',
-        'FC-03-9F': 'Samsung',
-        'FC-A1-3E': 'Samsung',
-        '00-0C-76': 'Hon Hai (Foxconn)',
-        '00-16-B8': 'Hon Hai (Foxconn)',
-        '00-1B-FC': 'Hon Hai (Foxconn)',
-        '00-22-43': 'Hon Hai (Foxconn)',
-        '00-24-1D': 'Hon Hai (Foxconn)',
-        '00-90-26': 'Technicolor',
-        '00-14-7D': 'Technicolor',
-        '00-17-EE': 'Technicolor',
-        '00-1F-1F': 'Technicolor',
-        '00-24-17': 'Technicolor',
-        '14-0C-76': 'Technicolor',
-        '30-D9-D9': 'Technicolor',
-        '44-00-10': 'Technicolor',
-        '5C-F4-AB': 'Technicolor',
-        '64-31-50': 'Technicolor',
-        '68-A3-78': 'Technicolor',
-        '84-1E-0D': 'Technicolor',
-        '90-8D-78': 'Technicolor',
-        'A4-42-3B': 'Technicolor',
-        'B8-A3-86': 'Technicolor',
-        'C4-71-54': 'Technicolor',
-        'CC-05-2D': 'Technicolor',
-        'E0-B9-4D': 'Technicolor',
-        'E4-48-C7': 'Technicolor',
-        '00-1A-79': 'Huawei',
-        '00-25-9E': 'Huawei',
-        '00-46-4B': 'Huawei',
-        '00-66-4B': 'Huawei',
-        '00-9A-CD': 'Huawei',
-        '00-E0-FC': 'Huawei',
-        '04-02-1F': 'Huawei',
-        '04-6D-6C': 'Huawei',
-        '0C-37-DC': 'Huawei',
-        '0C-96-BF': 'Huawei',
-        '10-51-72': 'Huawei',
-        '10-C6-1F': 'Huawei',
-        '18-0F-76': 'Huawei',
-        '18-54-CF': 'Huawei',
-        '1C-1D-67': 'Huawei',
-        '1C-48-CE': 'Huawei',
-        '1C-FA-68': 'Huawei',
-        '20-08-ED': 'Huawei',
-        '20-2B-C1': 'Huawei',
-        '20-F3-A3': 'Huawei',
-        '24-09-95': 'Huawei',
-        '24-69-A5': 'Huawei',
-        '28-31-52': 'Huawei',
-        '28-6E-D4': 'Huawei',
-        '2C-AB-25': 'Huawei',
-        '30-3A-64': 'Huawei',
-        '34-6B-D3': 'Huawei',
-        '34-CD-BE': 'Huawei',
-        '38-BC-01': 'Huawei',
-        '3C-DF-BD': 'Huawei',
-        '40-4D-8E': 'Huawei',
-        '40-CB-A8': 'Huawei',
-        '44-6E-E5': 'Huawei',
-        '48-46-FB': 'Huawei',
-        '48-DB-50': 'Huawei',
-        '4C-54-99': 'Huawei',
-        '50-2E-5C': 'Huawei',
-        '54-25-EA': 'Huawei',
-        '58-1F-28': 'Huawei',
-        '58-2A-F7': 'Huawei',
-        '5C-63-BF': 'Huawei',
-        '60-DE-44': 'Huawei',
-        '64-3E-8C': 'Huawei',
-        '64-A6-51': 'Huawei',
-        '68-3E-34': 'Huawei',
-        '6C-4A-85': 'Huawei',
-        '6C-96-CF': 'Huawei',
-        '70-72-3C': 'Huawei',
-        '74-A5-28': 'Huawei',
-        '78-D7-52': 'Huawei',
-        '7C-60-97': 'Huawei',
-        '80-26-89': 'Huawei',
-        '80-71-7A': 'Huawei',
-        '80-FB-06': 'Huawei',
-        '84-A8-E4': 'Huawei',
-        '88-28-B3': 'Huawei',
-        '88-CF-98': 'Huawei',
-        '8C-34-FD': 'Huawei',
-        '90-2E-16': 'Huawei',
-        '90-67-1C': 'Huawei',
-        '94-04-9C': 'Huawei',
-        '98-52-3D': 'Huawei',
-        '9C-28-EF': 'Huawei',
-        'A0-C5-89': 'Huawei',
-        'A4-C4-94': 'Huawei',
-        'A8-16-B2': 'Huawei',
-        'AC-4E-91': 'Huawei',
-        'AC-85-3D': 'Huawei',
-        'AC-E2-15': 'Huawei',
-        'B4-CD-27': 'Huawei',
-        'B8-08-CF': 'Huawei',
-        'BC-25-E0': 'Huawei',
-        'BC-76-5E': 'Huawei',
-        'C0-18-50': 'Huawei',
-        'C4-0B-CB': 'Huawei',
-        'C8-14-79': 'Huawei',
-        'C8-3A-35': 'Huawei',
-        'C8-65-8F': 'Huawei',
-        'CC-0E-DA': 'Huawei',
-        'CC-B1-1A': 'Huawei',
-        'D0-74-C2': 'Huawei',
-        'D0-7E-35': 'Huawei',
-        'D4-6E-0E': 'Huawei',
-        'D4-F6-FC': 'Huawei',
-        'D8-49-0B': 'Huawei',
-        'D8-C7-71': 'Huawei',
-        'DC-2C-26': 'Huawei',
-        'DC-D9-16': 'Huawei',
-        'E0-19-1D': 'Huawei',
-        'E0-28-6D': 'Huawei',
-        'E0-97-96': 'Huawei',
-        'E4-36-14': 'Huawei',
-        'E4-C1-46': 'Huawei',
-        'E8-CD-2D': 'Huawei',
-        'EC-23-3D': 'Huawei',
-        'EC-38-8F': 'Huawei',
-        'F0-B4-29': 'Huawei',
-        'F4-4E-FC': 'Huawei',
-        'F8-7B-8C': 'Huawei',
-        'F8-E7-1E': 'Huawei',
-        'FC-48-EF': 'Huawei',
-        '18-A9-05': 'Google',
-        '3C-5A-B4': 'Google',
-        '54-60-09': 'Google',
-        '6C-AD-F8': 'Google',
-        '84-F5-A7': 'Google',
-        'AC-CF-85': 'Google',
-        'B4-F6-1C': 'Google',
-        'C0-2F-2D': 'Google',
-        'CC-C0-79': 'Google',
-        'D0-2D-B3': 'Google',
-        'DC-4F-22': 'Google',
-        'F0-B0-E7': 'Google',
-        'F4-F5-A5': 'Google',
-        'F4-F5-D8': 'Google',
-    }
-    
-    for prefix, vendor in oui_database.items():
-        if mac_prefix.startswith(prefix):
-            return vendor
-    
-    # Method 6: Extract from system OUI database file
-    try:
-        if os.path.exists('/usr/share/ieee-data/oui.txt'):
-            with open('/usr/share/ieee-data/oui.txt', 'r') as f:
-                content = f.read()
-                mac_search = mac[:8].upper().replace(':', '-')
-                if mac_search in content:
-                    lines = content.split('\n')
-                    for i, line in enumerate(lines):
-                        if mac_search in line and i + 2 < len(lines):
-                            vendor = lines[i + 2].strip()
-                            if vendor:
-                                return vendor
-    except:
-        pass
+        outcome = 'error'
+    finally:
+        metrics.observe('vendor', 'ieee-oui', time.perf_counter() - started, outcome)
     
+    metrics.answer('vendor', 'none')
     return 'Unknown'
 
 
-def get_hostname_advanced(ip):
-    """Advanced hostname detection using multiple methods"""
-    hostname = "Unknown"
-    
-    # Method 1: DNS Reverse Lookup (fastest)
-    try:
-        hostname = socket.gethostbyaddr(ip)[0]
-        if hostname and hostname != ip and '.' in hostname:
-            return hostname.split('.')[0]
-    except:
-        pass
-    
-    # Method 2: NBT-NS (NetBIOS Name Service) - nmblookup
-    try:
-        output = subprocess.check_output(['nmblookup', '-A', ip], timeout=2, stderr=subprocess.DEVNULL).decode()
-        for line in output.split('\n'):
-            if '<00>' in line and '<GROUP>' not in line and 'Looking up' not in line:
-                parts = line.split()
-                if len(parts) > 0:
-                    name = parts[0].strip()
-                    if name and name != ip and not name.startswith('..'):
-                        return name
-    except:
-        pass
-    
-    # Method 3: nbtscan (faster NetBIOS scanner)
-    try:
-        output = subprocess.check_output(['nbtscan', '-r', ip], timeout=2, stderr=subprocess.DEVNULL).decode()
-        for line in output.split('\n'):
-            if ip in line:
-                parts = line.split()
-                if len(parts) >= 2:
-                    name = parts[1].strip()
-                    if name and name != 'Sendto' and name != ip:
-                        return name
-    except:
-        pass
-    
-    # Method 4: Direct NetBIOS query on port 137
+def build_nbstat_query(transaction_id):
+    """NetBIOS node status (NBSTAT) request for the wildcard name '*'"""
+    header = struct.pack('!HHHHHH', transaction_id, 0x0000, 1, 0, 0, 0)
+    name = b'\x20' + b'CK' + b'A' * 30 + b'\x00'
+    return header + name + struct.pack('!HH', 0x0021, 0x0001)
+
+
+def skip_netbios_name(data, offset):
+    """Offset just past an encoded (or compressed) name in a NetBIOS packet"""
+    while offset < len(data):
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += 1 + length
+        if length == 0:
+            return offset
+    raise ValueError("Truncated NetBIOS name")
+
+
+def parse_nbstat_response(data):
+    """Parse a node status response into its transaction ID and full name table
+
+    Returns (transaction_id, info) where info has 'names' [(name, suffix, group)],
+    'hostname', 'workgroup' and 'mac'; raises ValueError on malformed packets.
+    """
+    if len(data) < 12:
+        raise ValueError("Short NetBIOS packet")
+    transaction_id, flags, questions, answers = struct.unpack_from('!HHHH', data, 0)
+    if not flags & 0x8000 or answers < 1:
+        raise ValueError("Not a NetBIOS response")
+    offset = 12
+    for _ in range(questions):
+        offset = skip_netbios_name(data, offset) + 4
+    offset = skip_netbios_name(data, offset)
+    rr_type, _, _, rd_length = struct.unpack_from('!HHIH', data, offset)
+    offset += 10
+    if rr_type != 0x0021 or offset + rd_length > len(data):
+        raise ValueError("Not a node status answer")
+
+    count = data[offset]
+    offset += 1
+    names = []
+    for _ in range(count):
+        if offset + 18 > len(data):
+            raise ValueError("Truncated NetBIOS name table")
+        raw_name = data[offset:offset + 15].decode('ascii', errors='ignore').rstrip(' \x00')
+        suffix = data[offset + 15]
+        name_flags = struct.unpack_from('!H', data, offset + 16)[0]
+        names.append((raw_name, suffix, bool(name_flags & 0x8000)))
+        offset += 18
+
+    mac = None
+    unit_id = data[offset:offset + 6]
+    if len(unit_id) == 6 and any(unit_id):
+        mac = ':'.join(f'{b:02x}' for b in unit_id)
+
+    hostname = next((n for n, suffix, group in names if suffix == 0x00 and not group and n), None)
+    hostname = hostname or next((n for n, suffix, group in names if suffix == 0x20 and not group and n), None)
+    workgroup = next((n for n, suffix, group in names if suffix == 0x00 and group and n), None)
+    return transaction_id, {'names': names, 'hostname': hostname, 'workgroup': workgroup, 'mac': mac}
+
+
+def netbios_sweep(ips, timeout=NETBIOS_TIMEOUT, port=NETBIOS_PORT, retries=1):
+    """Send NBSTAT queries to every IP from one UDP socket and collect replies
+
+    Replies are matched by transaction ID (and source address), so a whole
+    subnet resolves in one timeout window. Returns {ip: info} for responders.
+    """
+    ips = list(ips)
+    results = {}
+    if not ips:
+        return results
+    base = random.randint(0, 0xFFFF)
+    pending = {(base + i) & 0xFFFF: ip for i, ip in enumerate(ips)}
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.settimeout(1)
-        
-        # NetBIOS name query packet
-        query = b'\xA2\x48\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00\x20'
-        query += b'CKAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA\x00\x00\x21\x00\x01'
-        
-        sock.sendto(query, (ip, 137))
-        response = sock.recvfrom(1024)[0]
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+        sock.setblocking(False)
+        rounds = retries + 1
+        for attempt in range(rounds):
+            for transaction_id, ip in list(pending.items()):
+                try:
+                    sock.sendto(build_nbstat_query(transaction_id), (ip, port))
+                except OSError:
+                    pass
+            # Retransmissions go only to hosts that have not answered yet
+            deadline = time.monotonic() + timeout / rounds
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                readable, _, _ = select.select([sock], [], [], remaining)
+                if not readable:
+                    break
+                try:
+                    data, (source, _) = sock.recvfrom(2048)
+                    transaction_id, info = parse_nbstat_response(data)
+                except (OSError, ValueError, struct.error):
+                    continue
+                if pending.get(transaction_id) == source:
+                    del pending[transaction_id]
+                    results[source] = info
+            if not pending:
+                break
+    finally:
         sock.close()
-        
-        if len(response) > 56:
-            name_data = response[56:72]
-            name = name_data.decode('ascii', errors='ignore').strip()
-            if name and len(name) > 0:
-                return name.split('\x00')[0].strip()
-    except:
-        pass
-    
-    # Method 5: SMB/CIFS hostname
-    try:
-        output = subprocess.check_output(['smbclient', '-L', ip, '-N'], timeout=3, stderr=subprocess.DEVNULL).decode()
-        for line in output.split('\n'):
-            if 'Server=' in line or 'Workgroup=' in line:
-                if 'Server=' in line:
-                    parts = line.split('Server=')
-                    if len(parts) > 1:
-                        name = parts[1].split()[0].strip()
-                        if name and name != ip:
-                            return name
-    except:
-        pass
-    
-    # Method 6: SNMP system name
-    try:
-        output = subprocess.check_output(['snmpget', '-v2c', '-c', 'public', ip, 'sysName.0'], 
-                                       timeout=2, stderr=subprocess.DEVNULL).decode()
-        if 'STRING:' in output:
-            name = output.split('STRING:')[1].strip().strip('"').strip()
-            if name and name != ip:
-                return name
-    except:
-        pass
-    
-    # Method 7: mDNS/Avahi (for local network devices)
-    try:
-        output = subprocess.check_output(['avahi-resolve', '-a', ip], timeout=2, stderr=subprocess.DEVNULL).decode()
-        parts = output.strip().split()
-        if len(parts) >= 2:
-            name = parts[1].replace('.local', '').strip()
-            if name and name != ip:
-                return name
-    except:
-        pass
-    
-    # Method 8: Ping hostname resolution (Windows style)
-    try:
-        if sys.platform.startswith('win'):
-            output = subprocess.check_output(['ping', '-a', '-n', '1', ip], 
-                                           timeout=2, stderr=subprocess.DEVNULL).decode()
-        else:
-            output = subprocess.check_output(['ping', '-c', '1', ip], 
-                                           timeout=2, stderr=subprocess.DEVNULL).decode()
-        
-        # Extract hostname from ping output
-        for line in output.split('\n'):
-            if ip in line and '[' not in line:
-                match = re.search(r'from ([a-zA-Z0-9\-\_\.]+)', line)
-                if match:
-                    name = match.group(1)
-                    if name and name != ip:
-                        return name.split('.')[0]
-    except:
-        pass
-    
-    return hostname
+    return results
 
 
-def scan_ports_fast(ip):
-    """Fast port scanning using multiple techniques"""
-    common_ports = [21, 22, 23, 25, 53, 80, 110, 135, 139, 143, 443, 445, 3306, 3389, 5432, 5900, 8080, 8443]
-    open_ports = []
-    
-    def check_port(port):
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(0.3)
-            result = sock.connect_ex((ip, port))
-            sock.close()
-            if result == 0:
-                return port
-        except:
-            pass
-        return None
-    
-    with ThreadPoolExecutor(max_workers=20) as executor:
-        futures = [executor.submit(check_port, port) for port in common_ports]
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                open_ports.append(str(result))
-    
-    return ', '.join(sorted(open_ports, key=int)) if open_ports else 'None'
+def encode_dns_name(name):
+    return b''.join(bytes([len(label)]) + label for label in name.rstrip('.').encode().split(b'.')) + b'\0'
 
 
-def scan_ports_aggressive(ip):
-    """Aggressive port scan (1-1024)"""
-    open_ports = []
-    
-    def check_port(port):
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(0.2)
-            result = sock.connect_ex((ip, port))
-            sock.close()
-            if result == 0:
-                return port
-        except:
-            pass
-        return None
-    
-    with ThreadPoolExecutor(max_workers=50) as executor:
-        futures = [executor.submit(check_port, port) for port in range(1, 1025)]
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                open_ports.append(str(result))
-    
-    return ', '.join(sorted(open_ports, key=int)) if open_ports else 'None'
+def build_dns_query(transaction_id, questions, unicast=False):
+    """DNS/mDNS/LLMNR query for a list of (name, qtype); unicast sets the mDNS QU bit"""
+    query = struct.pack('!HHHHHH', transaction_id, 0, len(questions), 0, 0, 0)
+    for name, qtype in questions:
+        query += encode_dns_name(name) + struct.pack('!HH', qtype, 0x8001 if unicast else 0x0001)
+    return query
 
 
-def guess_os(ip):
-    """Enhanced OS detection"""
+def read_dns_name(data, offset):
+    """Decode a (possibly compressed) DNS name; returns (name, offset after it)"""
+    labels = []
+    end = None
+    for _ in range(128):
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            return '.'.join(labels), end if end is not None else offset
+        labels.append(data[offset:offset + length].decode('utf-8', errors='replace'))
+        offset += length
+    raise ValueError("DNS name compression loop")
+
+
+def parse_dns_records(data):
+    """Return [(name, type, value)] for every resource record in a DNS message
+
+    value is the target name for PTR records, the address for A records and
+    None for anything else.
+    """
+    _, _, questions, answers, authority, additional = struct.unpack_from('!HHHHHH', data, 0)
+    offset = 12
+    for _ in range(questions):
+        offset = read_dns_name(data, offset)[1] + 4
+    records = []
+    for _ in range(answers + authority + additional):
+        name, offset = read_dns_name(data, offset)
+        rr_type, _, _, rd_length = struct.unpack_from('!HHIH', data, offset)
+        offset += 10
+        value = None
+        if rr_type == 12:
+            value = read_dns_name(data, offset)[0]
+        elif rr_type == 1 and rd_length == 4:
+            value = socket.inet_ntoa(data[offset:offset + 4])
+        offset += rd_length
+        records.append((name.lower(), rr_type, value))
+    return records
+
+
+def mdns_sweep(ips, timeout=MDNS_TIMEOUT, group=MDNS_GROUP, llmnr_port=LLMNR_PORT, interface_ip=None):
+    """Batch reverse lookups over mDNS (multicast) and LLMNR from one socket
+
+    Sends PTR in-addr.arpa questions for every IP plus a DNS-SD service
+    enumeration, then listens for one window. Returns {ip: {'hostname',
+    'services'}}; unsolicited service announcements are kept as well.
+    """
+    ips = list(ips)
+    results = {}
+    wanted = {ipaddress.ip_address(ip).reverse_pointer: ip for ip in ips}
+    if interface_ip is None and ips:
+        try:
+            interface_ip = source_ip_for(ips[0])
+        except OSError:
+            interface_ip = None
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
     try:
-        if sys.platform.startswith('win'):
-            output = subprocess.check_output(['ping', '-n', '1', ip], timeout=2, stderr=subprocess.DEVNULL).decode().lower()
-        else:
-            output = subprocess.check_output(['ping', '-c', '1', ip], timeout=2, stderr=subprocess.DEVNULL).decode().lower()
-        
-        if 'ttl=128' in output or 'ttl=127' in output:
-            return 'Windows'
-        elif 'ttl=64' in output or 'ttl=63' in output:
-            return 'Linux/Unix'
-        elif 'ttl=255' in output or 'ttl=254' in output:
-            return 'Router/Network Device'
-        
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         try:
-            output = subprocess.check_output(['nmap', '-O', '--osscan-guess', ip], timeout=10, stderr=subprocess.DEVNULL).decode()
-            if 'Running:' in output:
-                os_line = [line for line in output.split('\n') if 'Running:' in line][0]
-                return os_line.split('Running:')[1].strip()[:30]
-        except:
+            # Sharing the mDNS port lets us hear multicast answers and announcements
+            sock.bind(('', group[1]))
+            unicast = False
+        except OSError:
+            sock.bind(('', 0))
+            unicast = True
+        membership = socket.inet_aton(group[0]) + socket.inet_aton(interface_ip or '0.0.0.0')
+        try:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        except OSError:
+            unicast = True
+        if interface_ip:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface_ip))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        sock.setblocking(False)
+
+        names = list(wanted)
+        # Several questions per packet keeps the burst small and under the MTU
+        for i in range(0, len(names), 20):
+            questions = [(name, 12) for name in names[i:i + 20]]
+            try:
+                sock.sendto(build_dns_query(0, questions, unicast), group)
+            except OSError:
+                pass
+        try:
+            sock.sendto(build_dns_query(0, [('_services._dns-sd._udp.local', 12)], unicast), group)
+        except OSError:
             pass
-            
-        return 'Unknown'
-    except:
-        return 'Unknown'
+        for transaction_id, name in enumerate(names):
+            try:
+                sock.sendto(build_dns_query(transaction_id, [(name, 12)]), (wanted[name], llmnr_port))
+            except OSError:
+                pass
 
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([sock], [], [], remaining)
+            if not readable:
+                break
+            try:
+                data, (source, _) = sock.recvfrom(9000)
+                if not struct.unpack_from('!H', data, 2)[0] & 0x8000:
+                    continue
+                records = parse_dns_records(data)
+            except (OSError, ValueError, IndexError, struct.error):
+                continue
+            for name, rr_type, value in records:
+                if rr_type != 12 or not value:
+                    continue
+                if name in wanted:
+                    host = value.rstrip('.')
+                    if host.endswith('.local'):
+                        host = host[:-len('.local')]
+                    entry = results.setdefault(wanted[name], {'hostname': None, 'services': set()})
+                    entry['hostname'] = entry['hostname'] or host
+                elif name == '_services._dns-sd._udp.local':
+                    service = value.rstrip('.').lower().replace('.local', '')
+                    results.setdefault(source, {'hostname': None, 'services': set()})['services'].add(service)
+                elif '._tcp.' in name or '._udp.' in name:
+                    # Service announcement: '<instance>._ipp._tcp.local' or '_ipp._tcp.local'
+                    parts = name.split('.')
+                    service = '.'.join(parts[-3:-1]) if len(parts) >= 3 else name
+                    results.setdefault(source, {'hostname': None, 'services': set()})['services'].add(service)
+    finally:
+        sock.close()
+    return results
 
-def get_device_info(ip):
-    """Get comprehensive device information"""
-    info = {
-        'manufacturer': 'Unknown',
-        'device_type': 'Unknown',
-        'services': []
-    }
-    
-    try:
-        ports_output = subprocess.check_output(['nmap', '-sV', '--version-intensity', '5', ip], 
-                                               timeout=15, stderr=subprocess.DEVNULL).decode()
-        
-        for line in ports_output.split('\n'):
-            if '/tcp' in line and 'open' in line:
-                parts = line.split()
-                if len(parts) >= 3:
-                    service = ' '.join(parts[2:])
-                    info['services'].append(service[:40])
-        
-        if 'printer' in ports_output.lower():
-            info['device_type'] = 'Printer'
-        elif 'router' in ports_output.lower() or 'gateway' in ports_output.lower():
-            info['device_type'] = 'Router/Gateway'
-        elif 'camera' in ports_output.lower() or 'rtsp' in ports_output.lower():
-            info['device_type'] = 'IP Camera'
-        elif 'nas' in ports_output.lower() or 'storage' in ports_output.lower():
-            info['device_type'] = 'NAS/Storage'
-        
-    except:
-        pass
-    
-    return info
 
+def mdns_device_type(services):
+    """Device type implied by announced DNS-SD services, or None"""
+    for service in sorted(services or ()):
+        if service in MDNS_DEVICE_TYPES:
+            return MDNS_DEVICE_TYPES[service]
+    return None
 
-def ai_analysis(ip, ports, os_type):
-    """Enhanced AI vulnerability analysis"""
-    insights = []
-    risk_level = "🟢 Low"
-    
-    if '445' in ports or '139' in ports:
-        insights.append("🛑 SMB/NetBIOS open — EternalBlue/SMBGhost risk")
-        risk_level = "🔴 Critical"
-    
-    if '3389' in ports:
-        insights.append("🔴 RDP exposed — brute force target")
-        if risk_level == "🟢 Low":
-            risk_level = "🟠 High"
-    
-    if '22' in ports:
-        insights.append("⚠️  SSH open — ensure key-based auth")
-    
-    if '23' in ports:
-        insights.append("🔴 Telnet detected — unencrypted protocol!")
-        risk_level = "🔴 Critical"
-    
-    if '21' in ports:
-        insights.append("⚠️  FTP open — check for anonymous access")
-    
-    if '3306' in ports:
-        insights.append("⚠️  MySQL exposed — restrict access")
-    
-    if '5432' in ports:
-        insights.append("⚠️  PostgreSQL open — verify permissions")
-    
-    if '80' in ports and '443' not in ports:
-        insights.append("⚠️  HTTP only — no HTTPS encryption")
-    
-    if '8080' in ports or '8443' in ports:
-        insights.append("ℹ️  Alt web port detected — admin panel?")
-    
-    if '5900' in ports:
-        insights.append("🔴 VNC exposed — screen sharing vulnerability")
-        risk_level = "🔴 Critical"
-    
-    if os_type == 'Windows':
-        if '135' in ports:
-            insights.append("⚠️  RPC open — potential attack vector")
-        if '5985' in ports or '5986' in ports:
-            insights.append("ℹ️  WinRM detected — PowerShell remoting")
-    
-    if ports == 'None':
-        insights.append("🟢 No open ports — firewall active or offline")
-        risk_level = "🟢 Low"
-    
-    if not insights:
-        insights.append("🔍 No major vulnerabilities detected")
-    
-    return f"{risk_level} | " + ' | '.join(insights)
 
+def ber_length(length):
+    if length < 0x80:
+        return bytes([length])
+    encoded = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes([0x80 | len(encoded)]) + encoded
 
-def scan(ip_range, delay=0, aggressive=False):
-    """Enhanced network scan with parallel processing"""
-    devices = []
-    print(f"\n🔍 Scanning {ip_range}...")
-    
-    arp = ARP(pdst=ip_range)
-    ether = Ether(dst="ff:ff:ff:ff:ff:ff")
-    packet = ether / arp
-    
-    print("📡 Sending ARP requests...")
-    answered, _ = srp(packet, timeout=3, verbose=0, retry=2)
-    
-    total = len(answered)
-    print(f"✅ Found {total} active device(s)\n")
-    
-    if total == 0:
-        return devices
-    
-    def process_device(sent, received):
-        ip = received.psrc
-        mac = received.hwsrc
-        
-        print(f"🔎 Analyzing {ip}...")
-        
-        hostname = get_hostname_advanced(ip)
-        vendor = get_mac_vendor(mac)
-        
-        if aggressive:
-            ports = scan_ports_aggressive(ip)
-        else:
-            ports = scan_ports_fast(ip)
-        
-        os_type = guess_os(ip)
-        ai_recon = ai_analysis(ip, ports, os_type)
-        
-        device_info = get_device_info(ip)
-        
-        if delay > 0:
-            time.sleep(delay)
-        
-        return {
-            'ip': ip,
-            'mac': mac,
-            'hostname': hostname,
-            'vendor': vendor,
-            'ports': ports,
-            'os': os_type,
-            'ai': ai_recon,
-            'device_type': device_info['device_type'],
-            'services': ', '.join(device_info['services'][:3]) if device_info['services'] else 'N/A'
-        }
-    
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = [executor.submit(process_device, sent, received) for sent, received in answered]
-        for future in as_completed(futures):
-            try:
-                device = future.result()
-                devices.append(device)
-            except Exception as e:
-                print(f"⚠️  Error processing device: {e}")
-    
-    return devices
 
+def ber_tlv(tag, value):
+    return bytes([tag]) + ber_length(len(value)) + value
 
-def monitor(ip_range):
-    """Enhanced monitoring mode"""
-    print("🛰️  Monitoring mode activated. Press Ctrl+C to stop.")
-    known = {}
-    scan_count = 0
-    
-    try:
-        while True:
+
+def ber_integer(value):
+    return ber_tlv(0x02, value.to_bytes(max(1, (value.bit_length() + 8) // 8), 'big', signed=True))
+
+
+def ber_oid(oid):
+    parts = [int(p) for p in oid.split('.')]
+    encoded = bytes([parts[0] * 40 + parts[1]])
+    for part in parts[2:]:
+        chunk = [part & 0x7F]
+        part >>= 7
+        while part:
+            chunk.append(0x80 | (part & 0x7F))
+            part >>= 7
+        encoded += bytes(reversed(chunk))
+    return ber_tlv(0x06, encoded)
+
+
+def ber_read(data, offset):
+    """Read one TLV; returns (tag, value bytes, offset after it)"""
+    tag = data[offset]
+    length = data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[offset:offset + size], 'big')
+        offset += size
+    if offset + length > len(data):
+        raise ValueError("Truncated BER value")
+    return tag, data[offset:offset + length], offset + length
+
+
+def ber_decode_oid(value):
+    parts = [value[0] // 40, value[0] % 40]
+    current = 0
+    for byte in value[1:]:
+        current = (current << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            parts.append(current)
+            current = 0
+    return '.'.join(str(p) for p in parts)
+
+
+def build_snmp_get(request_id, community, oids):
+    """SNMPv2c GetRequest PDU for a list of OIDs"""
+    varbinds = b''.join(ber_tlv(0x30, ber_oid(oid) + b'\x05\x00') for oid in oids)
+    pdu = ber_tlv(0xA0, ber_integer(request_id) + ber_integer(0) + ber_integer(0) + ber_tlv(0x30, varbinds))
+    return ber_tlv(0x30, ber_integer(1) + ber_tlv(0x04, community.encode()) + pdu)
+
+
+def parse_snmp_response(data):
+    """Parse a GetResponse; returns (request_id, {oid: value}) with str values"""
+    tag, message, _ = ber_read(data, 0)
+    if tag != 0x30:
+        raise ValueError("Not an SNMP message")
+    _, _, offset = ber_read(message, 0)              # version
+    _, _, offset = ber_read(message, offset)         # community
+    tag, pdu, _ = ber_read(message, offset)
+    if tag != 0xA2:
+        raise ValueError("Not a GetResponse")
+    _, request_id, offset = ber_read(pdu, 0)
+    _, error_status, offset = ber_read(pdu, offset)
+    _, _, offset = ber_read(pdu, offset)             # error index
+    _, varbinds, _ = ber_read(pdu, offset)
+    values = {}
+    if int.from_bytes(error_status, 'big'):
+        return int.from_bytes(request_id, 'big', signed=True), values
+    offset = 0
+    while offset < len(varbinds):
+        _, varbind, offset = ber_read(varbinds, offset)
+        _, oid, inner = ber_read(varbind, 0)
+        value_tag, value, _ = ber_read(varbind, inner)
+        if value_tag == 0x04:
+            values[ber_decode_oid(oid)] = value.decode('utf-8', errors='replace').strip()
+        elif value_tag == 0x06:
+            values[ber_decode_oid(oid)] = ber_decode_oid(value)
+        elif value_tag in (0x02, 0x41, 0x42, 0x43):
+            values[ber_decode_oid(oid)] = str(int.from_bytes(value, 'big'))
+    return int.from_bytes(request_id, 'big', signed=True), values
+
+
+def snmp_sweep(ips, communities=None, timeout=SNMP_TIMEOUT, port=SNMP_PORT):
+    """GET sysName/sysDescr/sysObjectID from every host at once over one UDP socket
+
+    Every (host, community) pair gets its own request-id; the first community
+    a host answers wins. Returns {ip: {'sysName', 'sysDescr', 'sysObjectID',
+    'community'}} for responders.
+    """
+    ips = list(ips)
+    communities = communities or SNMP_COMMUNITIES
+    names = {oid: name for name, oid in SNMP_OIDS.items()}
+    results = {}
+    pending = {}
+    base = random.randint(1, 0x3FFFFFFF)
+    for ip in ips:
+        for community in communities:
+            pending[base + len(pending)] = (ip, community)
+    if not pending:
+        return results
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+        sock.setblocking(False)
+        for request_id, (ip, community) in pending.items():
+            try:
+                sock.sendto(build_snmp_get(request_id, community, list(SNMP_OIDS.values())), (ip, port))
+            except OSError:
+                pass
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([sock], [], [], remaining)
+            if not readable:
+                break
+            try:
+                data, (source, _) = sock.recvfrom(65535)
+                request_id, values = parse_snmp_response(data)
+            except (OSError, ValueError, IndexError):
+                continue
+            ip, community = pending.get(request_id, (None, None))
+            if ip != source:
+                continue
+            del pending[request_id]
+            if values and ip not in results:
+                info = {name: values.get(oid) for oid, name in names.items()}
+                info['community'] = community
+                results[ip] = info
+                # Stop waiting on this host's other communities
+                for other in [rid for rid, (host, _) in pending.items() if host == ip]:
+                    del pending[other]
+    finally:
+        sock.close()
+    return results
+
+
+def os_from_sysdescr(descr):
+    """OS name from an SNMP sysDescr, or None"""
+    text = (descr or '').lower()
+    if 'windows' in text:
+        return 'Windows'
+    if 'cisco ios' in text or 'routeros' in text or 'junos' in text or 'fortios' in text:
+        return 'Router/Network Device'
+    if 'darwin' in text or 'mac os' in text:
+        return 'macOS'
+    if 'linux' in text or 'freebsd' in text or 'sunos' in text or 'unix' in text:
+        return 'Linux/Unix'
+    return None
+
+
+def device_type_from_sysdescr(descr):
+    """Device type from an SNMP sysDescr, or None"""
+    text = (descr or '').lower()
+    if 'printer' in text or 'jetdirect' in text or 'laserjet' in text:
+        return 'Printer'
+    if 'router' in text or 'cisco ios' in text or 'routeros' in text or 'switch' in text:
+        return 'Router/Gateway'
+    if 'camera' in text or 'hikvision' in text or 'axis' in text:
+        return 'IP Camera'
+    if 'synology' in text or 'qnap' in text or 'nas' in text or 'storage' in text:
+        return 'NAS/Storage'
+    return None
+
+
+def icmp_checksum(data):
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+def icmp_sweep(ips, timeout=ICMP_TIMEOUT, retries=1):
+    """Echo every host from one raw ICMP socket; returns {ip: {'ttl', 'rtt'}}
+
+    The host's index picks its (identifier, sequence) pair: the sweep's random
+    identifier plus index // 65536, and index & 0xFFFF, so every host has its
+    own key however many there are. A reply counts only if its key and source
+    address both match. rtt is in milliseconds from the first request sent to
+    the host, so a late answer to it is not timed against a retry. Needs root
+    (raw socket).
+    """
+    ips = list(ips)
+    results = {}
+    if not ips:
+        return results
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+    except OSError as e:
+        print(f"⚠️  ICMP sweep unavailable: {e}")
+        return results
+    identifier = random.randint(0, 0xFFFF)
+    sent_at = {}
+    pending = {((identifier + (index >> 16)) & 0xFFFF, index & 0xFFFF): ip for index, ip in enumerate(ips)}
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+        sock.setblocking(False)
+        rounds = retries + 1
+        for attempt in range(rounds):
+            for key, ip in list(pending.items()):
+                header = struct.pack('!BBHHH', 8, 0, 0, *key)
+                payload = b'AK-SCAN-' + bytes(24)
+                packet = struct.pack('!BBHHH', 8, 0, icmp_checksum(header + payload), *key) + payload
+                try:
+                    sock.sendto(packet, (ip, 0))
+                    sent_at.setdefault(key, time.perf_counter())
+                except OSError:
+                    pass
+            # Retransmissions go only to hosts that have not answered yet
+            deadline = time.monotonic() + timeout / rounds
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                readable, _, _ = select.select([sock], [], [], remaining)
+                if not readable:
+                    break
+                try:
+                    data, (source, _) = sock.recvfrom(2048)
+                except OSError:
+                    continue
+                received = time.perf_counter()
+                header_length = (data[0] & 0x0F) * 4
+                if len(data) < header_length + 8:
+                    continue
+                icmp_type, _, _, reply_id, sequence = struct.unpack_from('!BBHHH', data, header_length)
+                key = (reply_id, sequence)
+                if icmp_type != 0 or pending.get(key) != source:
+                    continue
+                del pending[key]
+                results[source] = {'ttl': data[8], 'rtt': round((received - sent_at[key]) * 1000, 3)}
+            if not pending:
+                break
+    finally:
+        sock.close()
+    return results
+
+
+class HostnameContext:
+    """Shared state for one host's hostname race: batch lookups and child processes
+
+    cancel() kills every helper process still running once a winner is known.
+    """
+
+    def __init__(self, ip, lookups=None):
+        self.ip = ip
+        self.lookups = lookups or {}
+        self.fallback = None
+        self.processes = []
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    def run(self, args, timeout):
+        """Run a helper command and return its output ('' if cancelled or failed)"""
+        with self.lock:
+            if self.cancelled:
+                return ''
+            process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            self.processes.append(process)
+        try:
+            output, _ = process.communicate(timeout=timeout)
+            return output.decode(errors='ignore')
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            return ''
+        finally:
+            with self.lock:
+                self.processes.remove(process)
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            for process in self.processes:
+                process.kill()
+
+
+def hostname_from_dns(context):
+    """Method 1: DNS reverse lookup"""
+    ip = context.ip
+    hostname = socket.gethostbyaddr(ip)[0]
+    if hostname and hostname != ip and '.' in hostname:
+        return hostname.split('.')[0]
+    if hostname and hostname != ip:
+        # Undotted names are only used if nothing better turns up
+        context.fallback = hostname
+    return None
+
+
+def hostname_from_netbios(context):
+    """Method 2: NetBIOS node status (batched across the subnet when available)"""
+    ip = context.ip
+    netbios = context.lookups.get('netbios')
+    info = netbios.get(ip) if netbios else netbios_sweep([ip]).get(ip)
+    if info and info['hostname'] and info['hostname'] != ip:
+        return info['hostname']
+    return None
+
+
+def hostname_from_smb(context):
+    """Method 3: SMB/CIFS server name"""
+    ip = context.ip
+    output = context.run(['smbclient', '-L', ip, '-N'], timeout=3)
+    for line in output.split('\n'):
+        if 'Server=' in line:
+            parts = line.split('Server=')
+            if len(parts) > 1 and parts[1].split():
+                name = parts[1].split()[0].strip()
+                if name and name != ip:
+                    return name
+    return None
+
+
+def hostname_from_snmp(context):
+    """Method 4: SNMP system name (batched across the subnet when available)"""
+    ip = context.ip
+    snmp = context.lookups.get('snmp')
+    info = snmp.get(ip) if snmp else snmp_sweep([ip]).get(ip)
+    if info and info['sysName'] and info['sysName'] != ip:
+        return info['sysName']
+    return None
+
+
+def hostname_from_mdns(context):
+    """Method 5: mDNS/LLMNR reverse lookup (batched across the subnet when available)"""
+    ip = context.ip
+    mdns = context.lookups.get('mdns')
+    info = mdns.get(ip) if mdns else mdns_sweep([ip]).get(ip)
+    if info and info['hostname'] and info['hostname'] != ip:
+        return info['hostname']
+    return None
+
+
+HOSTNAME_RESOLVERS = {
+    'dns': hostname_from_dns,
+    'netbios': hostname_from_netbios,
+    'smb': hostname_from_smb,
+    'snmp': hostname_from_snmp,
+    'mdns': hostname_from_mdns,
+}
+
+
+def get_hostname_advanced(ip, lookups=None, methods=None, deadline=None):
+    """Advanced hostname detection: every method races, highest priority answer wins
+
+    methods is the priority order (default HOSTNAME_METHODS); the result is
+    decided as soon as no higher-priority method can still answer, or when
+    the per-host deadline expires. Helper processes still running are killed.
+    lookups holds the scan's BatchLookups ('netbios', 'mdns', 'snmp'); without them
+    the batched methods query just this host.
+    """
+    methods = methods or HOSTNAME_METHODS
+    deadline = time.monotonic() + (deadline or HOSTNAME_DEADLINE)
+    context = HostnameContext(ip, lookups)
+
+    def attempt(name):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = HOSTNAME_RESOLVERS[name](context)
+            outcome = 'success' if result else 'failure'
+            return result
+        except Exception:
+            return None
+        finally:
+            # Still running when the race was decided: killed at the deadline or no longer needed
+            if context.cancelled and outcome != 'success':
+                outcome = 'timeout' if time.monotonic() >= deadline else 'skipped'
+            metrics.observe('hostname', name, time.perf_counter() - started, outcome)
+
+    futures = [(name, hostname_executor.submit(attempt, name)) for name in methods]
+    winner = None
+    try:
+        while True:
+            pending = []
+            for name, future in futures:
+                if not future.done():
+                    pending.append(future)
+                elif future.result() and not pending:
+                    # Every higher-priority method has already come up empty
+                    winner = name
+                    return future.result()
+            if not pending:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Deadline: take the best answer that has arrived
+                for name, future in futures:
+                    if future.done() and future.result():
+                        winner = name
+                        return future.result()
+                break
+            wait_futures(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+    finally:
+        context.cancel()
+        for name, future in futures:
+            if future.cancel():
+                metrics.observe('hostname', name, 0.0, 'skipped')
+        metrics.answer('hostname', winner or ('dns' if context.fallback else 'none'))
+    return context.fallback or 'Unknown'
+
+
+class EnrichmentCache:
+    """Persistent SQLite cache for vendor/hostname results, shared by the scan threads"""
+
+    def __init__(self, path=ENRICHMENT_CACHE_FILE, max_rows=ENRICHMENT_CACHE_MAX_ROWS, ttls=ENRICHMENT_TTLS):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.max_rows = max_rows
+        self.ttls = ttls
+        self.lock = threading.Lock()
+        self.stats = {source: {'hits': 0, 'misses': 0} for source in ttls}
+        self.writes = 0
+        self.db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS enrichment (
+                               source TEXT, key TEXT, value TEXT, stored REAL, used REAL,
+                               PRIMARY KEY (source, key))''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS enrichment_used ON enrichment (used)')
+
+    def get(self, source, key):
+        """Return the cached value, or None on a miss or an expired entry"""
+        now = time.time()
+        with self.lock:
+            row = self.db.execute('SELECT value, stored FROM enrichment WHERE source=? AND key=?',
+                                  (source, key)).fetchone()
+            if row:
+                value, stored = row
+                ttl = self.ttls[source]['negative' if value == 'Unknown' else 'positive']
+                if now - stored < ttl:
+                    self.db.execute('UPDATE enrichment SET used=? WHERE source=? AND key=?', (now, source, key))
+                    self.stats[source]['hits'] += 1
+                    return value
+            self.stats[source]['misses'] += 1
+            return None
+
+    def put(self, source, key, value):
+        """Store a value, evicting least recently used rows past max_rows"""
+        now = time.time()
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO enrichment VALUES (?, ?, ?, ?, ?)',
+                            (source, key, value, now, now))
+            self.writes += 1
+            if self.writes % 100 == 0:
+                self.evict()
+
+    def evict(self):
+        excess = self.db.execute('SELECT COUNT(*) FROM enrichment').fetchone()[0] - self.max_rows
+        if excess > 0:
+            self.db.execute('''DELETE FROM enrichment WHERE rowid IN
+                               (SELECT rowid FROM enrichment ORDER BY used LIMIT ?)''', (excess,))
+
+    def close(self):
+        with self.lock:
+            self.evict()
+            self.db.close()
+
+
+def get_enrichment_cache():
+    """Open the enrichment cache once per process; None if disabled or unavailable"""
+    global enrichment_cache
+    if enrichment_cache is None and cache_enabled:
+        with vendor_index_lock:
+            if enrichment_cache is None:
+                try:
+                    enrichment_cache = EnrichmentCache()
+                except (OSError, sqlite3.Error) as e:
+                    print(f"⚠️  Enrichment cache unavailable: {e}")
+                    enrichment_cache = False
+    return enrichment_cache or None
+
+
+def cached_mac_vendor(mac):
+    """get_mac_vendor through the persistent cache (keyed by MAC)"""
+    cache = get_enrichment_cache()
+    if not cache:
+        return get_mac_vendor(mac)
+    key = mac.upper()
+    vendor = cache.get('vendor', key)
+    if vendor is None:
+        vendor = get_mac_vendor(mac)
+        cache.put('vendor', key, vendor)
+    else:
+        metrics.answer('vendor', 'cache')
+    return vendor
+
+
+def cached_hostname(ip, mac, lookups=None, methods=None, deadline=None):
+    """get_hostname_advanced through the persistent cache (keyed by IP+MAC)"""
+    cache = get_enrichment_cache()
+    if not cache:
+        return get_hostname_advanced(ip, lookups, methods, deadline)
+    key = f"{ip}|{mac.upper()}"
+    hostname = cache.get('hostname', key)
+    if hostname is None:
+        hostname = get_hostname_advanced(ip, lookups, methods, deadline)
+        cache.put('hostname', key, hostname)
+    else:
+        metrics.answer('hostname', 'cache')
+    return hostname
+
+
+def parse_ports(spec):
+    """Parse a port list such as '22,80,8000-8100' or '1-65535' into sorted unique ports"""
+    ports = set()
+    for part in str(spec).split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            low, high = (int(p) for p in part.split('-', 1))
+        else:
+            low = high = int(part)
+        if not 1 <= low <= high <= 65535:
+            raise ValueError(f"Invalid port range: {part}")
+        ports.update(range(low, high + 1))
+    return sorted(ports)
+
+
+def source_ip_for(ip):
+    """Local address the kernel would use to reach ip (no packet is sent)"""
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        probe.connect((ip, 9))
+        return probe.getsockname()[0]
+    finally:
+        probe.close()
+
+
+class PortScanJob:
+    """Ports still to probe for one host, plus its results"""
+
+    def __init__(self, ip, ports, timeout):
+        self.ip = ip
+        self.ports = iter(ports)
+        self.timeout = timeout
+        self.results = {}
+        self.pending = 0
+        self.exhausted = False
+        self.done = threading.Event()
+
+
+class PortScanEngine:
+    """Non-blocking TCP connect scanner driven by one selector (epoll) thread
+
+    Every host shares one in-flight budget, so the number of outstanding
+    connection attempts stays bounded however many scan threads submit work.
+    Hosts are served round-robin, one port at a time, so a full 1-65535 scan
+    of one host cannot starve the others.
+    """
+
+    def __init__(self, concurrency=PORT_SCAN_CONCURRENCY):
+        # Each attempt holds a descriptor; keep the budget under the fd limit
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = concurrency + 256
+        if soft != resource.RLIM_INFINITY and soft < wanted:
+            try:
+                soft = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+                resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+            except (ValueError, OSError):
+                pass
+            soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        if soft != resource.RLIM_INFINITY:
+            concurrency = max(1, min(concurrency, soft - 256))
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.jobs = collections.deque()
+        self.deadlines = []
+        self.sequence = 0
+        self.lock = threading.Lock()
+        self.selector = selectors.DefaultSelector()
+        self.wakeup_r, self.wakeup_w = socket.socketpair()
+        self.wakeup_r.setblocking(False)
+        self.wakeup_w.setblocking(False)
+        self.selector.register(self.wakeup_r, selectors.EVENT_READ)
+        self.linger = struct.pack('ii', 1, 0)
+        self.thread = threading.Thread(target=self.run, name='port-scan', daemon=True)
+        self.thread.start()
+
+    def scan(self, ip, ports, timeout):
+        """Blocking entry point for worker threads; returns {port: state}"""
+        job = PortScanJob(ip, ports, timeout)
+        with self.lock:
+            self.jobs.append(job)
+        try:
+            self.wakeup_w.send(b'\0')
+        except BlockingIOError:
+            pass
+        progress = -1
+        while not job.done.wait(max(PORT_SCAN_STALL, timeout * 4)):
+            if len(job.results) == progress:
+                with self.lock:
+                    if job in self.jobs:
+                        self.jobs.remove(job)
+                print(f"⚠️  Port scan of {ip} stalled, keeping {len(job.results)} results")
+                break
+            progress = len(job.results)
+        return job.results
+
+    def launch(self):
+        """Start connection attempts until the budget is used or no work is left"""
+        jobs = self.jobs
+        while self.in_flight < self.concurrency:
+            with self.lock:
+                if not jobs:
+                    return
+                job = jobs[0]
+                port = next(job.ports, None)
+                if port is None:
+                    jobs.popleft()
+                    job.exhausted = True
+                    if not job.pending:
+                        job.done.set()
+                    continue
+                jobs.rotate(-1)
+
+            try:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM | socket.SOCK_NONBLOCK)
+            except OSError as e:
+                if e.errno in (errno.EMFILE, errno.ENFILE) and self.in_flight:
+                    # Out of descriptors: shrink the budget to what is open and retry the port later
+                    self.concurrency = self.in_flight
+                    with self.lock:
+                        job.ports = itertools.chain((port,), job.ports)
+                    return
+                job.pending += 1
+                self.record(job, port, e.errno)
+                continue
+            job.pending += 1
+            try:
+                error = sock.connect_ex((job.ip, port))
+            except OSError as e:
+                # gaierror for a name that does not resolve, EINVAL and friends for odd addresses
+                error = e.errno
+            if error in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                probe = [sock, job, port, True]
+                self.in_flight += 1
+                self.selector.register(sock, selectors.EVENT_WRITE, probe)
+                self.sequence += 1
+                heapq.heappush(self.deadlines, (time.monotonic() + job.timeout, self.sequence, probe))
+            else:
+                self.close(sock, error)
+                self.record(job, port, error)
+
+    def record(self, job, port, error):
+        if error == 0:
+            job.results[port] = 'open'
+        elif error == errno.ECONNREFUSED:
+            job.results[port] = 'closed'
+        else:
+            job.results[port] = 'filtered'
+        job.pending -= 1
+        if job.exhausted and not job.pending:
+            job.done.set()
+
+    def close(self, sock, error):
+        if error == 0:
+            # Reset instead of leaving a TIME_WAIT socket behind (only connected sockets have one)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, self.linger)
+        sock.close()
+
+    def finish(self, probe, error):
+        sock, job, port, _ = probe
+        probe[3] = False
+        self.in_flight -= 1
+        self.selector.unregister(sock)
+        self.close(sock, error)
+        self.record(job, port, error)
+
+    def abort(self):
+        """Give up on every in-flight probe after an unexpected engine error"""
+        for _, _, probe in self.deadlines:
+            if probe[3]:
+                try:
+                    self.finish(probe, errno.EIO)
+                except Exception:
+                    pass
+        self.deadlines = []
+        self.in_flight = 0
+
+    def step(self):
+        self.launch()
+        timeout = max(0, self.deadlines[0][0] - time.monotonic()) if self.deadlines else None
+        for key, _ in self.selector.select(timeout):
+            if key.fileobj is self.wakeup_r:
+                try:
+                    while self.wakeup_r.recv(4096):
+                        pass
+                except BlockingIOError:
+                    pass
+                continue
+            probe = key.data
+            self.finish(probe, probe[0].getsockopt(socket.SOL_SOCKET, socket.SO_ERROR))
+
+        now = time.monotonic()
+        deadlines = self.deadlines
+        while deadlines and (deadlines[0][0] <= now or not deadlines[0][2][3]):
+            probe = heapq.heappop(deadlines)[2]
+            if probe[3]:
+                self.finish(probe, errno.ETIMEDOUT)
+
+    def run(self):
+        while True:
+            try:
+                self.step()
+            except Exception as e:
+                # Keep serving: a dead engine thread would leave every later scan waiting
+                print(f"⚠️  Port scan engine error: {e}")
+                self.abort()
+
+
+def get_port_scan_engine():
+    """Start the shared port scan engine on first use"""
+    global port_scan_engine
+    if port_scan_engine is None:
+        with vendor_index_lock:
+            if port_scan_engine is None:
+                port_scan_engine = PortScanEngine()
+    return port_scan_engine
+
+
+def scan_ports(ip, ports, timeout=0.3):
+    """Connect-scan any list of ports; returns {port: 'open'|'closed'|'filtered'}"""
+    return get_port_scan_engine().scan(ip, ports, timeout)
+
+
+def open_ports(results):
+    """PortSet of the ports a scan found open"""
+    return PortSet(port for port, state in results.items() if state == 'open')
+
+
+def scan_ports_fast(ip):
+    """Fast port scan of common service ports"""
+    return open_ports(scan_ports(ip, COMMON_PORTS, timeout=0.3))
+
+
+def scan_ports_aggressive(ip):
+    """Aggressive port scan (1-1024)"""
+    return open_ports(scan_ports(ip, range(1, 1025), timeout=0.2))
+
+
+class SynScanEngine:
+    """Stateless half-open (SYN) scanner on raw sockets
+
+    The transmit side writes bare SYNs whose sequence number is a keyed hash
+    of (target ip, target port). The receive loop runs independently and
+    accepts a SYN-ACK or RST only if its ack number is that cookie + 1, so no
+    per-probe table is needed to match replies. Only ports some scan() is still
+    waiting on are recorded; late replies and replies for other ports are
+    dropped. Linux only, needs root.
+    """
+
+    def __init__(self, rate=SYN_SCAN_RATE):
+        self.rate = rate
+        self.secret = os.urandom(16)
+        self.sport = random.randint(40000, 60000)
+        # ip -> tuple of {port: state} dicts, one per scan() waiting on that host
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.sent = 0
+        self.received = 0
+        self.rate_lock = threading.Lock()
+        self.next_send = time.monotonic()
+        self.tx = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
+        self.rx = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
+        self.rx.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+        self.thread = threading.Thread(target=self.receive_loop, name='syn-rx', daemon=True)
+        self.thread.start()
+
+    def cookie(self, ip_bytes, port):
+        digest = hashlib.blake2b(ip_bytes + port.to_bytes(2, 'big'), key=self.secret, digest_size=4).digest()
+        return int.from_bytes(digest, 'big')
+
+    @staticmethod
+    def checksum(data):
+        if len(data) % 2:
+            data += b'\0'
+        total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+        while total >> 16:
+            total = (total & 0xFFFF) + (total >> 16)
+        return ~total & 0xFFFF
+
+    def syn_packet(self, src_bytes, dst_bytes, port):
+        header = struct.pack('!HHIIBBHHH', self.sport, port, self.cookie(dst_bytes, port), 0,
+                             5 << 4, 0x02, 1024, 0, 0)
+        pseudo = src_bytes + dst_bytes + struct.pack('!BBH', 0, socket.IPPROTO_TCP, len(header))
+        checksum = self.checksum(pseudo + header)
+        return header[:16] + struct.pack('!H', checksum) + header[18:]
+
+    def pace(self, count):
+        """Block until count more packets fit in the global packets/second budget"""
+        with self.rate_lock:
+            now = time.monotonic()
+            self.next_send = max(self.next_send, now) + count / self.rate
+            wait = self.next_send - now - count / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+    def transmit(self, ip, ports):
+        dst_bytes = socket.inet_aton(ip)
+        src_bytes = socket.inet_aton(source_ip_for(ip))
+        batch = max(1, self.rate // 100)
+        ports = list(ports)
+        for i in range(0, len(ports), batch):
+            chunk = ports[i:i + batch]
+            self.pace(len(chunk))
+            for port in chunk:
+                try:
+                    self.tx.sendto(self.syn_packet(src_bytes, dst_bytes, port), (ip, 0))
+                    self.sent += 1
+                except OSError:
+                    pass
+
+    def receive_loop(self):
+        while True:
+            try:
+                packet = self.rx.recv(65535)
+            except OSError:
+                return
+            header_length = (packet[0] & 0x0F) * 4
+            if len(packet) < header_length + 20:
+                continue
+            sport, dport, _, ack, _, flags = struct.unpack_from('!HHIIBB', packet, header_length)
+            if dport != self.sport or not (flags & 0x04 or flags & 0x12 == 0x12):
+                continue
+            src_bytes = packet[12:16]
+            if (ack - 1) & 0xFFFFFFFF != self.cookie(src_bytes, sport):
+                continue
+            self.received += 1
+            for states in self.pending.get(socket.inet_ntoa(src_bytes), ()):
+                if sport in states:
+                    states[sport] = 'closed' if flags & 0x04 else 'open'
+
+    def watch(self, ip, ports):
+        """Start recording replies from ip for ports; returns the {port: state} dict they fill in"""
+        states = dict.fromkeys(ports, 'filtered')
+        with self.pending_lock:
+            self.pending[ip] = self.pending.get(ip, ()) + (states,)
+        return states
+
+    def unwatch(self, ip, states):
+        """Stop recording into states (from watch)"""
+        with self.pending_lock:
+            rest = tuple(other for other in self.pending.get(ip, ()) if other is not states)
+            if rest:
+                self.pending[ip] = rest
+            else:
+                self.pending.pop(ip, None)
+
+    def scan(self, ip, ports, wait=1.0):
+        """SYN-scan one host; returns {port: 'open'|'closed'|'filtered'}"""
+        ports = list(ports)
+        states = self.watch(ip, ports)
+        try:
+            self.transmit(ip, ports)
+            time.sleep(wait)
+        finally:
+            self.unwatch(ip, states)
+        return states
+
+
+def get_syn_scan_engine(rate=None):
+    """Start the shared SYN scan engine on first use; optionally retune its rate"""
+    global syn_scan_engine
+    if syn_scan_engine is None:
+        with vendor_index_lock:
+            if syn_scan_engine is None:
+                syn_scan_engine = SynScanEngine()
+    if rate:
+        syn_scan_engine.rate = rate
+    return syn_scan_engine
+
+
+def scan_ports_syn(ip):
+    """Half-open SYN scan (1-1024)"""
+    return open_ports(get_syn_scan_engine().scan(ip, range(1, 1025)))
+
+
+def device_type_from_text(text):
+    """Device type from keywords in nmap output, or 'Unknown'"""
+    text = text.lower()
+    if 'printer' in text:
+        return 'Printer'
+    elif 'router' in text or 'gateway' in text:
+        return 'Router/Gateway'
+    elif 'camera' in text or 'rtsp' in text:
+        return 'IP Camera'
+    elif 'nas' in text or 'storage' in text:
+        return 'NAS/Storage'
+    return 'Unknown'
+
+
+def parse_nmap_host(host):
+    """Turn one nmap XML <host> element into (ip, {'services', 'device_type', 'os'})"""
+    ip = None
+    for address in host.iter('address'):
+        if address.get('addrtype') == 'ipv4':
+            ip = address.get('addr')
+    services = []
+    text = []
+    for port in host.iter('port'):
+        state = port.find('state')
+        if port.get('protocol') != 'tcp' or state is None or state.get('state') != 'open':
+            continue
+        service = port.find('service')
+        if service is not None:
+            fields = [service.get(key) for key in ('name', 'product', 'version', 'extrainfo')]
+            description = ' '.join(field for field in fields if field)
+            services.append(description[:40])
+            text += [description, service.get('devicetype') or '']
+    running = []
+    for osclass in host.iter('osclass'):
+        text.append(osclass.get('type') or '')
+        name = ' '.join(v for v in (osclass.get('osfamily'), osclass.get('osgen')) if v)
+        if name and name not in running:
+            running.append(name)
+    return ip, {
+        'services': services,
+        'device_type': device_type_from_text(' '.join(text)),
+        'os': '|'.join(running)[:30] or None,
+    }
+
+
+def stream_nmap_xml(stream):
+    """Yield (ip, result) from nmap -oX output as each <host> element completes"""
+    parser = ElementTree.XMLPullParser(events=('end',))
+    for chunk in stream:
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            if element.tag == 'host':
+                ip, result = parse_nmap_host(element)
+                element.clear()
+                if ip:
+                    yield ip, result
+
+
+# Batches still waiting for one of these start nmap when a running one exits
+nmap_slots = threading.BoundedSemaphore(NMAP_MAX_PROCESSES)
+
+
+class NmapBatch:
+    """One nmap -sV (and -O when needed) process over every host of a scan
+
+    The XML report is parsed while nmap runs; get(ip) returns as soon as that
+    host's <host> element has been read, not when the whole batch ends.
+    OS detection is only requested when some host's OS is still unknown after
+    the SNMP and ICMP sweeps.
+    """
+
+    def __init__(self, ips, lookups=None):
+        self.ips = list(ips)
+        self.lookups = lookups or {}
+        self.results = {}
+        self.events = {ip: threading.Event() for ip in self.ips}
+        threading.Thread(target=self.run, name='nmap', daemon=True).start()
+
+    def needs_os(self, ip):
+        snmp = self.lookups.get('snmp')
+        if snmp and os_from_sysdescr((snmp.get(ip) or {}).get('sysDescr')):
+            return False
+        icmp = self.lookups.get('icmp')
+        reply = icmp.get(ip) if icmp else None
+        return bool(reply) and reply['ttl'] not in TTL_OS
+
+    def run(self):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            command = ['nmap', '-sV', '--version-intensity', '5', '--host-timeout', NMAP_HOST_TIMEOUT,
+                       '--max-hostgroup', str(NMAP_MAX_HOSTGROUP), '-oX', '-']
+            if any(self.needs_os(ip) for ip in self.ips):
+                command += ['-O', '--osscan-guess']
+            with nmap_slots, subprocess.Popen(command + self.ips, stdout=subprocess.PIPE,
+                                              stderr=subprocess.DEVNULL) as process:
+                for ip, result in stream_nmap_xml(iter(lambda: process.stdout.read1(65536), b'')):
+                    self.results[ip] = result
+                    if ip in self.events:
+                        self.events[ip].set()
+            outcome = 'success' if self.results else 'failure'
+        except (OSError, ElementTree.ParseError):
+            pass
+        finally:
+            metrics.observe('nmap', 'batch', time.perf_counter() - started, outcome)
+            for event in self.events.values():
+                event.set()
+
+    def get(self, ip, default=None):
+        event = self.events.get(ip)
+        if event:
+            event.wait()
+        return self.results.get(ip, default)
+
+
+def guess_os(ip, lookups=None):
+    """Enhanced OS detection"""
+    lookups = lookups or {}
+    # SNMP sysDescr from the scan's batch sweep needs no extra probe
+    snmp = lookups.get('snmp')
+    os_name = os_from_sysdescr((snmp.get(ip) or {}).get('sysDescr')) if snmp else None
+    if os_name:
+        return os_name
+    
+    # TTL of the echo reply from the scan's ICMP sweep
+    icmp = lookups.get('icmp')
+    reply = icmp.get(ip) if icmp else icmp_sweep([ip]).get(ip)
+    if not reply:
+        return 'Unknown'
+    if reply['ttl'] in TTL_OS:
+        return TTL_OS[reply['ttl']]
+    
+    nmap = lookups.get('nmap')
+    if nmap:
+        return (nmap.get(ip) or {}).get('os') or 'Unknown'
+    
+    try:
+        output = subprocess.check_output(['nmap', '-O', '--osscan-guess', ip], timeout=10, stderr=subprocess.DEVNULL).decode()
+        if 'Running:' in output:
+            os_line = [line for line in output.split('\n') if 'Running:' in line][0]
+            return os_line.split('Running:')[1].strip()[:30]
+    except:
+        pass
+        
+    return 'Unknown'
+
+
+def get_device_info(ip, lookups=None):
+    """Get comprehensive device information"""
+    info = {
+        'manufacturer': 'Unknown',
+        'device_type': 'Unknown',
+        'services': []
+    }
+    
+    # Result for this host from the scan's batched nmap run
+    nmap = (lookups or {}).get('nmap')
+    if nmap:
+        result = nmap.get(ip)
+        if result:
+            info['device_type'] = result['device_type']
+            info['services'] = result['services']
+        return info
+    
+    try:
+        ports_output = subprocess.check_output(['nmap', '-sV', '--version-intensity', '5', ip], 
+                                               timeout=15, stderr=subprocess.DEVNULL).decode()
+        
+        for line in ports_output.split('\n'):
+            if '/tcp' in line and 'open' in line:
+                parts = line.split()
+                if len(parts) >= 3:
+                    service = ' '.join(parts[2:])
+                    info['services'].append(service[:40])
+        
+        info['device_type'] = device_type_from_text(ports_output)
+        
+    except:
+        pass
+    
+    return info
+
+
+# Built-in risk rule pack, in the order insights are reported. A rule fires when all
+# of its conditions hold: any_ports (at least one open), all_ports, no_ports (none
+# open), os (one of), services (regex searched in the service/banner text) and
+# no_open_ports. The verdict is the highest severity fired. Packs loaded with
+# --rules add rules; a rule with the name of an existing one replaces it.
+RISK_RULES = [
+    {'name': 'smb', 'any_ports': [445, 139], 'severity': 'critical',
+     'insight': "🛑 SMB/NetBIOS open — EternalBlue/SMBGhost risk"},
+    {'name': 'rdp', 'any_ports': [3389], 'severity': 'high', 'insight': "🔴 RDP exposed — brute force target"},
+    {'name': 'ssh', 'any_ports': [22], 'insight': "⚠️  SSH open — ensure key-based auth"},
+    {'name': 'telnet', 'any_ports': [23], 'severity': 'critical',
+     'insight': "🔴 Telnet detected — unencrypted protocol!"},
+    {'name': 'ftp', 'any_ports': [21], 'insight': "⚠️  FTP open — check for anonymous access"},
+    {'name': 'mysql', 'any_ports': [3306], 'insight': "⚠️  MySQL exposed — restrict access"},
+    {'name': 'postgresql', 'any_ports': [5432], 'insight': "⚠️  PostgreSQL open — verify permissions"},
+    {'name': 'http-only', 'all_ports': [80], 'no_ports': [443], 'insight': "⚠️  HTTP only — no HTTPS encryption"},
+    {'name': 'alt-web', 'any_ports': [8080, 8443], 'insight': "ℹ️  Alt web port detected — admin panel?"},
+    {'name': 'vnc', 'any_ports': [5900], 'severity': 'critical',
+     'insight': "🔴 VNC exposed — screen sharing vulnerability"},
+    {'name': 'windows-rpc', 'any_ports': [135], 'os': ['Windows'], 'insight': "⚠️  RPC open — potential attack vector"},
+    {'name': 'winrm', 'any_ports': [5985, 5986], 'os': ['Windows'], 'insight': "ℹ️  WinRM detected — PowerShell remoting"},
+    {'name': 'no-open-ports', 'no_open_ports': True, 'insight': "🟢 No open ports — firewall active or offline"},
+]
+RISK_LEVELS = {'low': "🟢 Low", 'medium': "🟡 Medium", 'high': "🟠 High", 'critical': "🔴 Critical"}
+RISK_DEFAULT_INSIGHT = "🔍 No major vulnerabilities detected"
+RISK_VERDICT_CACHE = 65536
+
+
+def optional_numpy():
+    """NumPy when it is installed, else None; it is only ever an optional speed-up"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class RiskEngine:
+    """Risk rules compiled into integer bitmasks
+
+    Every port named by a rule gets one bit; a device's open ports fold into a
+    single mask, and each rule becomes (any, all, none) masks plus optional OS
+    and service conditions, so all rules are checked in one pass of integer
+    operations. Verdicts are memoized per distinct (mask, OS, services), which
+    repeat heavily across a network. analyse_devices() evaluates many devices
+    at once with NumPy when it is installed.
+    """
+
+    CONDITIONS = ('any_ports', 'all_ports', 'no_ports', 'os', 'services', 'no_open_ports')
+
+    def __init__(self, rules):
+        merged = {}
+        for rule in rules:
+            unknown = set(rule) - set(self.CONDITIONS) - {'name', 'severity', 'insight'}
+            if unknown:
+                raise ValueError(f"Rule {rule.get('name')!r}: unknown key(s) {', '.join(sorted(unknown))}")
+            if not rule.get('name') or not rule.get('insight'):
+                raise ValueError(f"Rule {rule!r} needs a name and an insight")
+            if rule.get('severity', 'low') not in RISK_LEVELS:
+                raise ValueError(f"Rule {rule['name']!r}: severity must be one of {', '.join(RISK_LEVELS)}")
+            if not any(rule.get(key) for key in self.CONDITIONS):
+                raise ValueError(f"Rule {rule['name']!r} has no conditions")
+            merged[rule['name']] = rule
+        self.rules = list(merged.values())
+        ports = sorted({port for rule in self.rules
+                        for key in ('any_ports', 'all_ports', 'no_ports') for port in rule.get(key, ())})
+        self.port_bits = {port: 1 << bit for bit, port in enumerate(ports)}
+        self.levels = list(RISK_LEVELS)
+        self.compiled = []
+        for rule in self.rules:
+            bits = lambda key: sum(self.port_bits[port] for port in set(rule.get(key, ())))
+            self.compiled.append((bits('any_ports'), bits('all_ports'), bits('no_ports'),
+                                  frozenset(rule['os']) if rule.get('os') else None,
+                                  re.compile(rule['services'], re.I) if rule.get('services') else None,
+                                  bool(rule.get('no_open_ports')),
+                                  self.levels.index(rule.get('severity', 'low'))))
+        self.uses_services = any(rule[4] for rule in self.compiled)
+        self.verdicts = {}
+        self.descriptions = {}
+
+    def mask(self, ports):
+        bits = self.port_bits
+        mask = 0
+        for port in ports:
+            mask |= bits.get(port, 0)
+        return mask
+
+    def fired(self, mask, has_ports, os_type, services):
+        """Bitset of the rules that fire (bit i = rule i)"""
+        fired = 0
+        for i, (any_mask, all_mask, no_mask, oses, pattern, no_open, _) in enumerate(self.compiled):
+            if (any_mask and not mask & any_mask) or mask & all_mask != all_mask or mask & no_mask:
+                continue
+            if (no_open and has_ports) or (oses is not None and os_type not in oses):
+                continue
+            if pattern is not None and not pattern.search(services or ''):
+                continue
+            fired |= 1 << i
+        return fired
+
+    def describe(self, fired):
+        """Verdict text for a bitset of fired rules"""
+        text = self.descriptions.get(fired)
+        if text is None:
+            level = 0
+            insights = []
+            for i, rule in enumerate(self.rules):
+                if fired >> i & 1:
+                    level = max(level, self.compiled[i][6])
+                    insights.append(rule['insight'])
+            text = f"{RISK_LEVELS[self.levels[level]]} | " + ' | '.join(insights or [RISK_DEFAULT_INSIGHT])
+            self.descriptions[fired] = text
+        return text
+
+    def analyse(self, ports, os_type, services=''):
+        """Verdict text for one device"""
+        key = (self.mask(ports), bool(ports), os_type, services if self.uses_services else None)
+        verdict = self.verdicts.get(key)
+        if verdict is None:
+            if len(self.verdicts) >= RISK_VERDICT_CACHE:
+                self.verdicts.clear()
+            verdict = self.verdicts[key] = self.describe(self.fired(*key))
+        return verdict
+
+    def analyse_devices(self, devices):
+        """Set .ai on every DeviceRecord; returns {rule name: number of devices it fired on}"""
+        numpy = optional_numpy()
+        if numpy is None or len(self.port_bits) > 64 or len(self.rules) > 64:
+            counts = {}
+            seen = {}  # key -> (fired, verdict)
+            mask, uses_services = self.mask, self.uses_services
+            for device in devices:
+                ports = device.ports
+                key = (mask(ports), bool(ports), device.os, device.services if uses_services else None)
+                entry = seen.get(key)
+                if entry is None:
+                    fired = self.fired(*key)
+                    entry = seen[key] = (fired, self.describe(fired))
+                device.ai = entry[1]
+                counts[entry[0]] = counts.get(entry[0], 0) + 1
+            return {rule['name']: sum(count for fired, count in counts.items() if fired >> i & 1)
+                    for i, rule in enumerate(self.rules)}
+        return self.analyse_vectorised(devices, numpy)
+
+    def analyse_vectorised(self, devices, np):
+        """analyse_devices() with every rule evaluated over all devices at once"""
+        count = len(devices)
+        table = np.zeros(65536, dtype=np.uint64)
+        for port, bit in self.port_bits.items():
+            table[port] = bit
+        lengths = np.fromiter((len(device.ports) for device in devices), dtype=np.int64, count=count)
+        ports = np.frombuffer(b''.join(device.ports.tobytes() for device in devices), dtype=np.uint16)
+        masks = np.zeros(count, dtype=np.uint64)
+        np.bitwise_or.at(masks, np.repeat(np.arange(count), lengths), table[ports])
+        has_ports = lengths > 0
+
+        def matching(values, test):
+            # Condition evaluated once per distinct value
+            unique, inverse = np.unique(np.array(values, dtype=object), return_inverse=True)
+            return np.array([test(value) for value in unique], dtype=bool)[inverse.ravel()]
+
+        fired = np.zeros(count, dtype=np.uint64)
+        for i, (any_mask, all_mask, no_mask, oses, pattern, no_open, _) in enumerate(self.compiled):
+            hit = (masks & np.uint64(all_mask)) == np.uint64(all_mask)
+            if any_mask:
+                hit &= (masks & np.uint64(any_mask)) != 0
+            if no_mask:
+                hit &= (masks & np.uint64(no_mask)) == 0
+            if no_open:
+                hit &= ~has_ports
+            if oses is not None:
+                hit &= matching([device.os for device in devices], oses.__contains__)
+            if pattern is not None:
+                hit &= matching([device.services or '' for device in devices], lambda text: bool(pattern.search(text)))
+            fired |= hit.astype(np.uint64) << np.uint64(i)
+
+        unique, inverse, counts = np.unique(fired, return_inverse=True, return_counts=True)
+        verdicts = [self.describe(int(value)) for value in unique]
+        for device, index in zip(devices, inverse.ravel().tolist()):
+            device.ai = verdicts[index]
+        return {rule['name']: int(counts[(unique >> np.uint64(i)) & np.uint64(1) == 1].sum())
+                for i, rule in enumerate(self.rules)}
+
+
+def load_rule_pack(path):
+    """Rules from a JSON rule pack: a list of rules, or {"rules": [...]}"""
+    with open(path, encoding='utf-8') as f:
+        pack = json.load(f)
+    rules = pack.get('rules') if isinstance(pack, dict) else pack
+    if not isinstance(rules, list):
+        raise ValueError(f"{path}: expected a list of rules")
+    return rules
+
+
+def get_risk_engine():
+    """Compile the built-in rules (and any loaded packs) on first use"""
+    global risk_engine
+    if risk_engine is None:
+        with vendor_index_lock:
+            if risk_engine is None:
+                risk_engine = RiskEngine(RISK_RULES)
+    return risk_engine
+
+
+def load_risk_rules(paths):
+    """--rules: compile the built-in rules plus the given packs, replacing the current engine"""
+    global risk_engine
+    rules = list(RISK_RULES)
+    for path in paths:
+        rules += load_rule_pack(path)
+    risk_engine = RiskEngine(rules)
+    return risk_engine
+
+
+def ai_analysis(ip, ports, os_type, services=''):
+    """Enhanced AI vulnerability analysis; ports is a PortSet (or any set of ints)"""
+    return get_risk_engine().analyse(ports, os_type, services)
+
+
+class ScanPipeline:
+    """Runs device records through a chain of stages
+
+    Each stage has its own worker threads and a bounded queue in front of it,
+    so a slow stage (nmap) only holds back the records waiting for it while
+    cheap stages keep draining. Records leave in completion order.
+    """
+
+    STOP = object()
+
+    def __init__(self, stages, queue_size=256):
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages] + [queue.Queue()]
+        self.remaining = [workers for _, _, workers in stages]
+        self.lock = threading.Lock()
+        for index, (name, _, workers) in enumerate(stages):
+            for n in range(workers):
+                threading.Thread(target=self.worker, args=(index,), name=f'{name}-{n}', daemon=True).start()
+
+    def worker(self, index):
+        name, func, _ = self.stages[index]
+        inbox, outbox = self.queues[index], self.queues[index + 1]
+        while True:
+            record = inbox.get()
+            if record is self.STOP:
+                with self.lock:
+                    self.remaining[index] -= 1
+                    last = self.remaining[index] == 0
+                if last:
+                    # Last worker out closes the next stage
+                    for _ in range(self.stages[index + 1][2] if index + 1 < len(self.stages) else 1):
+                        outbox.put(self.STOP)
+                return
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                func(record)
+                outcome = 'success'
+            except Exception as e:
+                print(f"⚠️  Error processing device {record.ip_str} ({name}): {e}")
+                continue
+            finally:
+                elapsed = time.perf_counter() - started
+                metrics.observe('stage', name, elapsed, outcome)
+                if stage_timings is not None:
+                    stage_timings.setdefault(name, []).append(elapsed)
+            outbox.put(record)
+
+    def run(self, records):
+        """Feed records in (blocking when the first stage is full) and yield finished ones"""
+        def feed():
+            for record in records:
+                self.queues[0].put(record)
+            for _ in range(self.stages[0][2]):
+                self.queues[0].put(self.STOP)
+
+        threading.Thread(target=feed, name='feed', daemon=True).start()
+        output = self.queues[-1]
+        while True:
+            record = output.get()
+            if record is self.STOP:
+                return
+            yield record
+
+
+class BatchLookup:
+    """Runs a whole-scan lookup (one call for every host) in the background
+
+    Per-host stages call get(ip), which waits for the batch to finish.
+    """
+
+    def __init__(self, func, ips):
+        self.results = {}
+        self.done = threading.Event()
+        threading.Thread(target=self.run, args=(func, list(ips)), daemon=True).start()
+
+    def run(self, func, ips):
+        try:
+            self.results = func(ips)
+        except Exception as e:
+            print(f"⚠️  Batch lookup {func.__name__} failed: {e}")
+        finally:
+            self.done.set()
+
+    def get(self, ip, default=None):
+        self.done.wait()
+        return self.results.get(ip, default)
+
+
+def route_interface(address):
+    """Interface the kernel's main routing table uses for an IPv4 address (as an int)
+
+    Read from /proc/net/route so discovery does not need scapy's routing table.
+    """
+    if address >> 24 == 127:
+        return 'lo'
+    best = None
+    try:
+        with open('/proc/net/route') as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                # Destination and Mask are little-endian hex; flag 0x1 is RTF_UP
+                destination, flags, metric, mask = (int(fields[1], 16), int(fields[3], 16),
+                                                    int(fields[6]), int(fields[7], 16))
+                if not flags & 0x1:
+                    continue
+                destination, mask = struct.unpack('!II', struct.pack('<II', destination, mask))
+                if address & mask == destination and (best is None or (mask, -metric) > best[:2]):
+                    best = (mask, -metric, fields[0])
+    except (OSError, IndexError, ValueError, StopIteration):
+        pass
+    return best[2] if best else interface
+
+
+def interface_addresses(iface):
+    """(MAC, IPv4 address) of an interface as packed bytes; 0.0.0.0 when it has no address"""
+    with open(f'/sys/class/net/{iface}/address') as f:
+        mac = bytes.fromhex(f.read().strip().replace(':', ''))
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        # SIOCGIFADDR
+        request = fcntl.ioctl(sock.fileno(), 0x8915, struct.pack('256s', iface[:15].encode()))
+        address = request[20:24]
+    except OSError:
+        address = b'\x00' * 4
+    finally:
+        sock.close()
+    return mac, address
+
+
+class ArpSweeper:
+    """ARP discovery that scales to /16 and larger
+
+    Targets are generated lazily from the range, requests are built from a
+    byte template and sent over one AF_PACKET socket at a fixed rate, and a
+    receiver thread reads replies from the same socket behind a kernel BPF
+    filter (ARP replies only). Memory grows with the hosts that answer, not
+    with the size of the range. Retransmission follows ARP_POLICY (or the
+    policy overrides passed in).
+    """
+
+    # ldh [20]; jeq #2 (ARP reply); accept; drop
+    REPLY_FILTER = [(0x28, 0, 0, 20), (0x15, 0, 1, 2), (0x06, 0, 0, 0xFFFF), (0x06, 0, 0, 0)]
+
+    def __init__(self, ip_range, iface=None, rate=ARP_RATE, policy=None):
+        self.ip_range = ip_range
+        self.rate = rate
+        self.policy = dict(ARP_POLICY, **(policy or {}))
+        try:
+            network = ipaddress.ip_network(ip_range, strict=False)
+            self.first, self.last = int(network.network_address), int(network.broadcast_address)
+        except ValueError:
+            # scapy range syntax (e.g. 192.168.1.1-50): iterated lazily by Net, replies not range-checked
+            self.first = self.last = None
+        if iface is None:
+            iface = route_interface(next(self.targets()))
+        self.iface = iface
+        self.answered = {}
+        self.pending = []
+        self.arrived = threading.Event()
+        self.lock = threading.Lock()
+        self.sending = True
+        self.sent = 0
+        self.elapsed = 0.0
+        self.passes = 0
+        # Latest send time of the last ARP_RTT_TRACKED addresses probed, and reply latencies
+        self.sent_at = {}
+        self.sent_order = collections.deque()
+        self.rtts = []
+        self.last_reply = 0.0
+        # Shortest quiet window allowed for the current pass
+        self.floor = 0.0
+
+    def targets(self):
+        if self.first is not None:
+            return iter(range(self.first, self.last + 1))
+        from scapy.base_classes import Net
+        return (struct.unpack('!I', socket.inet_aton(ip))[0] for ip in Net(self.ip_range))
+
+    def open_socket(self):
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(0x0806))
+        sock.bind((self.iface, 0x0806))
+        program = ctypes.create_string_buffer(b''.join(struct.pack('HBBI', *op) for op in self.REPLY_FILTER))
+        sock.setsockopt(socket.SOL_SOCKET, 26, struct.pack('HL', len(self.REPLY_FILTER), ctypes.addressof(program)))
+        # Replies that arrived before the filter was attached
+        sock.setblocking(False)
+        try:
+            while True:
+                sock.recv(65535)
+        except BlockingIOError:
+            pass
+        return sock
+
+    def receive(self, sock):
+        while self.sending:
+            if not select.select([sock], [], [], 0.1)[0]:
+                continue
+            try:
+                frame = sock.recv(65535)
+            except BlockingIOError:
+                continue
+            if len(frame) < 42 or frame[20:22] != b'\x00\x02':
+                continue
+            value = struct.unpack_from('!I', frame, 28)[0]
+            if self.first is not None and not self.first <= value <= self.last:
+                continue
+            with self.lock:
+                if value not in self.answered:
+                    mac = ':'.join(f'{b:02x}' for b in frame[22:28])
+                    self.answered[value] = mac
+                    self.pending.append((socket.inet_ntoa(frame[28:32]), mac))
+                    self.arrived.set()
+                    self.last_reply = time.monotonic()
+                    sent = self.sent_at.get(value)
+                    if sent:
+                        self.rtts.append(self.last_reply - sent)
+
+    def window(self):
+        """Quiet time that ends a pass, sized from the reply latencies seen so far
+
+        Only replies that made it into a window are measured, so fast hosts
+        alone can shrink it below what a slow host needs; the floor set by
+        send() keeps the later passes long enough to hear those.
+        """
+        policy = self.policy
+        wait = policy['rtt_factor'] * max(self.rtts) if self.rtts else policy['initial_wait']
+        return min(policy['max_wait'], max(policy['min_wait'], self.floor, wait))
+
+    def settle(self):
+        """Wait after a pass until replies stop coming, capped at max_wait"""
+        last_send = time.monotonic()
+        while True:
+            now = time.monotonic()
+            remaining = max(last_send, self.last_reply) + self.window() - now
+            if remaining <= 0 or now - last_send >= self.policy['max_wait']:
+                return
+            time.sleep(min(remaining, 0.02))
+
+    def send(self, sock):
+        mac, source = interface_addresses(self.iface)
+        template = (b'\xff' * 6 + mac + b'\x08\x06' + struct.pack('!HHBBH', 1, 0x0800, 6, 4, 1) +
+                    mac + source + b'\x00' * 6)
+        padding = b'\x00' * 18
+        interval = 1.0 / self.rate
+        start = next_send = time.monotonic()
+        try:
+            for attempt in range(self.policy['retries'] + 1):
+                self.passes += 1
+                before = len(self.answered)
+                if attempt == self.policy['retries']:
+                    self.floor = max(self.floor, self.policy['initial_wait'])
+                for value in self.targets():
+                    if value in self.answered:
+                        continue
+                    now = time.monotonic()
+                    if next_send - now > 0.001:
+                        time.sleep(next_send - now)
+                    next_send = max(next_send, now - 0.01) + interval
+                    if value not in self.sent_at:
+                        self.sent_order.append(value)
+                    self.sent_at[value] = time.monotonic()
+                    if len(self.sent_order) > ARP_RTT_TRACKED:
+                        self.sent_at.pop(self.sent_order.popleft(), None)
+                    sock.send(template + struct.pack('!I', value) + padding)
+                    self.sent += 1
+                self.settle()
+                if attempt and len(self.answered) == before:
+                    # A retry found nobody new. That means the response curve is flat only if the
+                    # pass waited as long as allowed; otherwise give slow hosts one full window.
+                    if self.window() >= self.policy['max_wait']:
+                        break
+                    self.floor = self.policy['max_wait']
+        finally:
+            self.elapsed = time.monotonic() - start
+            self.sending = False
+
+    def sweep(self):
+        """Yield lists of newly answered (ip, mac) pairs while the sweep runs
+
+        The first reply is handed on at once; after that, replies are
+        collected for ARP_BATCH_INTERVAL so later sweeps run on batches.
+        """
+        sock = self.open_socket()
+        receiver = threading.Thread(target=self.receive, args=(sock,), name='arp-recv', daemon=True)
+        sender = threading.Thread(target=self.send, args=(sock,), name='arp-send', daemon=True)
+        receiver.start()
+        sender.start()
+        first = True
+        try:
+            while True:
+                running = receiver.is_alive()
+                if first:
+                    self.arrived.wait(ARP_BATCH_INTERVAL)
+                else:
+                    receiver.join(ARP_BATCH_INTERVAL)
+                with self.lock:
+                    batch, self.pending = self.pending, []
+                if batch:
+                    first = False
+                    yield batch
+                if not running:
+                    return
+        finally:
+            self.sending = False
+            sock.close()
+
+
+def discover_hosts(ip_range):
+    """ARP sweep; returns a list of (ip, mac) for every host that answered"""
+    print("📡 Sending ARP requests...")
+    return [host for batch in ArpSweeper(ip_range).sweep() for host in batch]
+
+
+class PortSet(array.array):
+    """Sorted set of open TCP ports stored as 16-bit integers
+
+    Two bytes per port: a host with a handful of open ports costs a few dozen
+    bytes, where a 65536-bit map would cost 8 KB. Membership is array's own
+    C-level scan, faster than a binary search at these sizes; union and
+    difference return new PortSets. str() is the display form ('22, 80' or
+    'None'). Treated as immutable once built.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, ports=()):
+        return super().__new__(cls, 'H', sorted(set(ports)))
+
+    def __or__(self, other):
+        return PortSet(itertools.chain(self, other))
+
+    def __sub__(self, other):
+        return PortSet(port for port in self if port not in other)
+
+    def __str__(self):
+        return ', '.join(map(str, self)) if self else 'None'
+
+    def __repr__(self):
+        return f'PortSet({list(self)})'
+
+    def __reduce_ex__(self, protocol):
+        # array's own reduce calls __new__ with a typecode, which this __new__ does not take
+        return PortSet, (self.tolist(),)
+
+
+NO_PORTS = PortSet()
+
+
+class DeviceRecord:
+    """One scanned host: IPv4 and MAC addresses as integers, open ports as a PortSet
+
+    Stages fill the fields in place; view() builds the JSON/table form (the
+    same keys and strings as before) only when a device is output.
+    """
+
+    __slots__ = ('ip', 'mac', 'hostname', 'vendor', 'ports', 'os', 'ai', 'device_type', 'services', 'rtt')
+
+    def __init__(self, ip, mac):
+        self.ip = ip if isinstance(ip, int) else struct.unpack('!I', socket.inet_aton(ip))[0]
+        self.mac = mac if isinstance(mac, int) else mac_to_int(mac)
+        self.hostname = 'Unknown'
+        self.vendor = 'Unknown'
+        self.ports = NO_PORTS
+        self.os = 'Unknown'
+        self.ai = ''
+        self.device_type = 'Unknown'
+        self.services = 'N/A'
+        self.rtt = None
+
+    @property
+    def ip_str(self):
+        return socket.inet_ntoa(struct.pack('!I', self.ip))
+
+    @property
+    def mac_str(self):
+        digits = f'{self.mac:012x}'
+        return ':'.join(digits[i:i + 2] for i in range(0, 12, 2))
+
+    @classmethod
+    def from_view(cls, view):
+        """Record from its output form (saved JSON or NDJSON results)"""
+        device = cls(view['ip'], view['mac'])
+        for key in ('hostname', 'vendor', 'os', 'ai', 'device_type', 'services', 'rtt'):
+            if key in view:
+                setattr(device, key, view[key])
+        ports = view.get('ports', 'None')
+        device.ports = PortSet(int(port) for port in ports.split(',')) if ports != 'None' else NO_PORTS
+        return device
+
+    def view(self):
+        """Output form, keys in output order"""
+        return {
+            'ip': self.ip_str,
+            'mac': self.mac_str,
+            'hostname': self.hostname,
+            'vendor': self.vendor,
+            'ports': str(self.ports),
+            'os': self.os,
+            'ai': self.ai,
+            'device_type': self.device_type,
+            'services': self.services,
+            'rtt': self.rtt,
+        }
+
+
+def build_scan_stages(profile, lookups=None):
+    """Stage list (name, function, workers) for ScanPipeline from a scan profile
+
+    lookups maps names ('netbios', 'mdns', 'snmp', 'icmp', 'nmap') to batch lookups started for the
+    whole host list; stages consult them instead of probing host by host.
+    """
+    lookups = lookups or {}
+    delay = profile['delay']
+    port_scanner = {
+        'fast': scan_ports_fast,
+        'aggressive': scan_ports_aggressive,
+        'syn': scan_ports_syn,
+    }.get(profile['ports'])
+    if port_scanner is None:
+        # Explicit port list such as '22,80,8000-8100'
+        port_list = parse_ports(profile['ports'])
+        port_scanner = lambda ip: open_ports(scan_ports(ip, port_list, timeout=0.3))
+    if profile['ports'] == 'syn':
+        get_syn_scan_engine(profile.get('rate'))
+
+    def vendor_stage(device):
+        print(f"🔎 Analyzing {device.ip_str}...")
+        device.vendor = cached_mac_vendor(device.mac_str)
+
+    def hostname_stage(device):
+        device.hostname = cached_hostname(device.ip_str, device.mac_str, lookups,
+                                          profile.get('hostname_methods'), profile.get('hostname_deadline'))
+
+    def ports_stage(device):
+        device.ports = port_scanner(device.ip_str)
+        if delay > 0:
+            time.sleep(delay)
+
+    def os_stage(device):
+        ip = device.ip_str
+        device.os = guess_os(ip, lookups)
+        if 'icmp' in lookups:
+            device.rtt = (lookups['icmp'].get(ip) or {}).get('rtt')
+
+    def services_stage(device):
+        ip = device.ip_str
+        device_info = get_device_info(ip, lookups)
+        device.device_type = device_info['device_type']
+        if device.device_type == 'Unknown' and 'snmp' in lookups:
+            snmp = lookups['snmp'].get(ip) or {}
+            device.device_type = device_type_from_sysdescr(snmp.get('sysDescr')) or 'Unknown'
+        if device.device_type == 'Unknown' and 'mdns' in lookups:
+            device.device_type = mdns_device_type(lookups['mdns'].get(ip, {}).get('services')) or 'Unknown'
+        device.services = ', '.join(device_info['services'][:3]) if device_info['services'] else 'N/A'
+
+    def analysis_stage(device):
+        device.ai = ai_analysis(device.ip_str, device.ports, device.os, device.services)
+
+    functions = {
+        'vendor': vendor_stage,
+        'hostname': hostname_stage,
+        'ports': ports_stage,
+        'os': os_stage,
+        'services': services_stage,
+        'analysis': analysis_stage,
+    }
+    return [(name, functions[name], workers) for name, workers in profile['stages'].items()]
+
+
+def scan_profile(delay=0, aggressive=False, profile=None):
+    """Copy of a SCAN_PROFILES entry (or of a profile dict) with the delay override applied"""
+    if not isinstance(profile, dict):
+        profile = SCAN_PROFILES[profile or ('aggressive' if aggressive else 'regular')]
+    profile = dict(profile)
+    if delay:
+        profile['delay'] = delay
+    return profile
+
+
+class BatchRouter:
+    """Routes get(ip) to whichever batch lookup was started for that host"""
+
+    def __init__(self):
+        self.batches = {}
+
+    def add(self, ips, batch):
+        for ip in ips:
+            self.batches[ip] = batch
+
+    def get(self, ip, default=None):
+        batch = self.batches.get(ip)
+        return batch.get(ip, default) if batch else default
+
+
+def enrich_hosts(batches, profile, gate=None):
+    """Run batches of (ip, mac) pairs through the batch sweeps and the enrichment pipeline, yielding devices
+
+    batches may be a live iterator (ArpSweeper.sweep()); each batch starts its
+    own sweeps and its hosts enter the pipeline while later batches are still
+    being discovered. With a gate (threading.Event) every batch sweep and
+    stage call first waits for it to be set, so background work can be held
+    back while something more urgent runs.
+    """
+    lookups = {name: BatchRouter() for name in ('netbios', 'mdns', 'snmp', 'icmp', 'nmap')}
+
+    def records():
+        for hosts in batches:
+            if gate is not None:
+                gate.wait()
+            ips = [ip for ip, _ in hosts]
+            batch = {
+                'netbios': BatchLookup(netbios_sweep, ips),
+                'mdns': BatchLookup(mdns_sweep, ips),
+                'snmp': BatchLookup(snmp_sweep, ips),
+                'icmp': BatchLookup(icmp_sweep, ips),
+            }
+            batch['nmap'] = NmapBatch(ips, batch)
+            for name, lookup in batch.items():
+                lookups[name].add(ips, lookup)
+            for ip, mac in hosts:
+                yield DeviceRecord(ip, mac)
+
+    stages = build_scan_stages(profile, lookups)
+    if gate is not None:
+        def gated(function):
+            def stage(device):
+                gate.wait()
+                function(device)
+            return stage
+        stages = [(name, gated(function), workers) for name, function, workers in stages]
+    pipeline = ScanPipeline(stages, profile['queue_size'])
+    yield from pipeline.run(records())
+
+
+def scan_stream(ip_range, delay=0, aggressive=False, profile=None):
+    """Enhanced network scan as a generator: yields each device as soon as its enrichment is done
+
+    Hosts enter enrichment as they answer ARP, and only the hosts in flight
+    through the pipeline are held in memory.
+    """
+    profile = scan_profile(delay, aggressive, profile)
+    print(f"\n🔍 Scanning {ip_range}...")
+    print("📡 Sending ARP requests...")
+    
+    def discovered():
+        total = 0
+        sweeper = ArpSweeper(ip_range, rate=profile.get('arp_rate', ARP_RATE), policy=profile.get('arp_policy'))
+        for hosts in sweeper.sweep():
+            total += len(hosts)
+            print(f"✅ Found {len(hosts)} active device(s) ({total} so far)\n")
+            yield hosts
+        print(f"📡 ARP sweep finished: {total} active device(s) in {round(sweeper.elapsed, 2)}s "
+              f"({sweeper.passes} pass(es))")
+    
+    yield from enrich_hosts(discovered(), profile)
+
+
+def scan(ip_range, delay=0, aggressive=False, profile=None):
+    """Enhanced network scan: ARP discovery, then a staged enrichment pipeline"""
+    return list(scan_stream(ip_range, delay, aggressive, profile))
+
+
+def shard_worker(func, shard, results):
+    """Body of a shard process: fresh per-process state, then stream func(shard) records to the parent"""
+    global hostname_executor, port_scan_engine, syn_scan_engine, enrichment_cache, metrics
+    # Ctrl+C is handled by the parent, which terminates the shards
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Threads, sockets and the SQLite connection do not survive fork; each shard makes its own
+    hostname_executor = ThreadPoolExecutor(max_workers=128, thread_name_prefix='hostname')
+    port_scan_engine = syn_scan_engine = enrichment_cache = None
+    metrics = Metrics()
+    try:
+        for record in func(shard):
+            results.put(record)
+    except Exception as e:
+        print(f"⚠️  Shard {shard} failed: {e}")
+    finally:
+        # This shard's timings go back to the parent with its end-of-stream marker
+        results.put((multiprocessing.current_process().name, metrics.series, metrics.answers))
+
+
+def run_sharded(func, shards, workers=None):
+    """Run the generator func over each shard in its own process, yielding records as they arrive
+
+    Shards are dealt round-robin to at most workers processes. A process that
+    dies without sending its end marker (killed, out of memory) counts as
+    finished and is reported as failed. Interrupting the consumer (Ctrl+C)
+    terminates every shard before the exception propagates.
+    """
+    workers = min(workers or SHARD_WORKERS, len(shards))
+    context = multiprocessing.get_context('fork')
+    results = context.Queue(maxsize=1024)
+
+    def run_shards(assigned):
+        for shard in assigned:
+            yield from func(shard)
+
+    processes = [context.Process(target=shard_worker, args=(run_shards, shards[n::workers], results),
+                                 name=f'shard-{n}', daemon=True) for n in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        running = {process.name: n for n, process in enumerate(processes)}
+        dead = set()
+        while running:
+            try:
+                record = results.get(timeout=SHARD_POLL)
+            except queue.Empty:
+                for name, n in list(running.items()):
+                    if processes[n].is_alive():
+                        continue
+                    # A marker sent just before exiting can still be in the pipe: give it one more poll
+                    if name not in dead:
+                        dead.add(name)
+                        continue
+                    del running[name]
+                    print(f"❌ Shard process {name} died (exit code {processes[n].exitcode}); "
+                          f"no results for {', '.join(map(str, shards[n::workers]))}")
+                continue
+            if isinstance(record, tuple):
+                name, series, answers = record
+                metrics.merge(series, answers)
+                running.pop(name, None)
+            else:
+                yield record
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+
+
+def scan_sharded(ip_range, profile=None, workers=None):
+    """scan_stream() split across worker processes by subnet, records merged as they are produced
+
+    Each process runs its own ARP sweep (at an equal share of the profile's ARP
+    rate), batch sweeps and enrichment pipeline. Ranges that are not CIDR
+    networks run as a single shard.
+    """
+    workers = workers or SHARD_WORKERS
+    profile = scan_profile(profile=profile)
+    profile['arp_rate'] = max(1, profile.get('arp_rate', ARP_RATE) // workers)
+    try:
+        network = ipaddress.ip_network(ip_range, strict=False)
+        # One part per worker at least, SHARD_SPLIT per worker at most, none smaller than a /24 unless needed
+        extra_bits = min(32 - network.prefixlen, (workers * SHARD_SPLIT - 1).bit_length(),
+                         max(24 - network.prefixlen, (workers - 1).bit_length()))
+        shards = [str(subnet) for subnet in network.subnets(prefixlen_diff=extra_bits)]
+    except ValueError:
+        shards = [ip_range]
+    print(f"🧩 Sharding {ip_range} into {len(shards)} part(s) over {min(workers, len(shards))} process(es)")
+    yield from run_sharded(lambda shard: scan_stream(shard, profile=profile), shards, workers)
+
+
+def monitor(ip_range, interval=MONITOR_INTERVAL, reenrich_interval=MONITOR_REENRICH_INTERVAL):
+    """Enhanced monitoring mode
+
+    Each cycle is only an ARP sweep. Newly seen or changed (IP, MAC) pairs are
+    enriched right away; hosts that have not changed are enriched again in the
+    background once their data is older than reenrich_interval seconds, a few
+    per cycle, with one worker per stage and only while the monitor sleeps
+    between sweeps. Devices are tracked by MAC as well as IP, so a host that
+    DHCP moved to another address is reported as moved rather than left + new.
+    """
+    print("🛰️  Monitoring mode activated. Press Ctrl+C to stop.")
+    profile = scan_profile()
+    known = {}  # ip -> device
+    by_mac = {}  # mac -> ip
+    enriched_at = {}  # (ip, mac) -> time of last enrichment
+    refreshed = queue.Queue()
+    refresher = None
+    # Set while the monitor sleeps: background re-enrichment only runs then
+    idle = threading.Event()
+    refresh_profile = dict(profile, stages={name: MONITOR_REENRICH_WORKERS for name in profile['stages']})
+    scan_count = 0
+    
+    def refresh(hosts):
+        for device in enrich_hosts([hosts], refresh_profile, gate=idle):
+            refreshed.put(device)
+    
+    try:
+        while True:
+            idle.clear()
             scan_count += 1
+            cycle_start = time.time()
             print(f"\n📊 Scan #{scan_count} - {time.strftime('%H:%M:%S')}")
             
-            devices = scan(ip_range)
-            current = {d['ip']: d for d in devices}
+            # Results of last cycle's background re-enrichment
+            while not refreshed.empty():
+                device = refreshed.get()
+                ip = device.ip_str
+                old = known.get(ip)
+                if old and old.mac == device.mac:
+                    if device.ports != old.ports:
+                        print(f"🔓 PORTS CHANGED: {ip} | opened: {device.ports - old.ports} | "
+                              f"closed: {old.ports - device.ports}")
+                    known[ip] = device
+                    enriched_at[(ip, device.mac_str)] = time.time()
+            
+            current = {ip: mac for ip, mac in discover_hosts(ip_range)}
             
-            new_ips = set(current.keys()) - set(known.keys())
-            for ip in new_ips:
-                device = current[ip]
-                print(f"🆕 NEW: {ip} | {device['hostname']} | {device['mac']} | {device['vendor']}")
+            changed = [(ip, mac) for ip, mac in current.items() if ip not in known or known[ip].mac_str != mac]
+            fresh = {d.ip_str: d for d in enrich_hosts([changed], profile)} if changed else {}
             
-            gone_ips = set(known.keys()) - set(current.keys())
-            for ip in gone_ips:
-                device = known[ip]
-                print(f"❌ LEFT: {ip} | {device['hostname']} | {device['mac']}")
+            for ip, mac in changed:
+                device = fresh.get(ip) or DeviceRecord(ip, mac)
+                old_ip = by_mac.get(mac)
+                if ip in known:
+                    print(f"⚠️  MAC CHANGED: {ip} | {known[ip].mac_str} → {mac}")
+                    enriched_at.pop((ip, known[ip].mac_str), None)
+                elif old_ip and old_ip not in current:
+                    print(f"🔀 MOVED: {mac} | {old_ip} → {ip} | {device.hostname}")
+                else:
+                    print(f"🆕 NEW: {ip} | {device.hostname} | {mac} | {device.vendor}")
+                known[ip] = device
+                enriched_at[(ip, mac)] = time.time()
             
-            for ip in set(current.keys()) & set(known.keys()):
-                if current[ip]['mac'] != known[ip]['mac']:
-                    print(f"⚠️  MAC CHANGED: {ip} | {known[ip]['mac']} → {current[ip]['mac']}")
+            current_macs = set(current.values())
+            for ip in set(known) - set(current):
+                device = known.pop(ip)
+                enriched_at.pop((ip, device.mac_str), None)
+                if device.mac_str not in current_macs:
+                    print(f"❌ LEFT: {ip} | {device.hostname} | {device.mac_str}")
             
-            known = current
+            by_mac = {device.mac_str: ip for ip, device in known.items()}
             
-            print(f"\n💤 Sleeping 15 seconds... (Total devices: {len(known)})")
-            time.sleep(15)
+            # Low-priority refresh of hosts whose data has gone stale
+            stale = sorted((t, pair) for pair, t in enriched_at.items() if time.time() - t > reenrich_interval)
+            if stale and not (refresher and refresher.is_alive()):
+                hosts = [pair for _, pair in stale[:MONITOR_REENRICH_BATCH]]
+                refresher = threading.Thread(target=refresh, args=(hosts,), name='reenrich', daemon=True)
+                refresher.start()
+            
+            if metrics_dir:
+                metrics.write(metrics_dir)
+            elapsed = time.time() - cycle_start
+            print(f"\n💤 Cycle took {round(elapsed, 2)}s, sleeping {interval} seconds... (Total devices: {len(known)})")
+            idle.set()
+            time.sleep(interval)
             
     except KeyboardInterrupt:
         print("\n🛑 Monitoring stopped.")
         print(f"📊 Total scans: {scan_count} | Final device count: {len(known)}")
 
 
-def display(devices, scan_time):
-    """Enhanced display with more information"""
+def decode_netbios_name(data, offset):
+    """First-level decode of a 32-byte NetBIOS name at offset; returns (name, suffix)"""
+    if data[offset] != 32 or offset + 33 > len(data):
+        raise ValueError("Not an encoded NetBIOS name")
+    raw = bytes(((data[i] - 0x41) << 4) | (data[i + 1] - 0x41) for i in range(offset + 1, offset + 33, 2))
+    return raw[:15].decode('ascii', errors='replace').strip(), raw[15]
+
+
+def parse_dhcp_options(data):
+    """Options of a DHCP message as {code: bytes}; data starts at the BOOTP header"""
+    options = {}
+    if data[236:240] != b'\x63\x82\x53\x63':
+        return options
+    offset = 240
+    while offset < len(data):
+        code = data[offset]
+        if code == 255:
+            break
+        if code == 0:
+            offset += 1
+            continue
+        length = data[offset + 1]
+        options[code] = data[offset + 2:offset + 2 + length]
+        offset += 2 + length
+    return options
+
+
+class PassiveMonitor:
+    """Device table kept up to date from sniffed ARP, DHCP, mDNS, NBNS and SSDP frames
+
+    Frames are parsed from raw bytes with struct rather than scapy layers,
+    so a capture can be replayed at full speed. Devices are keyed by MAC.
+    """
+
+    def __init__(self, verbose=True):
+        self.verbose = verbose
+        self.devices = {}
+        self.packets = 0
+
+    def device(self, mac, ip, source):
+        device = self.devices.get(mac)
+        now = time.time()
+        if device is None:
+            device = self.devices[mac] = {
+                'ip': ip, 'mac': mac, 'hostname': 'Unknown',
+                'vendor': lookup_vendor_index(mac) or 'Unknown',
+                'services': 'N/A', 'source': source, 'first_seen': now, 'last_seen': now,
+            }
+            if self.verbose:
+                print(f"🆕 NEW ({source}): {ip} | {mac} | {device['vendor']}")
+        else:
+            if ip and ip != device['ip'] and ip != '0.0.0.0':
+                if self.verbose:
+                    print(f"🔀 MOVED ({source}): {mac} | {device['ip']} → {ip}")
+                device['ip'] = ip
+            device['last_seen'] = now
+        return device
+
+    def name(self, device, hostname, source):
+        hostname = hostname.strip().rstrip('.')
+        if hostname and hostname != device['hostname']:
+            device['hostname'] = hostname
+            device['source'] = source
+            if self.verbose:
+                print(f"🏷️  NAME ({source}): {device['ip']} | {device['mac']} | {hostname}")
+
+    def handle(self, frame):
+        """Update the table from one raw Ethernet frame; anything unrecognised is ignored"""
+        self.packets += 1
+        try:
+            ethertype = struct.unpack_from('!H', frame, 12)[0]
+            offset = 14
+            if ethertype == 0x8100:
+                ethertype = struct.unpack_from('!H', frame, 16)[0]
+                offset = 18
+            if ethertype == 0x0806:
+                self.handle_arp(frame, offset)
+            elif ethertype == 0x0800 and frame[offset + 9] == 17:
+                ihl = (frame[offset] & 0x0F) * 4
+                src_ip = socket.inet_ntoa(frame[offset + 12:offset + 16])
+                sport, dport = struct.unpack_from('!HH', frame, offset + ihl)
+                payload = frame[offset + ihl + 8:]
+                mac = ':'.join(f'{b:02x}' for b in frame[6:12])
+                if dport == 67 or sport == 67:
+                    self.handle_dhcp(payload)
+                elif sport == 5353:
+                    self.handle_mdns(payload, mac, src_ip)
+                elif sport == 137:
+                    self.handle_nbns(payload, mac, src_ip)
+                elif sport == 1900 or dport == 1900:
+                    self.handle_ssdp(payload, mac, src_ip)
+        except (struct.error, IndexError, ValueError, OSError):
+            # OSError: inet_ntoa on an address cut short by a truncated frame
+            pass
+
+    def handle_arp(self, frame, offset):
+        opcode = struct.unpack_from('!H', frame, offset + 6)[0]
+        sender_ip = socket.inet_ntoa(frame[offset + 14:offset + 18])
+        if opcode in (1, 2) and sender_ip != '0.0.0.0':
+            self.device(':'.join(f'{b:02x}' for b in frame[offset + 8:offset + 14]), sender_ip, 'arp')
+
+    def handle_dhcp(self, payload):
+        options = parse_dhcp_options(payload)
+        if not options:
+            return
+        mac = ':'.join(f'{b:02x}' for b in payload[28:34])
+        if payload[0] == 1:
+            # Client message: requested or current address, hostname in option 12
+            ip = socket.inet_ntoa(options[50]) if len(options.get(50, b'')) == 4 else socket.inet_ntoa(payload[12:16])
+            device = self.device(mac, ip if ip != '0.0.0.0' else None, 'dhcp')
+            if 12 in options:
+                self.name(device, options[12].decode('utf-8', errors='replace'), 'dhcp')
+            # Vendor class (option 60, e.g. MSFT 5.0, android-dhcp-13) unless SSDP already named a server
+            if options.get(60) and device['services'] == 'N/A':
+                device['services'] = options[60].decode('utf-8', errors='replace').strip()[:40]
+        elif options.get(53) == b'\x05':
+            # Server ACK: the address handed out
+            self.device(mac, socket.inet_ntoa(payload[16:20]), 'dhcp')
+
+    def handle_mdns(self, payload, mac, src_ip):
+        for name, rr_type, value in parse_dns_records(payload):
+            if rr_type == 1 and value == src_ip:
+                self.name(self.device(mac, src_ip, 'mdns'), name[:-len('.local')] if name.endswith('.local') else name, 'mdns')
+
+    def handle_nbns(self, payload, mac, src_ip):
+        flags, questions, answers, _, additional = struct.unpack_from('!HHHHH', payload, 2)
+        opcode = (flags >> 11) & 0x0F
+        # Registrations/refreshes carry the sender's own name; so do positive answers
+        if opcode in (5, 8, 9) or (flags & 0x8000 and answers):
+            name, suffix = decode_netbios_name(payload, 12)
+            if suffix in (0x00, 0x20):
+                self.name(self.device(mac, src_ip, 'nbns'), name, 'nbns')
+
+    def handle_ssdp(self, payload, mac, src_ip):
+        device = self.device(mac, src_ip, 'ssdp')
+        for line in payload.split(b'\r\n'):
+            if line.lower().startswith(b'server:'):
+                device['services'] = line[7:].decode('utf-8', errors='replace').strip()[:40]
+
+    def replay(self, path):
+        """Feed every frame of a pcap file through handle() as fast as possible; returns packets/s"""
+        start = time.perf_counter()
+        from scapy.utils import RawPcapReader
+        count = self.packets
+        with RawPcapReader(path) as reader:
+            for frame, _ in reader:
+                self.handle(frame)
+        elapsed = time.perf_counter() - start
+        return (self.packets - count) / elapsed if elapsed else 0.0
+
+    def display(self):
+        from prettytable import PrettyTable
+        table = PrettyTable()
+        table.field_names = ['IP', 'MAC', 'Hostname', 'Vendor', 'Services', 'Source', 'Last Seen']
+        table.align = 'l'
+        for d in sorted(self.devices.values(), key=lambda d: d['last_seen'], reverse=True):
+            table.add_row([d['ip'], d['mac'], d['hostname'][:20], d['vendor'][:25], d['services'][:40],
+                           d['source'], time.strftime('%H:%M:%S', time.localtime(d['last_seen']))])
+        print(table)
+        print(f"🟢 Total Devices: {len(self.devices)} | 📦 Packets: {self.packets}")
+
+
+def passive_monitor(iface=None):
+    """Passive mode: no probes sent, the device table is built from sniffed broadcast traffic"""
+    from scapy.arch.common import compile_filter
+    from scapy.error import Scapy_Exception
+    from scapy.sendrecv import AsyncSniffer
+    print("👂 Passive mode activated. Press Ctrl+C to stop.")
+    watcher = PassiveMonitor()
+    bpf = PASSIVE_BPF
+    try:
+        compile_filter(bpf, iface=iface)
+    except (ImportError, Scapy_Exception):
+        print("⚠️  libpcap/tcpdump not available - filtering in Python instead of the kernel")
+        bpf = None
+    sniffer = AsyncSniffer(iface=iface, filter=bpf, store=False,
+                           prn=lambda packet: watcher.handle(bytes(packet)))
+    sniffer.start()
+    try:
+        while True:
+            time.sleep(60)
+            print(f"\n📊 {time.strftime('%H:%M:%S')} - {len(watcher.devices)} device(s), {watcher.packets} packet(s)")
+    except KeyboardInterrupt:
+        sniffer.stop(join=False)
+        print("\n🛑 Passive mode stopped.")
+        watcher.display()
+
+
+def replay_pcap(path):
+    """Build the passive device table from a capture file and report the processing rate"""
+    watcher = PassiveMonitor(verbose=False)
+    rate = watcher.replay(path)
+    watcher.display()
+    print(f"⚡ {round(rate)} packets/sec")
+
+
+# Columns and widths of the live results display
+DISPLAY_COLUMNS = [('IP', 'ip', 15), ('MAC', 'mac', 17), ('Hostname', 'hostname', 20), ('Vendor', 'vendor', 25),
+                   ('Ports', 'ports', 30), ('OS', 'os', 15), ('AI Security Analysis', 'ai', 60)]
+
+
+class ResultStore:
+    """Scan results held column by column
+
+    Addresses and RTTs are typed arrays; hostname, vendor, OS, verdict, device
+    type and services are dictionary-encoded (a code per host, each distinct
+    string stored once); open ports are kept per host and as a port -> rows
+    index. Filters and group-by counts work on the codes (with NumPy when it
+    is installed) and test each distinct string once, not once per host.
+    """
+
+    TEXT_COLUMNS = ('hostname', 'vendor', 'os', 'ai', 'device_type', 'services')
+    GROUPS = TEXT_COLUMNS + ('risk', 'port')
+
+    def __init__(self):
+        self.ip = array.array('I')
+        self.mac = array.array('Q')
+        self.rtt = array.array('d')
+        self.codes = {name: array.array('I') for name in self.TEXT_COLUMNS}
+        self.values = {name: [] for name in self.TEXT_COLUMNS}
+        self.index = {name: {} for name in self.TEXT_COLUMNS}
+        # Hosts per code, kept up to date so whole-store summaries need no pass over the rows
+        self.totals = {name: [] for name in self.TEXT_COLUMNS}
+        # Host r's open ports are ports[port_offsets[r]:port_offsets[r + 1]]
+        self.port_offsets = array.array('I', [0])
+        self.ports = array.array('H')
+        self.port_rows = {}
+
+    @classmethod
+    def from_devices(cls, devices):
+        store = cls()
+        for device in devices:
+            store.add(device)
+        return store
+
+    def __len__(self):
+        return len(self.ip)
+
+    def add(self, device):
+        """Append a DeviceRecord or its output view"""
+        if isinstance(device, dict):
+            device = DeviceRecord.from_view(device)
+        row = len(self.ip)
+        self.ip.append(device.ip)
+        self.mac.append(device.mac)
+        self.rtt.append(float('nan') if device.rtt is None else device.rtt)
+        for name in self.TEXT_COLUMNS:
+            value = getattr(device, name)
+            code = self.index[name].get(value)
+            if code is None:
+                code = self.index[name][value] = len(self.values[name])
+                self.values[name].append(value)
+                self.totals[name].append(0)
+            self.codes[name].append(code)
+            self.totals[name][code] += 1
+        self.ports.extend(device.ports)
+        self.port_offsets.append(len(self.ports))
+        for port in device.ports:
+            rows = self.port_rows.get(port)
+            if rows is None:
+                rows = self.port_rows[port] = array.array('I')
+            rows.append(row)
+
+    def record(self, row):
+        device = DeviceRecord(self.ip[row], self.mac[row])
+        for name in self.TEXT_COLUMNS:
+            setattr(device, name, self.values[name][self.codes[name][row]])
+        device.ports = PortSet(self.ports[self.port_offsets[row]:self.port_offsets[row + 1]])
+        device.rtt = None if self.rtt[row] != self.rtt[row] else self.rtt[row]
+        return device
+
+    def views(self, rows=None):
+        for row in range(len(self)) if rows is None else rows:
+            yield self.record(row).view()
+
+    def risk_levels(self):
+        """Risk level name for each distinct verdict code"""
+        labels = {label: level for level, label in RISK_LEVELS.items()}
+        return [labels.get(verdict.split(' | ', 1)[0], 'low') for verdict in self.values['ai']]
+
+    def select(self, ports=(), network=None, risk=None, **contains):
+        """Rows matching every condition: all of ports open, inside a CIDR network, a risk
+        level, and case-insensitive substrings of text columns (vendor='cisco')
+
+        Returns a sequence of row numbers (a NumPy array when NumPy is installed).
+        """
+        unknown = set(contains) - set(self.TEXT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(sorted(unknown))}")
+        # Per-column tables of which codes qualify, each distinct value tested once
+        allowed = {name: [needle.lower() in value.lower() for value in self.values[name]]
+                   for name, needle in contains.items()}
+        if risk is not None:
+            allowed['ai'] = [level == risk for level in self.risk_levels()]
+        if network is not None:
+            network = ipaddress.ip_network(network, strict=False)
+            first, last = int(network.network_address), int(network.broadcast_address)
+        count = len(self)
+        np = optional_numpy()
+        if np is None:
+            rows = None
+            # Rarest port first, so later ports only filter a short list
+            for port in sorted(ports, key=lambda port: len(self.port_rows.get(port, ()))):
+                members = self.port_rows.get(port, ())
+                if rows is None:
+                    rows = list(members)
+                else:
+                    members = set(members)
+                    rows = [row for row in rows if row in members]
+            if rows is None:
+                rows = range(count)
+            if network is not None:
+                rows = [row for row in rows if first <= self.ip[row] <= last]
+            for name, table in allowed.items():
+                codes = self.codes[name]
+                rows = [row for row in rows if table[codes[row]]]
+            return list(rows)
+        mask = np.ones(count, dtype=bool)
+        for port in ports:
+            hit = np.zeros(count, dtype=bool)
+            if self.port_rows.get(port):
+                hit[np.frombuffer(self.port_rows[port], dtype=np.uint32)] = True
+            mask &= hit
+        if network is not None and count:
+            ips = np.frombuffer(self.ip, dtype=np.uint32)
+            mask &= (ips >= first) & (ips <= last)
+        for name, table in allowed.items():
+            if count:
+                mask &= np.array(table, dtype=bool)[np.frombuffer(self.codes[name], dtype=np.uint32)]
+        return np.flatnonzero(mask)
+
+    def group_count(self, column, rows=None, top=None):
+        """[(value, hosts)] for a column (or 'risk', 'port'), most common first, over rows (default all)"""
+        np = optional_numpy()
+        if column == 'port':
+            if rows is None:
+                counts = {port: len(members) for port, members in self.port_rows.items()}
+            elif np is not None:
+                selected = np.zeros(len(self), dtype=bool)
+                selected[rows] = True
+                counts = {port: int(selected[np.frombuffer(members, dtype=np.uint32)].sum())
+                          for port, members in self.port_rows.items()}
+            else:
+                selected = set(rows)
+                counts = {port: sum(1 for row in members if row in selected)
+                          for port, members in self.port_rows.items()}
+        else:
+            name = 'ai' if column == 'risk' else column
+            if name not in self.TEXT_COLUMNS:
+                raise ValueError(f"Cannot group by {column!r}; choose from {', '.join(self.GROUPS)}")
+            codes = self.codes[name]
+            if rows is None:
+                by_code = dict(enumerate(self.totals[name]))
+            elif np is not None and len(self):
+                codes = np.frombuffer(codes, dtype=np.uint32)
+                by_code = dict(enumerate(np.bincount(codes[rows], minlength=len(self.values[name])).tolist()))
+            else:
+                by_code = collections.Counter(codes[row] for row in rows)
+            labels = self.risk_levels() if column == 'risk' else self.values[name]
+            counts = collections.Counter()
+            for code, hosts in by_code.items():
+                counts[labels[code]] += hosts
+        ranked = sorted(((value, hosts) for value, hosts in counts.items() if hosts),
+                        key=lambda item: (-item[1], str(item[0])))
+        return ranked[:top] if top else ranked
+
+    def risk_counts(self, rows=None):
+        return dict(self.group_count('risk', rows))
+
+
+def display_summary(store, scan_time):
+    """Footer with totals, speed, risk counts, top vendors/ports and cache stats, from a ResultStore or SummaryCounters"""
+    total = len(store)
+    risks = store.risk_counts()
+    print("\n" + "="*150)
+    print(f"🟢 Total Devices: {total}")
+    print(f"⏱️  Scan Time: {round(scan_time, 2)} seconds")
+    print(f"⚡ Speed: {round(total/scan_time, 2)} devices/sec")
+    
+    if risks.get('critical'):
+        print(f"🔴 CRITICAL RISKS: {risks['critical']} device(s)")
+    if risks.get('high'):
+        print(f"🟠 HIGH RISKS: {risks['high']} device(s)")
+    
+    if total:
+        vendors = store.group_count('vendor', top=3)
+        print("🏭 Top vendors: " + ', '.join(f"{vendor} ({hosts})" for vendor, hosts in vendors))
+        ports = store.group_count('port', top=5)
+        if ports:
+            print("🔓 Top open ports: " + ', '.join(f"{port} ({hosts})" for port, hosts in ports))
+    
+    if enrichment_cache:
+        stats = ', '.join(f"{source} {s['hits']} hits/{s['misses']} misses"
+                          for source, s in enrichment_cache.stats.items())
+        print(f"🗄️  Enrichment cache: {stats}")
+    
+    print("="*150 + "\n")
+
+
+class SummaryCounters:
+    """Just the tallies display_summary reads, for scans whose devices are not kept
+
+    Memory grows with the number of distinct vendors and ports, not with hosts.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.risks = collections.Counter()
+        self.groups = {'vendor': collections.Counter(), 'port': collections.Counter()}
+        self.labels = {label: level for level, label in RISK_LEVELS.items()}
+
+    def __len__(self):
+        return self.total
+
+    def add(self, device):
+        """Count a DeviceRecord or its output view"""
+        if isinstance(device, dict):
+            device = DeviceRecord.from_view(device)
+        self.total += 1
+        self.risks[self.labels.get(device.ai.split(' | ', 1)[0], 'low')] += 1
+        self.groups['vendor'][device.vendor] += 1
+        self.groups['port'].update(device.ports)
+
+    def group_count(self, column, top=None):
+        """[(value, hosts)] for 'vendor' or 'port', ranked like ResultStore.group_count"""
+        ranked = sorted(self.groups[column].items(), key=lambda item: (-item[1], str(item[0])))
+        return ranked[:top] if top else ranked
+
+    def risk_counts(self):
+        return dict(self.risks)
+
+
+class LiveDisplay:
+    """Prints one fixed-width row per device as it arrives, then the summary footer
+
+    With keep (the default) devices go into a ResultStore, a few dozen bytes per
+    host, which finish() returns; without it only SummaryCounters are kept.
+    """
+
+    def __init__(self, keep=True):
+        self.store = ResultStore() if keep else SummaryCounters()
+        self.started = time.time()
+
+    def row(self, values):
+        return ' | '.join(str(value)[:width].ljust(width) for value, (_, _, width) in zip(values, DISPLAY_COLUMNS))
+
+    def add(self, device):
+        if not len(self.store):
+            print("="*150)
+            print("📡 SCAN RESULTS")
+            print("="*150)
+            print(self.row([title for title, _, _ in DISPLAY_COLUMNS]).rstrip())
+            print("-"*150)
+        self.store.add(device)
+        view = device if isinstance(device, dict) else device.view()
+        print(self.row([view[key] for _, key, _ in DISPLAY_COLUMNS]).rstrip(), flush=True)
+
+    def finish(self):
+        """Print the footer; returns the ResultStore, or None when devices were not kept"""
+        display_summary(self.store, time.time() - self.started)
+        return self.store if isinstance(self.store, ResultStore) else None
+
+
+class NdjsonWriter:
+    """Append-only newline-delimited JSON output, one device per line, flushed as written"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'a', encoding='utf-8')
+
+    def write(self, device):
+        self.file.write(json.dumps(device, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+        print(f"💾 Results appended to {self.filename}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_scan(target, profile=None, ndjson=None, shards=None):
+    """Scan with live output; returns the results as a ResultStore, or None when streamed to an NDJSON file
+
+    shards > 1 splits the scan across that many worker processes.
+    """
+    live = LiveDisplay(keep=not ndjson)
+    writer = NdjsonWriter(ndjson) if ndjson else None
+    if shards and shards > 1:
+        devices = scan_sharded(target, profile, shards)
+    else:
+        devices = scan_stream(target, profile=profile)
+    try:
+        for device in devices:
+            live.add(device)
+            if writer:
+                writer.write(device.view())
+    finally:
+        if writer:
+            writer.close()
+    results = live.finish()
+    if metrics_dir:
+        metrics.report()
+        metrics.write(metrics_dir)
+    return results
+
+
+def save_results(results, filename="scan_results.json"):
+    """Save scan results (a ResultStore) to JSON file"""
+    try:
+        with open(filename, 'w') as f:
+            json.dump(list(results.views()), f, indent=4)
+        print(f"💾 Results saved to {filename}")
+    except Exception as e:
+        print(f"❌ Error saving results: {e}")
+
+
+class ScanJob:
+    """One queued or running daemon scan; every subscribed client reads its records as they arrive"""
+
+    def __init__(self, job_id, targets, profile, ports):
+        self.id = job_id
+        self.targets = targets
+        self.profile = profile
+        self.ports = ports
+        try:
+            self.network = ipaddress.ip_network(targets, strict=False)
+        except ValueError:
+            self.network = None
+        self.records = []
+        self.done = False
+        self.error = None
+        self.started = self.finished = None
+        self.changed = threading.Condition()
+
+    def covers(self, targets, profile, ports):
+        """True when this job's results include everything a job for targets/profile/ports would produce"""
+        if (profile, ports) != (self.profile, self.ports):
+            return False
+        if targets == self.targets:
+            return True
+        try:
+            network = ipaddress.ip_network(targets, strict=False)
+        except ValueError:
+            return False
+        return self.network is not None and network.subnet_of(self.network)
+
+    def add(self, record):
+        with self.changed:
+            self.records.append(record)
+            self.changed.notify_all()
+
+    def finish(self, error=None):
+        with self.changed:
+            self.done = True
+            self.error = error
+            self.finished = time.time()
+            self.changed.notify_all()
+
+    def follow(self, network=None):
+        """Yield records (past and future) until the job ends, optionally only those inside network"""
+        index = 0
+        while True:
+            with self.changed:
+                while index == len(self.records) and not self.done:
+                    self.changed.wait()
+                batch = self.records[index:]
+                index = len(self.records)
+                done = self.done
+            for record in batch:
+                if network is None or ipaddress.ip_address(record.ip) in network:
+                    yield record
+            if done:
+                return
+
+
+class ScanDaemon:
+    """Long-running scanner behind a Unix socket, with warm caches and a deduplicating job queue
+
+    Clients send one JSON line, {"targets": "...", "profile": "regular",
+    "ports": "fast"} or {"op": "status"}, and read NDJSON events back:
+    queued, one device event per host as it is enriched, then done. A job
+    whose results are already covered by a queued or running job (same
+    profile and ports, same or enclosing range) is not scanned again; the
+    client follows the existing job instead.
+    """
+
+    def __init__(self, path=DAEMON_SOCKET, workers=DAEMON_WORKERS, group=None):
+        self.path = path
+        self.group = group
+        self.jobs = collections.OrderedDict()
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.workers = [threading.Thread(target=self.run_jobs, name=f'daemon-{n}', daemon=True) for n in range(workers)]
+
+    def warm_up(self):
+        """Load everything a cold start pays for once: vendor data, cache, engines"""
+        lookup_vendor_index('00:00:00:00:00:00')
+        get_enrichment_cache()
+        get_port_scan_engine()
+
+    def submit(self, targets, profile='regular', ports=None):
+        """Queue a job, or return the live job that already covers it; returns (job, deduplicated)"""
+        if not isinstance(targets, str):
+            raise TypeError("targets must be a string")
+        if profile not in SCAN_PROFILES:
+            raise ValueError(f"unknown profile {profile!r}")
+        ports = str(ports or SCAN_PROFILES[profile]['ports'])
+        if ports not in ('fast', 'aggressive', 'syn'):
+            parse_ports(ports)
+        with self.lock:
+            for job in self.jobs.values():
+                if not job.done and job.covers(targets, profile, ports):
+                    return job, True
+            job = ScanJob(self.next_id, targets, profile, ports)
+            self.next_id += 1
+            self.jobs[job.id] = job
+            # Keep finished jobs around for status only for a while
+            while len(self.jobs) > DAEMON_JOB_HISTORY and next(iter(self.jobs.values())).done:
+                self.jobs.popitem(last=False)
+        self.queue.put(job)
+        return job, False
+
+    def run_jobs(self):
+        while True:
+            job = self.queue.get()
+            job.started = time.time()
+            profile = dict(SCAN_PROFILES[job.profile], ports=job.ports)
+            try:
+                for device in scan_stream(job.targets, profile=profile):
+                    job.add(device)
+                job.finish()
+            except Exception as e:
+                job.finish(str(e))
+
+    def status(self):
+        with self.lock:
+            return [{'job': job.id, 'targets': job.targets, 'profile': job.profile, 'ports': job.ports,
+                     'devices': len(job.records), 'state': 'done' if job.done else 'running' if job.started else 'queued',
+                     'error': job.error} for job in self.jobs.values()]
+
+    def handle(self, connection):
+        """Serve one client connection"""
+        def send(event):
+            connection.sendall((json.dumps(event, ensure_ascii=False) + '\n').encode())
+
+        with connection, connection.makefile('rb') as reader:
+            try:
+                line = reader.readline()
+                if not line:
+                    return  # connected and hung up (a liveness check)
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                    if request.get('op') == 'status':
+                        send({'event': 'status', 'jobs': self.status()})
+                        return
+                    started = time.time()
+                    job, deduplicated = self.submit(request['targets'], request.get('profile', 'regular'),
+                                                    request.get('ports'))
+                except (KeyError, ValueError, AttributeError, TypeError) as e:
+                    send({'event': 'error', 'error': str(e)})
+                    return
+                send({'event': 'queued', 'job': job.id, 'deduplicated': deduplicated,
+                      'position': self.queue.qsize()})
+                network = None
+                if deduplicated and request['targets'] != job.targets:
+                    network = ipaddress.ip_network(request['targets'], strict=False)
+                count = 0
+                for record in job.follow(network):
+                    send(dict(record.view(), event='device', job=job.id))
+                    count += 1
+                send({'event': 'done', 'job': job.id, 'devices': count, 'error': job.error,
+                      'seconds': round(time.time() - started, 3)})
+            except OSError:
+                pass  # client went away
+
+    def serve(self):
+        """Warm up, then accept clients until interrupted"""
+        gid = grp.getgrnam(self.group).gr_gid if self.group else None
+        if os.path.lexists(self.path):
+            # Only a stale socket left by a killed daemon may be replaced
+            if not stat.S_ISSOCK(os.lstat(self.path).st_mode):
+                print(f"❌ {self.path} exists and is not a socket; not replacing it")
+                return
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except ConnectionRefusedError:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            else:
+                print(f"❌ A scan daemon is already listening on {self.path}")
+                return
+            finally:
+                probe.close()
+        print("🔥 Warming up caches...")
+        self.warm_up()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # The socket file is created 0600, never briefly open to the default umask
+        umask = os.umask(0o177)
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(umask)
+        if gid is not None:
+            # Members of the group may submit jobs without sudo
+            os.chown(self.path, -1, gid)
+            os.chmod(self.path, 0o660)
+        server.listen(64)
+        for worker in self.workers:
+            worker.start()
+        print(f"🛰️  Scan daemon listening on {self.path}. Press Ctrl+C to stop.")
+        try:
+            while True:
+                connection, _ = server.accept()
+                threading.Thread(target=self.handle, args=(connection,), name='daemon-client', daemon=True).start()
+        finally:
+            server.close()
+            os.remove(self.path)
+
+
+def submit_job(targets, profile='regular', ports=None, path=DAEMON_SOCKET):
+    """Send a job to a running daemon and yield its events (dicts) as they stream back"""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        client.close()
+        print(f"❌ The scan daemon is not running (nothing listening on {path}); start it with --daemon")
+        return
+    except PermissionError:
+        client.close()
+        print(f"❌ No permission to use {path}: submit as the daemon's user (sudo), "
+              f"or start the daemon with --socket-group")
+        return
+    with client, client.makefile('rb') as reader:
+        request = {'op': 'status'} if targets is None else {'targets': targets, 'profile': profile, 'ports': ports}
+        client.sendall((json.dumps(request) + '\n').encode())
+        for line in reader:
+            yield json.loads(line)
+
+
+def load_results(path):
+    """Device records from saved results: a JSON list (save_results) or NDJSON (--ndjson)"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        views = json.loads(text)
+    else:
+        views = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [DeviceRecord.from_view(view) for view in views]
+
+
+def rescore_results(path, ndjson=None):
+    """--rescore: re-run the risk rules over saved results (JSON or NDJSON) without scanning"""
+    devices = load_results(path)
+    engine = get_risk_engine()
+    start = time.perf_counter()
+    counts = engine.analyse_devices(devices)
+    elapsed = time.perf_counter() - start
+
+    from prettytable import PrettyTable
     table = PrettyTable()
-    table.field_names = ['IP', 'MAC', 'Hostname', 'Vendor', 'Ports', 'OS', 'AI Security Analysis']
-    table.max_width = 150
+    table.field_names = ['Rule', 'Severity', 'Devices']
     table.align = 'l'
-    
-    for d in devices:
-        table.add_row([
-            d['ip'],
-            d['mac'],
-            d['hostname'][:20],
-            d['vendor'][:25],
-            d['ports'][:30],
-            d['os'][:15],
-            d['ai'][:60]
-        ])
-    
-    print("\n" + "="*150)
-    print("📡 SCAN RESULTS")
-    print("="*150)
+    for rule in engine.rules:
+        table.add_row([rule['name'], rule.get('severity', 'low'), counts[rule['name']]])
     print(table)
-    print("\n" + "="*150)
-    print(f"🟢 Total Devices: {len(devices)}")
-    print(f"⏱️  Scan Time: {round(scan_time, 2)} seconds")
-    print(f"⚡ Speed: {round(len(devices)/scan_time, 2)} devices/sec")
-    
-    critical = sum(1 for d in devices if '🔴 Critical' in d['ai'])
-    high = sum(1 for d in devices if '🟠 High' in d['ai'])
-    
+    print(f"🧮 Rescored {len(devices)} device(s) in {elapsed:.3f}s")
+    critical = sum(1 for d in devices if '🔴 Critical' in d.ai)
+    high = sum(1 for d in devices if '🟠 High' in d.ai)
     if critical > 0:
         print(f"🔴 CRITICAL RISKS: {critical} device(s)")
     if high > 0:
         print(f"🟠 HIGH RISKS: {high} device(s)")
-    
-    print("="*150 + "\n")
+    if ndjson:
+        with NdjsonWriter(ndjson) as writer:
+            for device in devices:
+                writer.write(device.view())
+
+
+def run_query(path, where=(), group_by=None, top=10):
+    """--query: filter saved results with --where KEY=VALUE conditions, then group or list them"""
+    conditions = {'ports': []}
+    for condition in where:
+        key, _, value = condition.partition('=')
+        if key == 'port':
+            conditions['ports'].append(int(value))
+        elif key in ('network', 'risk') or key in ResultStore.TEXT_COLUMNS:
+            conditions[key] = value
+        else:
+            print(f"❌ Unknown --where key {key!r}: use port, network, risk or "
+                  f"{', '.join(ResultStore.TEXT_COLUMNS)}")
+            return
+    store = ResultStore.from_devices(load_results(path))
+    start = time.perf_counter()
+    rows = store.select(**conditions)
+    groups = store.group_count(group_by, rows, top) if group_by else None
+    elapsed = time.perf_counter() - start
+
+    from prettytable import PrettyTable
+    table = PrettyTable()
+    table.align = 'l'
+    if groups is not None:
+        table.field_names = [group_by.capitalize(), 'Hosts']
+        for value, hosts in groups:
+            table.add_row([value, hosts])
+    else:
+        table.field_names = ['IP', 'MAC', 'Hostname', 'Vendor', 'Ports', 'OS', 'Risk']
+        for d in store.views(rows[:top]):
+            table.add_row([d['ip'], d['mac'], d['hostname'][:20], d['vendor'][:25], d['ports'][:30], d['os'],
+                           d['ai'].split(' | ', 1)[0]])
+    print(table)
+    print(f"🔎 {len(rows)} of {len(store)} host(s) match ({elapsed * 1000:.2f} ms)")
 
 
-def save_results(devices, filename="scan_results.json"):
-    """Save scan results to JSON file"""
+def run_submit(targets, profile='regular', ports=None, ndjson=None, path=DAEMON_SOCKET):
+    """--submit: print a daemon job's devices as they arrive"""
+    live = LiveDisplay(keep=False)
+    writer = NdjsonWriter(ndjson) if ndjson else None
+    answered = False
     try:
-        import json
-        with open(filename, 'w') as f:
-            json.dump(devices, f, indent=4)
-        print(f"💾 Results saved to {filename}")
-    except Exception as e:
-        print(f"❌ Error saving results: {e}")
+        for event in submit_job(targets, profile, ports, path):
+            answered = True
+            if event['event'] == 'queued':
+                print(f"📥 Job {event['job']} {'joined (already covered)' if event['deduplicated'] else 'queued'}")
+            elif event['event'] == 'device':
+                live.add(event)
+                if writer:
+                    writer.write({key: value for key, value in event.items() if key not in ('event', 'job')})
+            elif event['event'] == 'error':
+                print(f"❌ Daemon error: {event['error']}")
+    finally:
+        if writer:
+            writer.close()
+    if answered:
+        live.finish()
+
+
+def benchmark_vendor_lookup(count=2000):
+    """Microbenchmark: legacy per-call vendor lookup vs the load-once OUI index"""
+    prefixes = list(OUI_DATABASE)
+    macs = []
+    for i in range(count):
+        if i % 4 == 0:
+            # Unregistered locally-administered address: worst case for both paths
+            macs.append('02:' + ':'.join(f'{random.randint(0, 255):02X}' for _ in range(5)))
+        else:
+            prefix = random.choice(prefixes).replace('-', ':')
+            macs.append(prefix + ':' + ':'.join(f'{random.randint(0, 255):02X}' for _ in range(3)))
+
+    from mac_vendor_lookup import MacLookup, BaseMacLookup
+    have_vendor_list = BaseMacLookup().find_vendors_list() is not None
+    oui_txt = os.path.join(IEEE_DATA_DIR, 'oui.txt')
+
+    def legacy_lookup(mac):
+        # Offline part of the old get_mac_vendor: reload everything on every call
+        if have_vendor_list:
+            try:
+                lookup = MacLookup()
+                lookup.load_vendors()
+                return lookup.lookup(mac)
+            except KeyError:
+                pass
+        mac_prefix = mac[:8].upper().replace(':', '-')
+        for prefix, vendor in dict(OUI_DATABASE).items():
+            if mac_prefix.startswith(prefix):
+                return vendor
+        if os.path.exists(oui_txt):
+            with open(oui_txt, 'r') as f:
+                content = f.read()
+                if mac_prefix in content:
+                    lines = content.split('\n')
+                    for i, line in enumerate(lines):
+                        if mac_prefix in line and i + 2 < len(lines):
+                            return lines[i + 2].strip()
+        return 'Unknown'
+
+    legacy_sample = macs[:max(1, count // 20)]
+    start = time.perf_counter()
+    for mac in legacy_sample:
+        legacy_lookup(mac)
+    legacy_rate = len(legacy_sample) / (time.perf_counter() - start)
+
+    def rss_mb():
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * mmap.PAGESIZE / 1048576
+        except OSError:
+            return 0.0
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    index = build_vendor_index()
+    build_time = time.perf_counter() - start
+    rss_index = rss_mb() - rss_before
+    entries = sum(len(table) for table in index.values())
+
+    def index_lookup(value):
+        for bits in (36, 28, 24):
+            vendor = index[bits].get(value >> (48 - bits))
+            if vendor:
+                return vendor
+
+    values = [mac_to_int(mac) for mac in macs]
+    start = time.perf_counter()
+    for value in values:
+        index_lookup(value)
+    index_rate = len(values) / (time.perf_counter() - start)
+
+    snapshot_path = os.path.join(SCANNER_CACHE_DIR, 'vendors.bench.bin')
+    compile_vendor_snapshot(index, snapshot_path)
+    # Release the dict index (index_lookup shares this name) before measuring the snapshot's memory
+    index = None
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    snapshot = VendorSnapshot(snapshot_path)
+    open_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for value in values:
+        snapshot.lookup(value)
+    snapshot_rate = len(values) / (time.perf_counter() - start)
+    rss_snapshot = rss_mb() - rss_before
+    snapshot.close()
+    os.remove(snapshot_path)
+
+    print("📊 Vendor lookup benchmark")
+    print(f"   Legacy per-call lookup: {legacy_rate:,.0f} lookups/sec ({len(legacy_sample)} samples)")
+    print(f"   Index build (once):     {build_time * 1000:.1f} ms, +{rss_index:.1f} MB RSS, {entries:,} prefixes")
+    print(f"   Indexed lookup:         {index_rate:,.0f} lookups/sec ({len(values)} samples)")
+    print(f"   Snapshot open (mmap):   {open_time * 1000:.2f} ms, +{rss_snapshot:.1f} MB RSS after lookups")
+    print(f"   Snapshot lookup:        {snapshot_rate:,.0f} lookups/sec ({len(values)} samples)")
+    print(f"   Speedup vs legacy:      {index_rate / legacy_rate:,.0f}x index, {snapshot_rate / legacy_rate:,.0f}x snapshot")
+
+
+def benchmark_port_scan(hosts=4, ports=1024, listeners=16, filtered_ports=256):
+    """Benchmark: legacy thread-pool connect scan vs the selector engine, on loopback and on silent hosts
+
+    Loopback refuses closed ports at once, so both scanners are CPU bound
+    there. Hosts that drop SYNs (firewalled ports, the common case off the
+    local machine) are where the shared in-flight budget pays: the thread
+    pool holds one thread per unanswered probe for the whole timeout.
+    """
+    base = 20000
+    targets = [f'127.0.0.{i + 1}' for i in range(hosts)]
+    port_range = list(range(base, base + ports))
+    expected = sorted(random.sample(port_range, listeners))
+    servers = []
+    for ip in targets:
+        for port in expected:
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                server.bind((ip, port))
+            except OSError as e:
+                print(f"❌ Cannot listen on {ip}:{port}: {e}")
+                return
+            server.listen(128)
+            servers.append(server)
+
+    def legacy_scan(ip, port_list):
+        # The previous scan_ports_aggressive: a fresh 50-thread pool per host
+        open_ports = []
+
+        def check_port(port):
+            try:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.settimeout(0.2)
+                result = sock.connect_ex((ip, port))
+                sock.close()
+                if result == 0:
+                    return port
+            except OSError:
+                pass
+            return None
+
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            for result in executor.map(check_port, port_list):
+                if result:
+                    open_ports.append(result)
+        return sorted(open_ports)
+
+    def engine_scan(ip, port_list):
+        results = scan_ports(ip, port_list, timeout=0.2)
+        return sorted(port for port, state in results.items() if state == 'open')
+
+    def compare(label, ips, port_list, wanted):
+        print(f"📊 Port scan benchmark: {label}")
+        for name, scanner in (('Thread pool (legacy)', legacy_scan), ('Selector engine', engine_scan)):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                found = list(executor.map(lambda ip: scanner(ip, port_list), ips))
+            elapsed = time.perf_counter() - start
+            verdict = ('all listeners found' if wanted else 'nothing reported open') \
+                if all(result == wanted for result in found) else 'MISMATCH'
+            print(f"   {name:<22} {len(ips) * len(port_list) / elapsed:>10,.0f} ports/sec "
+                  f"({round(elapsed, 3)}s, {verdict})")
+
+    try:
+        compare(f"{hosts} loopback hosts x {ports} ports, {listeners} listeners each", targets, port_range, expected)
+    finally:
+        for server in servers:
+            server.close()
+
+    if os.geteuid() != 0:
+        print("   (run as root to add the silent-host comparison)")
+        return
+    with BenchNamespace('akprt', '10.232.0.1', '10.232.0.2') as namespace:
+        # Permanent neighbour entries for a MAC nobody has: SYNs leave the host and are never answered
+        silent = [f'10.232.0.{i + 10}' for i in range(hosts)]
+        for ip in silent:
+            namespace.run('ip', 'neigh', 'replace', ip, 'lladdr', '02:00:00:00:00:99', 'dev', 'akprt-h',
+                          'nud', 'permanent', namespace=False)
+        compare(f"{hosts} silent hosts x {filtered_ports} ports, 0.2s timeout", silent,
+                port_range[:filtered_ports], [])
+
+
+def benchmark_pipeline(hosts=60, slow_every=6):
+    """Benchmark: one-job-per-host thread pool vs the staged pipeline on synthetic hosts"""
+    # Every host is cheap except one in slow_every, whose service probe stalls
+    costs = {'vendor': 0.001, 'hostname': 0.05, 'ports': 0.02, 'os': 0.02, 'services': 0.05, 'analysis': 0.0005}
+    slow_services = 1.5
+
+    def stage_cost(name, device):
+        if name == 'services' and (device.ip & 255) % slow_every == 0:
+            return slow_services
+        return costs[name]
+
+    def make_stage(name):
+        return lambda device: time.sleep(stage_cost(name, device))
+
+    devices = [DeviceRecord(f'10.0.0.{i + 1}', '02:00:00:00:00:01') for i in range(hosts)]
+    profile = SCAN_PROFILES['regular']
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        list(executor.map(lambda d: [time.sleep(stage_cost(name, d)) for name in costs], devices))
+    legacy = time.perf_counter() - start
+
+    stages = [(name, make_stage(name), workers) for name, workers in profile['stages'].items()]
+    start = time.perf_counter()
+    finished = list(ScanPipeline(stages, profile['queue_size']).run(DeviceRecord(d.ip, d.mac) for d in devices))
+    staged = time.perf_counter() - start
+
+    print(f"📊 Pipeline benchmark: {hosts} hosts, 1 in {slow_every} with a {slow_services}s service probe")
+    print(f"   Thread pool (10 workers, legacy): {round(legacy, 2)}s")
+    print(f"   Staged pipeline ('regular'):      {round(staged, 2)}s ({len(finished)} devices)")
+
+
+
+def benchmark_shards(hosts=4000, workers=None):
+    """Benchmark: CPU-bound synthetic enrichment in one process vs sharded across processes"""
+    workers = workers or SHARD_WORKERS
+    host_xml = ('<host><address addr="{ip}" addrtype="ipv4"/><ports>' +
+                ''.join(f'<port protocol="tcp" portid="{port}"><state state="open"/>'
+                        f'<service name="svc{port}" product="Product {port}" version="1.{port}"/></port>'
+                        for port in (22, 80, 139, 443, 445, 3389, 8080)) +
+                '</ports><os><osclass type="router" osfamily="Linux" osgen="4.X"/></os></host>')
+    mdns = build_dns_query(0, [('host.local', 1)], False)
+
+    def synthetic(shard):
+        # The parsing and analysis a real scan does per host, without the network
+        start, count = shard
+        for i in range(start, start + count):
+            ip = f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}'
+            mac = f'02:00:00:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}'
+            device = DeviceRecord(ip, mac)
+            xml = f'<nmaprun>{host_xml.format(ip=ip)}</nmaprun>'.encode()
+            for _ in range(20):
+                _, result = next(stream_nmap_xml([xml]))
+                parse_dns_records(mdns)
+                mac_to_int(mac)
+            device.services = ', '.join(result['services'])
+            device.ports = PortSet(int(service.split()[0][3:]) for service in result['services'])
+            device.ai = ai_analysis(ip, device.ports, result['os'])
+            yield device
+
+    chunk = max(1, hosts // (workers * SHARD_SPLIT))
+    shards = [(start, min(chunk, hosts - start)) for start in range(0, hosts, chunk)]
+
+    start = time.perf_counter()
+    single = sum(1 for shard in shards for _ in synthetic(shard))
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sharded = sum(1 for _ in run_sharded(synthetic, shards, workers))
+    sharded_time = time.perf_counter() - start
+
+    print(f"📊 Shard benchmark: {hosts} synthetic hosts, {workers} worker process(es) on {os.cpu_count()} CPU(s)")
+    print(f"   One process: {single / single_time:>8,.0f} hosts/sec")
+    print(f"   Sharded:     {sharded / sharded_time:>8,.0f} hosts/sec ({single_time / sharded_time:.2f}x, "
+          f"{'ok' if sharded == single else 'MISMATCH'})")
+
+
+def benchmark_devices(hosts=100000):
+    """Benchmark: memory per host and analysis time, string dicts vs DeviceRecord, on synthetic hosts"""
+    import tracemalloc
+    rng = random.Random(1)
+    pool = [21, 22, 23, 80, 139, 443, 445, 1443, 2222, 3306, 3389, 5900, 8080, 8443, 10022]
+    hosts_ports = [sorted(rng.sample(pool, rng.randint(0, 6))) for _ in range(hosts)]
+    rule_ports = [21, 22, 23, 80, 135, 139, 443, 445, 3306, 3389, 5432, 5900, 5985, 5986, 8080, 8443]
+
+    def build_dicts():
+        return [{'ip': f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}',
+                 'mac': f'02:00:00:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}',
+                 'hostname': 'Unknown', 'vendor': 'Unknown', 'os': 'Linux/Unix', 'ai': '',
+                 'ports': ', '.join(map(str, ports)) if ports else 'None',
+                 'device_type': 'Unknown', 'services': 'N/A', 'rtt': None}
+                for i, ports in enumerate(hosts_ports)]
+
+    def build_records():
+        devices = []
+        for i, ports in enumerate(hosts_ports):
+            device = DeviceRecord((10 << 24) + i, 0x020000000000 + i)
+            device.os = 'Linux/Unix'
+            device.ports = PortSet(ports) if ports else NO_PORTS
+            devices.append(device)
+        return devices
+
+    sizes = {}
+    for name, build in [('dict', build_dicts), ('record', build_records)]:
+        tracemalloc.start()
+        devices = build()
+        sizes[name] = tracemalloc.get_traced_memory()[0] / hosts
+        tracemalloc.stop()
+        if name == 'dict':
+            dicts = devices
+    records = devices
+
+    start = time.perf_counter()
+    for device in records:
+        device.ai = ai_analysis(None, device.ports, device.os)
+    analysis = (time.perf_counter() - start) / hosts
+
+    # The old substring tests: '80' matched '8080', '22' matched '2222'
+    start = time.perf_counter()
+    substring_hits = [[str(port) in d['ports'] for port in rule_ports] for d in dicts]
+    substring_time = (time.perf_counter() - start) / (hosts * len(rule_ports))
+    start = time.perf_counter()
+    exact_hits = [[port in d.ports for port in rule_ports] for d in records]
+    exact_time = (time.perf_counter() - start) / (hosts * len(rule_ports))
+    wrong = sum(1 for old, new in zip(substring_hits, exact_hits) if old != new)
+
+    pairs = list(zip(records, records[1:]))[:10000]
+    start = time.perf_counter()
+    for a, b in pairs:
+        a.ports | b.ports
+        a.ports - b.ports
+    set_ops = (time.perf_counter() - start) / (2 * len(pairs))
+
+    print(f"📊 Device record benchmark: {hosts:,} synthetic hosts")
+    print(f"   memory per host:  dict of strings {sizes['dict']:.0f} B, DeviceRecord {sizes['record']:.0f} B "
+          f"({sizes['dict'] / sizes['record']:.1f}x smaller, before analysis text)")
+    print(f"   ai_analysis:      {analysis * 1e6:.2f} µs/device")
+    print(f"   port membership:  substring {substring_time * 1e9:.0f} ns, PortSet {exact_time * 1e9:.0f} ns per test")
+    print(f"   substring tests gave a wrong answer on {wrong:,} host(s) ({wrong * 100 / hosts:.1f}%)")
+    print(f"   PortSet union/difference: {set_ops * 1e6:.2f} µs/op")
+
+
+def benchmark_rules(hosts=100000):
+    """Benchmark: risk rule engine over synthetic device records, per device and in bulk"""
+    rng = random.Random(2)
+    pool = [21, 22, 23, 80, 135, 139, 443, 445, 2222, 3306, 3389, 5900, 5985, 8080, 8443, 9100]
+    banners = ['N/A', 'OpenSSH 5.3p1', 'OpenSSH 9.6p1', 'nginx 1.24.0', 'Microsoft IIS httpd 10.0']
+    devices = []
+    for i in range(hosts):
+        device = DeviceRecord((10 << 24) + i, 0x020000000000 + i)
+        device.ports = PortSet(rng.sample(pool, rng.randint(0, 6)))
+        device.os = rng.choice(['Windows', 'Linux/Unix', 'Unknown'])
+        device.services = rng.choice(banners)
+        devices.append(device)
+    rules = RISK_RULES + [{'name': 'old-openssh', 'any_ports': [22, 2222], 'services': r'OpenSSH [1-6]\.',
+                           'severity': 'high', 'insight': "🔴 Outdated OpenSSH banner"}]
+
+    start = time.perf_counter()
+    engine = RiskEngine(rules)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for device in devices:
+        engine.analyse(device.ports, device.os, device.services)
+    single = time.perf_counter() - start
+
+    try:
+        import numpy
+        backend = f'NumPy {numpy.__version__}'
+    except ImportError:
+        backend = 'int bitmasks, no NumPy'
+    start = time.perf_counter()
+    engine.analyse_devices(devices)
+    bulk = time.perf_counter() - start
+
+    print(f"📊 Rule engine benchmark: {hosts:,} devices, {len(engine.rules)} rules over {len(engine.port_bits)} ports")
+    print(f"   compile:          {compile_time * 1000:.2f} ms")
+    print(f"   one at a time:    {single:.3f}s ({single / hosts * 1e6:.2f} µs/device, {len(engine.verdicts)} distinct inputs)")
+    print(f"   analyse_devices:  {bulk:.3f}s ({backend})")
+    print(f"   distinct verdicts: {len(engine.descriptions)}")
+
+
+def benchmark_store(hosts=250000):
+    """Benchmark: summary and fleet queries on a ResultStore vs loops over a list of result dicts"""
+    import tracemalloc
+    rng = random.Random(3)
+    pool = [21, 22, 23, 80, 135, 139, 443, 445, 3389, 5900, 8080, 8443, 9100]
+    vendors = [f'Vendor {i}' for i in range(40)] + ['Unknown']
+    devices = []
+    for i in range(hosts):
+        device = DeviceRecord((10 << 24) + i, 0x020000000000 + i)
+        device.ports = PortSet(rng.sample(pool, rng.randint(0, 5)))
+        device.os = rng.choice(['Windows', 'Linux/Unix', 'Unknown'])
+        device.vendor = rng.choice(vendors)
+        device.hostname = f'host-{i}'
+        devices.append(device)
+    get_risk_engine().analyse_devices(devices)
+    views = [device.view() for device in devices]
+
+    start = time.perf_counter()
+    store = ResultStore.from_devices(devices)
+    build = time.perf_counter() - start
+    tracemalloc.start()
+    measured = ResultStore.from_devices(devices)
+    size = tracemalloc.get_traced_memory()[0] / hosts
+    tracemalloc.stop()
+    del measured
+
+    start = time.perf_counter()
+    risks = store.risk_counts()
+    store.group_count('vendor', top=3)
+    store.group_count('port', top=5)
+    summary = time.perf_counter() - start
+    start = time.perf_counter()
+    rdp_by_vendor = store.group_count('vendor', store.select(ports=[3389]))
+    query = time.perf_counter() - start
+
+    # The same answers from the list of result dicts
+    start = time.perf_counter()
+    critical = sum(1 for d in views if '🔴 Critical' in d['ai'])
+    sum(1 for d in views if '🟠 High' in d['ai'])
+    collections.Counter(d['vendor'] for d in views).most_common(3)
+    collections.Counter(port for d in views if d['ports'] != 'None' for port in d['ports'].split(', ')).most_common(5)
+    legacy_summary = time.perf_counter() - start
+    start = time.perf_counter()
+    legacy_rdp = collections.Counter(d['vendor'] for d in views if '3389' in d['ports'].split(', '))
+    legacy_query = time.perf_counter() - start
+
+    numpy = optional_numpy()
+    backend = f'NumPy {numpy.__version__}' if numpy else 'array module, no NumPy'
+    same = critical == risks.get('critical', 0) and dict(rdp_by_vendor) == dict(legacy_rdp)
+    print(f"📊 Result store benchmark: {hosts:,} hosts ({backend})")
+    print(f"   build:   {build:.2f}s, {size:.0f} B/host")
+    print(f"   summary (risk counts, top vendors, top ports): {summary * 1000:.1f} ms vs {legacy_summary * 1000:.1f} ms "
+          f"looping over dicts")
+    print(f"   hosts with 3389 open, by vendor:              {query * 1000:.1f} ms vs {legacy_query * 1000:.1f} ms "
+          f"({'same answers' if same else 'MISMATCH'})")
+
+
+LISTENER_SCRIPT = """
+import socket, sys, time
+listeners = []
+for port in map(int, sys.argv[1].split(',')):
+    s = socket.socket()
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    s.bind(('0.0.0.0', port))
+    s.listen(1024)
+    listeners.append(s)
+print('ready', flush=True)
+time.sleep(3600)
+"""
+
+# Answers ARP for the namespace address from user space, after a delay and with
+# random loss, to stand in for a slow power-saving Wi-Fi client
+ARP_RESPONDER_SCRIPT = """
+import random, socket, sys, threading
+iface, loss = sys.argv[1], float(sys.argv[2]) / 100
+delays = {socket.inet_aton(ip): float(ms) / 1000 for ip, ms in (arg.split('=') for arg in sys.argv[3:])}
+s = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(0x0806))
+s.bind((iface, 0x0806))
+mac = s.getsockname()[4]
+print('ready', flush=True)
+while True:
+    frame = s.recv(2048)
+    ip = frame[38:42]
+    delay = delays.get(ip)
+    if frame[20:22] != b'\\x00\\x01' or delay is None or random.random() < loss:
+        continue
+    reply = frame[6:12] + mac + b'\\x08\\x06\\x00\\x01\\x08\\x00\\x06\\x04\\x00\\x02' + mac + ip + frame[22:32]
+    threading.Timer(delay, s.send, (reply,)).start()
+"""
+
+
+class BenchNamespace:
+    """Network namespace joined to the host by a veth pair, for local benchmark targets
+
+    Needs root and iproute2. Optional netem delay/loss needs tc.
+    """
+
+    def __init__(self, name, host_ip, ns_ip, ttl=None, delay_ms=0, loss=0):
+        self.name = name
+        self.host_ip = host_ip
+        self.ns_ip = ns_ip
+        self.ttl = ttl
+        self.delay_ms = delay_ms
+        self.loss = loss
+        self.processes = []
+
+    def run(self, *command, namespace=True):
+        prefix = ['ip', 'netns', 'exec', self.name] if namespace else []
+        subprocess.run(prefix + list(command), check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def __enter__(self):
+        self.__exit__()
+        host_if, ns_if = f'{self.name}-h', f'{self.name}-n'
+        self.run('ip', 'netns', 'add', self.name, namespace=False)
+        self.run('ip', 'link', 'add', host_if, 'type', 'veth', 'peer', 'name', ns_if, namespace=False)
+        self.run('ip', 'link', 'set', ns_if, 'netns', self.name, namespace=False)
+        self.run('ip', 'addr', 'add', f'{self.host_ip}/24', 'dev', host_if, namespace=False)
+        self.run('ip', 'link', 'set', host_if, 'up', namespace=False)
+        self.run('ip', 'addr', 'add', f'{self.ns_ip}/24', 'dev', ns_if)
+        self.run('ip', 'link', 'set', ns_if, 'up')
+        self.run('ip', 'link', 'set', 'lo', 'up')
+        if self.ttl:
+            self.run('sysctl', '-qw', f'net.ipv4.ip_default_ttl={self.ttl}')
+        if self.delay_ms or self.loss:
+            self.run('tc', 'qdisc', 'add', 'dev', ns_if, 'root', 'netem',
+                     'delay', f'{self.delay_ms}ms', 'loss', f'{self.loss}%')
+        return self
+
+    def listen(self, ports):
+        """Start TCP listeners on the given ports inside the namespace"""
+        process = subprocess.Popen(['ip', 'netns', 'exec', self.name, sys.executable, '-c', LISTENER_SCRIPT,
+                                    ','.join(str(port) for port in ports)], stdout=subprocess.PIPE)
+        process.stdout.readline()
+        self.processes.append(process)
+        return process
+
+    def slow_arp(self, delay_ms, loss=0, hosts=None):
+        """Turn off kernel ARP in the namespace and answer from a delayed, lossy user-space responder
+
+        hosts maps extra addresses to their own reply delay (ms); they answer
+        ARP without being configured in the namespace.
+        """
+        ns_if = f'{self.name}-n'
+        self.run('ip', 'link', 'set', ns_if, 'arp', 'off')
+        delays = dict(hosts or {}, **{self.ns_ip: delay_ms})
+        process = subprocess.Popen(['ip', 'netns', 'exec', self.name, sys.executable, '-c', ARP_RESPONDER_SCRIPT,
+                                    ns_if, str(loss)] + [f'{ip}={ms}' for ip, ms in delays.items()],
+                                   stdout=subprocess.PIPE)
+        process.stdout.readline()
+        self.processes.append(process)
+        return process
+
+    def __exit__(self, *exc):
+        for process in self.processes:
+            process.kill()
+            process.wait()
+        self.processes = []
+        subprocess.run(['ip', 'link', 'del', f'{self.name}-h'], stderr=subprocess.DEVNULL)
+        subprocess.run(['ip', 'netns', 'del', self.name], stderr=subprocess.DEVNULL)
+
+
+def benchmark_syn_scan(ports=10000, listeners=50, rate=SYN_SCAN_RATE):
+    """Benchmark: SYN scan vs connect scan against listeners in a veth/netns target"""
+    if os.geteuid() != 0:
+        print("❌ The SYN benchmark needs root (raw sockets and network namespaces)")
+        return
+    port_range = list(range(1, ports + 1))
+    expected = set(random.sample(port_range, listeners))
+    with BenchNamespace('aksyn', '10.201.0.1', '10.201.0.2') as namespace:
+        namespace.listen(sorted(expected))
+        target = namespace.ns_ip
+
+        start = time.perf_counter()
+        connect = scan_ports(target, port_range, timeout=0.5)
+        connect_time = time.perf_counter() - start
+        connect_open = {port for port, state in connect.items() if state == 'open'}
+
+        engine = SynScanEngine(rate=rate)
+        syn = engine.watch(target, port_range)
+        start = time.perf_counter()
+        engine.transmit(target, port_range)
+        transmit_time = time.perf_counter() - start
+        time.sleep(1.0)
+        engine.unwatch(target, syn)
+        syn_open = {port for port, state in syn.items() if state == 'open'}
+        answered = sum(1 for state in syn.values() if state != 'filtered')
+
+    print(f"📊 SYN scan benchmark: {ports} ports on a veth/netns target, {listeners} listeners")
+    print(f"   Connect scan: {ports / connect_time:>10,.0f} ports/sec, "
+          f"miss rate {len(expected - connect_open) / listeners:.1%}")
+    print(f"   SYN scan:     {ports / transmit_time:>10,.0f} packets/sec sent (limit {rate:,}), "
+          f"miss rate {len(expected - syn_open) / listeners:.1%}, "
+          f"{answered / ports:.1%} probes answered")
+    print(f"   SYN vs connect open ports differ on {len(connect_open ^ syn_open)} port(s)")
+
+
+def benchmark_arp_sweep(prefix=16, rate=20000, hosts=64):
+    """Benchmark: ARP discovery on veth/netns segments
+
+    A /16 for throughput and memory, then /24 discovery time against the old
+    srp(timeout=3, retry=2) on a fast segment, a slow lossy one, and a mixed
+    one where fast hosts answer at once and several slow ones take 0.5-2 s
+    (Wi-Fi clients waking up), which adaptive windows must not cut off.
+    """
+    from scapy.layers.l2 import ARP, Ether
+    from scapy.sendrecv import srp
+    if os.geteuid() != 0:
+        print("❌ The ARP benchmark needs root (raw sockets and network namespaces)")
+        return
+    network = ipaddress.ip_network(f'10.230.0.0/{prefix}')
+    expected = {str(network.network_address + random.randrange(2, network.num_addresses - 1)) for _ in range(hosts)}
+    segments = [
+        ('fast', BenchNamespace('akarp', '10.230.0.1', '10.230.0.2')),
+        ('slow (300 ms, 20% loss)', BenchNamespace('akarpslow', '10.231.0.1', '10.231.0.2')),
+        ('mixed (20 fast, 6 at 0.5-2 s)', BenchNamespace('akarpmix', '10.233.0.1', '10.233.0.2')),
+    ]
+    mixed = {f'10.233.0.{10 + i}': 1 for i in range(20)}
+    mixed.update({f'10.233.0.{40 + i}': delay for i, delay in enumerate((500, 800, 1100, 1400, 1700, 2000))})
+    results = []
+    try:
+        for _, namespace in segments:
+            namespace.__enter__()
+        segments[1][1].slow_arp(300, 20)
+        segments[2][1].slow_arp(1, hosts=mixed)
+        for ip in expected:
+            segments[0][1].run('ip', 'addr', 'add', f'{ip}/32', 'dev', 'akarp-n')
+        expected.add(segments[0][1].ns_ip)
+
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        sweeper = ArpSweeper(str(network), iface='akarp-h', rate=rate)
+        start = time.perf_counter()
+        first = None
+        found = set()
+        for batch in sweeper.sweep():
+            first = first or time.perf_counter() - start
+            found.update(ip for ip, _ in batch)
+        memory = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - usage) / 1024
+
+        for label, namespace in segments:
+            iface = f'{namespace.name}-h'
+            subnet = str(ipaddress.ip_network(f'{namespace.host_ip}/24', strict=False))
+            live = {ip for ip in expected | set(mixed) | {namespace.ns_ip}
+                    if ipaddress.ip_address(ip) in ipaddress.ip_network(subnet)}
+            start = time.perf_counter()
+            answered, _ = srp(Ether(dst='ff:ff:ff:ff:ff:ff') / ARP(pdst=subnet), iface=iface,
+                              timeout=3, retry=2, verbose=0)
+            srp_time = time.perf_counter() - start
+            srp_found = {received.psrc for _, received in answered}
+            subnet_sweeper = ArpSweeper(subnet, iface=iface)
+            start = time.perf_counter()
+            sweep_found = {ip for batch in subnet_sweeper.sweep() for ip, _ in batch}
+            sweep_time = time.perf_counter() - start
+            results.append((label, live, srp_time, srp_found, sweep_time, sweep_found, subnet_sweeper.passes))
+    finally:
+        for _, namespace in segments:
+            namespace.__exit__()
+
+    print("📊 ARP benchmark")
+    print(f"   {network} ({network.num_addresses} addresses): "
+          f"{sweeper.sent / sweeper.elapsed:,.0f} requests/sec (limit {rate:,}), peak memory +{memory:.1f} MB, "
+          f"first host after {round((first or 0) * 1000)} ms, found {len(found & expected)}/{len(expected)} "
+          f"in {sweeper.passes} pass(es)")
+    for label, live, srp_time, srp_found, sweep_time, sweep_found, passes in results:
+        print(f"   /24 {label}: srp {srp_time:.2f}s found {len(srp_found & live)}/{len(live)} | "
+              f"adaptive {sweep_time:.2f}s found {len(sweep_found & live)}/{len(live)} in {passes} pass(es)")
+
+
+def benchmark_icmp_sweep():
+    """Benchmark: per-host ping processes vs one ICMP sweep over veth peers with different TTLs"""
+    if os.geteuid() != 0:
+        print("❌ The ICMP benchmark needs root (raw sockets and network namespaces)")
+        return
+    peers = [('akttl64', 64, 'Linux/Unix'), ('akttl128', 128, 'Windows'), ('akttl255', 255, 'Router/Network Device')]
+    namespaces = [BenchNamespace(name, f'10.{210 + i}.0.1', f'10.{210 + i}.0.2', ttl=ttl)
+                  for i, (name, ttl, _) in enumerate(peers)]
+    try:
+        for namespace in namespaces:
+            namespace.__enter__()
+        ips = [namespace.ns_ip for namespace in namespaces]
+
+        ping_time = None
+        if shutil.which('ping'):
+            start = time.perf_counter()
+            for ip in ips:
+                subprocess.run(['ping', '-c', '1', '-W', '1', ip], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            ping_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        replies = icmp_sweep(ips)
+        sweep_time = time.perf_counter() - start
+    finally:
+        for namespace in namespaces:
+            namespace.__exit__()
+
+    print(f"📊 ICMP benchmark: {len(ips)} veth peers")
+    if ping_time is not None:
+        print(f"   ping per host: {round(ping_time * 1000, 1)} ms total")
+    else:
+        print("   ping per host: skipped (ping not installed)")
+    print(f"   ICMP sweep:    {round(sweep_time * 1000, 1)} ms total")
+    for ip, (name, ttl, expected) in zip(ips, peers):
+        reply = replies.get(ip)
+        guessed = TTL_OS.get(reply['ttl'], 'Unknown') if reply else 'no reply'
+        print(f"   {ip}: ttl={reply and reply['ttl']} rtt={reply and reply['rtt']}ms -> {guessed} "
+              f"({'ok' if guessed == expected else 'expected ' + expected})")
+
+
+
+def benchmark_passive(frames=50000):
+    """Benchmark: replay a synthetic capture through the passive parser at full speed"""
+    from scapy.layers.dhcp import BOOTP, DHCP
+    from scapy.layers.dns import DNS, DNSRR
+    from scapy.layers.inet import IP, UDP
+    from scapy.layers.l2 import ARP, Ether
+    from scapy.packet import Raw
+    from scapy.utils import mac2str, wrpcap
+    hosts = 500
+    packets = []
+    for i in range(hosts):
+        mac = f'02:00:00:00:{i >> 8:02x}:{i & 0xff:02x}'
+        ip = f'10.9.{i >> 8}.{i & 0xff}'
+        packets.append(Ether(src=mac, dst='ff:ff:ff:ff:ff:ff') / ARP(op=1, hwsrc=mac, psrc=ip, pdst='10.9.0.1'))
+        packets.append(Ether(src=mac, dst='ff:ff:ff:ff:ff:ff') / IP(src='0.0.0.0', dst='255.255.255.255') /
+                       UDP(sport=68, dport=67) / BOOTP(chaddr=mac2str(mac)) /
+                       DHCP(options=[('message-type', 'request'), ('requested_addr', ip),
+                                     ('hostname', f'host-{i}'), 'end']))
+        packets.append(Ether(src=mac) / IP(src=ip, dst='224.0.0.251') / UDP(sport=5353, dport=5353) /
+                       DNS(qr=1, aa=1, an=DNSRR(rrname=f'host-{i}.local', type='A', rdata=ip)))
+        packets.append(Ether(src=mac) / IP(src=ip, dst='239.255.255.250') / UDP(sport=1900, dport=1900) /
+                       Raw(b'NOTIFY * HTTP/1.1\r\nSERVER: Linux/5.10 UPnP/1.0 Bench/1.0\r\n\r\n'))
+    path = os.path.join(SCANNER_CACHE_DIR, 'passive-bench.pcap')
+    os.makedirs(SCANNER_CACHE_DIR, exist_ok=True)
+    wrpcap(path, (packets * (frames // len(packets) + 1))[:frames])
+    try:
+        watcher = PassiveMonitor(verbose=False)
+        rate = watcher.replay(path)
+    finally:
+        os.remove(path)
+
+    named = sum(1 for d in watcher.devices.values() if d['hostname'] != 'Unknown')
+    print(f"📊 Passive benchmark: {frames} frames, {hosts} hosts")
+    print(f"   replay: {round(rate)} packets/sec")
+    print(f"   devices: {len(watcher.devices)} ({named} named) "
+          f"({'ok' if len(watcher.devices) == hosts == named else 'MISMATCH'})")
+
+
+def benchmark_daemon(jobs=200):
+    """Benchmark: job round trip to a warm daemon vs a cold start of the scanner"""
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(prefix='ak-daemon-'), 'daemon.sock')
+    daemon = ScanDaemon(path)
+    threading.Thread(target=daemon.serve, daemon=True).start()
+    while not os.path.exists(path):
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    for _ in range(jobs):
+        list(submit_job(None, path=path))
+    status_time = (time.perf_counter() - start) / jobs
+
+    # Identical jobs submitted together are scanned once
+    events = []
+    start = time.perf_counter()
+    clients = [threading.Thread(target=lambda: events.append(next(submit_job('127.0.0.1/32', path=path))))
+               for _ in range(5)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    ack_time = time.perf_counter() - start
+    deduplicated = sum(1 for event in events if event['deduplicated'])
+
+    client_script = ('import json, socket; s = socket.socket(socket.AF_UNIX); s.connect(%r); '
+                     's.sendall(b\'{"op": "status"}\\n\'); s.makefile().readline()' % path)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', client_script], check=True)
+    client_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.abspath(__file__), '--help'], stdout=subprocess.DEVNULL, check=True)
+    cold_time = time.perf_counter() - start
+
+    print("📊 Daemon benchmark")
+    print(f"   status round trip (warm daemon): {status_time * 1000:.2f} ms")
+    print(f"   5 identical jobs acknowledged in {ack_time * 1000:.1f} ms, {deduplicated} deduplicated")
+    print(f"   fresh minimal client process:    {client_time * 1000:.1f} ms")
+    print(f"   cold start of the scanner:       {cold_time * 1000:.1f} ms")
+
+
+def import_profile(prelude=''):
+    """-X importtime of a fresh interpreter running prelude + import of the scanner
+
+    Returns (total µs of everything imported after interpreter startup,
+    {module: (self µs, cumulative µs)}).
+    """
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', prelude + 'import AK_Network_Scanner'],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+                            check=True).stderr
+    modules = {}
+    total = 0
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(own), int(cumulative))
+        # Top-level imports completed after site are the command's own
+        if 'site' in modules and name.strip() != 'site' and not name.startswith('  '):
+            total += int(cumulative)
+    return total, modules
+
+
+def first_packet_time(command, namespace, target):
+    """Seconds from launching a regular scan from the menu to its first ARP request on the wire"""
+    # Outgoing frames are only copied to ETH_P_ALL sockets
+    capture = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(0x0003))
+    capture.bind((f'{namespace.name}-h', 0x0003))
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__)))
+    process.stdin.write(f'1\n{target}\n'.encode())
+    process.stdin.flush()
+    try:
+        while True:
+            if not select.select([capture], [], [], 30)[0]:
+                return None
+            frame, address = capture.recvfrom(65535)
+            # Outgoing ARP request
+            if address[2] == socket.PACKET_OUTGOING and frame[12:14] == b'\x08\x06' and frame[20:22] == b'\x00\x01':
+                return time.perf_counter() - start
+    finally:
+        process.kill()
+        process.wait()
+        capture.close()
+
+
+def benchmark_startup(runs=5, budget_ms=STARTUP_IMPORT_BUDGET_MS):
+    """Benchmark: import time of the scanner (-X importtime) against the stored budget, and
+    time to the first ARP packet of a regular scan with lazy vs eager imports
+
+    Exits with status 1 when the import is over budget or a lazy library is
+    loaded at startup, so it can guard a CI job or a cron wrapper.
+    """
+    samples = []
+    for _ in range(runs):
+        total, modules = import_profile()
+        samples.append(total)
+    import_ms = sorted(samples)[len(samples) // 2] / 1000
+    eager_ms = import_profile('import scapy.all, requests, mac_vendor_lookup, prettytable; ')[0] / 1000
+    loaded = sorted(name for name in modules if name.split('.')[0] in STARTUP_LAZY_MODULES)
+    heaviest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:8]
+
+    print(f"📊 Startup benchmark ({runs} run(s), median)")
+    print(f"   import AK_Network_Scanner: {import_ms:.1f} ms (budget {budget_ms} ms)")
+    print(f"   with eager scapy/requests/mac_vendor_lookup/prettytable: {eager_ms:.1f} ms")
+    print("   heaviest imports (self time):")
+    for name, (own, _) in heaviest:
+        print(f"      {own / 1000:8.2f} ms  {name}")
+
+    if os.geteuid() == 0:
+        script = os.path.abspath(__file__)
+        eager = ('import scapy.all, requests, mac_vendor_lookup, prettytable, runpy, sys; '
+                 f'sys.argv = [{script!r}]; runpy.run_path({script!r}, run_name="__main__")')
+        with BenchNamespace('akstart', '10.236.0.1', '10.236.0.2') as namespace:
+            for label, command in [('lazy', [sys.executable, script]), ('eager', [sys.executable, '-c', eager])]:
+                times = [first_packet_time(command, namespace, '10.236.0.0/24') for _ in range(runs)]
+                times = sorted(t for t in times if t is not None)
+                if times:
+                    print(f"   time to first ARP packet, {label}: {times[len(times) // 2] * 1000:.1f} ms")
+    else:
+        print("   (time to first packet needs root - skipped)")
+
+    failures = []
+    if import_ms > budget_ms:
+        failures.append(f"import takes {import_ms:.1f} ms, budget is {budget_ms} ms")
+    if loaded:
+        failures.append("loaded at startup: " + ', '.join(loaded))
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Startup within budget")
+
+# Stand-in network services for the e2e benchmark, run inside the namespace:
+# TCP listeners, plus NetBIOS node status and SNMP answers on every address
+E2E_TARGET_SCRIPT = r"""
+import select, socket, struct, sys
+addresses, ports = sys.argv[1].split(','), [int(p) for p in sys.argv[2].split(',')]
+listeners = []
+for port in ports:
+    s = socket.socket()
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    s.bind(('0.0.0.0', port))
+    s.listen(1024)
+    listeners.append(s)
+udp = {}
+for address in addresses:
+    for port in (137, 161):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.bind((address, port))
+        udp[s] = (address, port)
+SYSNAME, SYSDESCR = bytes.fromhex('2b06010201010500'), bytes.fromhex('2b06010201010100')
+
+def tlv(tag, value):
+    return bytes([tag]) + (bytes([len(value)]) if len(value) < 128 else bytes([0x81, len(value)])) + value
+
+def read(data, offset):
+    tag, length = data[offset], data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[offset:offset + size], 'big')
+        offset += size
+    return tag, data[offset:offset + length], offset + length
+
+def nbstat(query, name):
+    rdata = bytes([1]) + name.upper().ljust(15).encode()[:15] + b'\x00\x04\x00' + bytes(46)
+    return (query[:2] + b'\x84\x00\x00\x00\x00\x01\x00\x00\x00\x00' + query[12:46] +
+            struct.pack('!HHIH', 0x21, 1, 0, len(rdata)) + rdata)
+
+def snmp(request, name):
+    _, message, _ = read(request, 0)
+    _, version, offset = read(message, 0)
+    _, community, offset = read(message, offset)
+    if community != b'public':
+        return None
+    _, pdu, _ = read(message, offset)
+    _, request_id, offset = read(pdu, 0)
+    offset = read(pdu, read(pdu, offset)[2])[2]
+    _, varbinds, _ = read(pdu, offset)
+    answers, offset = b'', 0
+    while offset < len(varbinds):
+        _, varbind, offset = read(varbinds, offset)
+        _, oid, _ = read(varbind, 0)
+        value = {SYSNAME: tlv(4, name.encode()), SYSDESCR: tlv(4, b'Linux e2e-target 5.15.0 x86_64')}.get(oid, b'\x80\x00')
+        answers += tlv(0x30, tlv(6, oid) + value)
+    pdu = tlv(0xA2, tlv(2, request_id) + b'\x02\x01\x00\x02\x01\x00' + tlv(0x30, answers))
+    return tlv(0x30, tlv(2, version) + tlv(4, community) + pdu)
+
+print('ready', flush=True)
+while True:
+    for s in select.select(list(udp), [], [])[0]:
+        data, peer = s.recvfrom(2048)
+        address, port = udp[s]
+        name = 'e2e-' + address.rsplit('.', 1)[1]
+        try:
+            reply = nbstat(data, name) if port == 137 else snmp(data, name)
+        except (IndexError, struct.error):
+            continue
+        if reply:
+            s.sendto(reply, peer)
+"""
+
+# Stub binaries put first on PATH by the e2e benchmark ({python} is replaced)
+E2E_STUBS = {
+    'nmap': r"""#!{python}
+import os, re, sys, time
+delay = float(os.environ.get('AK_STUB_DELAY', '0.05'))
+ips = [arg for arg in sys.argv[1:] if re.fullmatch(r'\d+\.\d+\.\d+\.\d+', arg)]
+services = [(22, 'ssh', 'OpenSSH', '8.9p1'), (80, 'http', 'lighttpd', '1.4.59'), (8080, 'http-proxy', 'router admin', '')]
+if '-oX' in sys.argv:
+    print('<?xml version="1.0"?><nmaprun scanner="nmap">', flush=True)
+    for ip in ips:
+        time.sleep(delay)
+        ports = ''.join(f'<port protocol="tcp" portid="{port}"><state state="open"/>'
+                        f'<service name="{name}" product="{product}" version="{version}"/></port>'
+                        for port, name, product, version in services)
+        os_xml = '<os><osclass type="general purpose" osfamily="Linux" osgen="5.X"/></os>' if '-O' in sys.argv else ''
+        print(f'<host><address addr="{ip}" addrtype="ipv4"/><ports>{ports}</ports>{os_xml}</host>', flush=True)
+    print('</nmaprun>')
+else:
+    time.sleep(delay)
+    for port, name, product, version in services:
+        print(f'{port}/tcp open  {name} {product} {version}')
+    if '-O' in sys.argv:
+        print('Running: Linux 5.X')
+""",
+    'smbclient': r"""#!{python}
+import sys, time
+time.sleep(0.05)
+print('Domain=[WORKGROUP] OS=[Unix] Server=E2E-SMB-' + sys.argv[2].rsplit('.', 1)[1])
+""",
+    'ieee-oui': r"""#!{python}
+print('E2E OUI Vendor')
+""",
+}
+
+
+def percentiles(samples):
+    """p50/p95/p99 (milliseconds) and count for a list of durations in seconds"""
+    samples = sorted(samples)
+    if not samples:
+        return {'count': 0}
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+    return {'count': len(samples), 'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99)}
+
+
+def benchmark_e2e(hosts=16, delay_ms=0, loss=0, nmap_delay=0.05, vendor_delay=0.02):
+    """Benchmark: scan(), port scans, hostname and vendor lookups against local stand-in targets
+
+    One network namespace holds `hosts` addresses with TCP listeners and
+    NetBIOS/SNMP responders; nmap, smbclient and ieee-oui are stub scripts
+    and the vendor APIs a local HTTP fake. Results go to a JSON file in
+    BENCHMARK_RESULTS_DIR and are compared with the previous run.
+    """
+    global stage_timings, cache_enabled, VENDOR_API_URLS
+    if os.geteuid() != 0:
+        print("❌ The e2e benchmark needs root (raw sockets and network namespaces)")
+        return
+    import http.server
+    import tempfile
+
+    class FakeVendorAPI(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(vendor_delay)
+            kind, mac = self.path.strip('/').split('/', 1)
+            body = 'E2E Vendor Inc' if kind == 'text' else json.dumps({'found': True, 'company': 'E2E Vendor Inc'})
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FakeVendorAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub_dir = tempfile.mkdtemp(prefix='ak-e2e-')
+    for name, script in E2E_STUBS.items():
+        path = os.path.join(stub_dir, name)
+        with open(path, 'w') as f:
+            f.write(script.replace('{python}', sys.executable, 1))
+        os.chmod(path, 0o755)
+    saved = os.environ['PATH'], os.environ.get('AK_STUB_DELAY'), VENDOR_API_URLS, cache_enabled
+    os.environ['PATH'] = stub_dir + os.pathsep + os.environ['PATH']
+    os.environ['AK_STUB_DELAY'] = str(nmap_delay)
+    VENDOR_API_URLS = [('text', f'http://127.0.0.1:{server.server_port}/text/{{mac}}'),
+                       ('json', f'http://127.0.0.1:{server.server_port}/json/{{mac}}')]
+    cache_enabled = False
+
+    namespace = BenchNamespace('ake2e', '10.240.0.1', '10.240.0.2', delay_ms=delay_ms, loss=loss)
+    targets = [f'10.240.0.{i + 2}' for i in range(hosts)]
+    results = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'hosts': hosts,
+               'delay_ms': delay_ms, 'loss': loss, 'nmap_delay': nmap_delay}
+    try:
+        with namespace:
+            for ip in targets[1:]:
+                namespace.run('ip', 'addr', 'add', f'{ip}/24', 'dev', 'ake2e-n')
+            process = subprocess.Popen(['ip', 'netns', 'exec', namespace.name, sys.executable, '-c', E2E_TARGET_SCRIPT,
+                                        ','.join(targets), '22,80,8080'], stdout=subprocess.PIPE)
+            process.stdout.readline()
+            namespace.processes.append(process)
+
+            start = time.perf_counter()
+            for ip in targets:
+                scan_ports_fast(ip)
+            fast = time.perf_counter() - start
+            start = time.perf_counter()
+            for ip in targets:
+                scan_ports_aggressive(ip)
+            aggressive = time.perf_counter() - start
+            results['ports'] = {
+                'fast_ports_per_sec': round(len(targets) * len(COMMON_PORTS) / fast),
+                'aggressive_ports_per_sec': round(len(targets) * 1024 / aggressive),
+            }
+
+            samples = []
+            for ip in targets:
+                start = time.perf_counter()
+                get_hostname_advanced(ip)
+                samples.append(time.perf_counter() - start)
+            results['hostname'] = percentiles(samples)
+
+            samples = []
+            for i in range(hosts):
+                start = time.perf_counter()
+                get_mac_vendor(f'02:e2:e0:00:{i >> 8:02x}:{i & 255:02x}')
+                samples.append(time.perf_counter() - start)
+            results['vendor'] = percentiles(samples)
+
+            stage_timings = {}
+            start = time.perf_counter()
+            devices = list(scan_stream('10.240.0.0/24'))
+            elapsed = time.perf_counter() - start
+            results['scan'] = {'seconds': round(elapsed, 3), 'devices': len(devices),
+                               'hosts_per_sec': round(len(devices) / elapsed, 2)}
+            results['stages'] = {name: percentiles(samples) for name, samples in stage_timings.items()}
+    finally:
+        stage_timings = None
+        os.environ['PATH'], stub_delay, VENDOR_API_URLS, cache_enabled = saved
+        if stub_delay is None:
+            os.environ.pop('AK_STUB_DELAY', None)
+        else:
+            os.environ['AK_STUB_DELAY'] = stub_delay
+        server.shutdown()
+        shutil.rmtree(stub_dir, ignore_errors=True)
+
+    os.makedirs(BENCHMARK_RESULTS_DIR, exist_ok=True)
+    previous = sorted(f for f in os.listdir(BENCHMARK_RESULTS_DIR) if f.startswith('e2e-'))
+    path = os.path.join(BENCHMARK_RESULTS_DIR, f"e2e-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=4)
+
+    scan_result = results['scan']
+    print(f"📊 E2E benchmark: {hosts} stand-in hosts (delay {delay_ms} ms, loss {loss}%)")
+    print(f"   scan():       {scan_result['hosts_per_sec']} hosts/sec "
+          f"({scan_result['devices']}/{hosts} devices in {scan_result['seconds']}s)")
+    print(f"   ports:        fast {results['ports']['fast_ports_per_sec']:,} ports/sec, "
+          f"aggressive {results['ports']['aggressive_ports_per_sec']:,} ports/sec")
+    for name, stats in [('hostname', results['hostname']), ('vendor', results['vendor'])] + \
+                       [(f'stage {stage}', stats) for stage, stats in results['stages'].items()]:
+        print(f"   {name + ':':<17} p50 {stats.get('p50')} ms, p95 {stats.get('p95')} ms, "
+              f"p99 {stats.get('p99')} ms (n={stats['count']})")
+    if previous:
+        with open(os.path.join(BENCHMARK_RESULTS_DIR, previous[-1])) as f:
+            last = json.load(f)
+        before = last.get('scan', {}).get('hosts_per_sec')
+        if before:
+            print(f"   vs {previous[-1]}: {before} → {scan_result['hosts_per_sec']} hosts/sec "
+                  f"({(scan_result['hosts_per_sec'] - before) / before:+.1%})")
+    print(f"💾 Results saved to {path}")
+
+BENCHMARKS = {
+    'vendor': benchmark_vendor_lookup,
+    'ports': benchmark_port_scan,
+    'pipeline': benchmark_pipeline,
+    'syn': benchmark_syn_scan,
+    'icmp': benchmark_icmp_sweep,
+    'passive': benchmark_passive,
+    'arp': benchmark_arp_sweep,
+    'shards': benchmark_shards,
+    'e2e': benchmark_e2e,
+    'daemon': benchmark_daemon,
+    'startup': benchmark_startup,
+    'devices': benchmark_devices,
+    'rules': benchmark_rules,
+    'store': benchmark_store,
+}
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="AK Network Scanner")
+    parser.add_argument('--benchmark', choices=sorted(BENCHMARKS), help="run a benchmark and exit")
+    parser.add_argument('--bench-option', action='append', default=[], metavar='KEY=VALUE',
+                        help="keyword argument for the benchmark, e.g. hosts=64 or delay_ms=20 (repeatable)")
+    parser.add_argument('--update-vendors', action='store_true',
+                        help="download the IEEE registries, rebuild the vendor snapshot and exit")
+    parser.add_argument('--offline', action='store_true',
+                        help="with --update-vendors, compile from local sources only")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="do not read or write the persistent vendor/hostname cache")
+    parser.add_argument('--reenrich', type=float, default=MONITOR_REENRICH_INTERVAL, metavar='SECONDS',
+                        help="in monitoring mode, refresh unchanged hosts after this many seconds")
+    parser.add_argument('--pcap', metavar='FILE',
+                        help="build the passive-mode device table from a capture file and exit")
+    parser.add_argument('--iface', metavar='NAME',
+                        help="interface for passive mode (default: the one holding the default route)")
+    parser.add_argument('--arp-retries', type=int, metavar='N',
+                        help=f"ARP re-probes of silent addresses (default {ARP_POLICY['retries']})")
+    parser.add_argument('--arp-max-wait', type=float, metavar='SECONDS',
+                        help=f"longest wait for ARP replies after each pass (default {ARP_POLICY['max_wait']})")
+    parser.add_argument('--shards', type=int, metavar='N',
+                        help=f"split scans across N worker processes (this machine has {SHARD_WORKERS} CPU(s))")
+    parser.add_argument('--metrics', metavar='DIR',
+                        help="write per-stage/per-method timings to DIR/metrics.prom (Prometheus) and "
+                             "DIR/metrics.json after each scan or monitoring cycle")
+    parser.add_argument('--daemon', action='store_true',
+                        help="run as a scan daemon with warm caches, taking jobs on --socket")
+    parser.add_argument('--submit', metavar='TARGETS',
+                        help="send a scan job to the running daemon and stream its results")
+    parser.add_argument('--socket', default=DAEMON_SOCKET, metavar='PATH',
+                        help=f"with --daemon or --submit, the daemon's Unix socket (default {DAEMON_SOCKET})")
+    parser.add_argument('--socket-group', metavar='GROUP',
+                        help="with --daemon, let members of GROUP use the socket (mode 0660)")
+    parser.add_argument('--profile', choices=sorted(SCAN_PROFILES), default='regular',
+                        help="with --submit, the scan profile")
+    parser.add_argument('--ports', help="with --submit, 'fast', 'aggressive', 'syn' or a list like 22,80,8000-8100")
+    parser.add_argument('--ndjson', metavar='FILE',
+                        help="append each device to FILE as newline-delimited JSON as soon as it is enriched")
+    parser.add_argument('--rules', action='append', default=[], metavar='FILE',
+                        help="load a JSON risk rule pack on top of the built-in rules (repeatable)")
+    parser.add_argument('--rescore', metavar='FILE',
+                        help="re-run the risk rules over saved JSON/NDJSON results and exit")
+    parser.add_argument('--query', metavar='FILE',
+                        help="query saved JSON/NDJSON results (with --where, --group-by, --top) and exit")
+    parser.add_argument('--where', action='append', default=[], metavar='KEY=VALUE',
+                        help="with --query: port=3389, network=10.0.0.0/24, risk=critical, or a text column "
+                             "substring such as vendor=cisco (repeatable, all must match)")
+    parser.add_argument('--group-by', choices=ResultStore.GROUPS, help="with --query: count matching hosts per value")
+    parser.add_argument('--top', type=int, default=10, metavar='N', help="with --query: rows or groups to show")
+    return parser.parse_args()
 
 
 def main():
     """Main execution function"""
+    global cache_enabled, metrics_dir
+    args = parse_args()
+    cache_enabled = not args.no_cache
+    metrics_dir = args.metrics
+    if args.arp_retries is not None:
+        ARP_POLICY['retries'] = args.arp_retries
+    if args.arp_max_wait is not None:
+        ARP_POLICY['max_wait'] = args.arp_max_wait
+    if args.rules:
+        try:
+            load_risk_rules(args.rules)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not load rules: {e}")
+            return
+    if args.benchmark:
+        options = {}
+        for option in args.bench_option:
+            key, _, value = option.partition('=')
+            try:
+                options[key] = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                options[key] = value
+        BENCHMARKS[args.benchmark](**options)
+        return
+    if args.update_vendors:
+        update_vendor_snapshot(download=not args.offline)
+        return
+    if args.pcap:
+        replay_pcap(args.pcap)
+        return
+    if args.rescore:
+        rescore_results(args.rescore, args.ndjson)
+        return
+    if args.query:
+        run_query(args.query, args.where, args.group_by, args.top)
+        return
+    if args.daemon:
+        try:
+            ScanDaemon(args.socket, group=args.socket_group).serve()
+        except KeyboardInterrupt:
+            print("\n🛑 Daemon stopped.")
+        return
+    if args.submit:
+        run_submit(args.submit, args.profile, args.ports, args.ndjson, args.socket)
+        return
+    
     show_banner()
     
     choice = menu()
     
     if choice == '1':
         target = input("🌐 Enter Target IP Range (e.g., 192.168.1.1/24): ")
-        start = time.time()
-        results = scan(target)
-        end = time.time()
-        display(results, end - start)
+        results = run_scan(target, None, args.ndjson, args.shards)
         
-        save = input("\n💾 Save results? (y/n): ")
-        if save.lower() == 'y':
+        if results is not None and input("\n💾 Save results? (y/n): ").lower() == 'y':
             save_results(results)
         
     elif choice == '2':
         activate_stealth_mode()
         target = input("🌐 Enter Target IP Range: ")
-        start = time.time()
-        results = scan(target, delay=0.5)
-        end = time.time()
-        display(results, end - start)
+        results = run_scan(target, 'stealth', args.ndjson, args.shards)
         restore_mac()
         
-        save = input("\n💾 Save results? (y/n): ")
-        if save.lower() == 'y':
+        if results is not None and input("\n💾 Save results? (y/n): ").lower() == 'y':
             save_results(results)
         
     elif choice == '3':
         target = input("🌐 Enter Target IP Range: ")
-        monitor(target)
+        monitor(target, reenrich_interval=args.reenrich)
         
     elif choice == '4':
         print("\n⚠️  AGGRESSIVE MODE - This will scan 1-1024 ports per device")
         confirm = input("Continue? (y/n): ")
         if confirm.lower() == 'y':
             target = input("🌐 Enter Target IP Range: ")
-            start = time.time()
-            results = scan(target, aggressive=True)
-            end = time.time()
-            display(results, end - start)
+            results = run_scan(target, 'aggressive', args.ndjson, args.shards)
             
-            save = input("\n💾 Save results? (y/n): ")
-            if save.lower() == 'y':
+            if results is not None and input("\n💾 Save results? (y/n): ").lower() == 'y':
                 save_results(results)
+    elif choice == '5':
+        print("\n⚠️  SYN MODE - Half-open scan of ports 1-1024 using raw sockets")
+        target = input("🌐 Enter Target IP Range: ")
+        results = run_scan(target, 'syn', args.ndjson, args.shards)
+        
+        if results is not None and input("\n💾 Save results? (y/n): ").lower() == 'y':
+            save_results(results)
+    elif choice == '6':
+        # Route lookup for 0.0.0.0 finds the default route's interface
+        passive_monitor(args.iface or route_interface(0))
     else:
         print("❌ Invalid option.")
 
@@ -0,0 +1,90 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+POLICY = {'retries': 2, 'min_wait': 0.05, 'initial_wait': 0.1, 'max_wait': 0.8, 'rtt_factor': 3.0}
+
+
+class FakePacketSocket:
+    """Stands in for the AF_PACKET socket: ARP requests to known hosts are answered after their delay"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.requests = []
+        self.reader, self.writer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def send(self, frame):
+        ip = socket.inet_ntoa(frame[38:42])
+        self.requests.append(ip)
+        if ip in self.delays:
+            mac = bytes.fromhex('0200000000') + frame[41:42]
+            reply = bytes(6) + mac + b'\x08\x06' + struct.pack('!HHBBH', 1, 0x0800, 6, 4, 2) + mac + frame[38:42]
+            threading.Timer(self.delays[ip], self.reply, (reply + bytes(18),)).start()
+
+    def reply(self, frame):
+        try:
+            self.writer.send(frame)
+        except OSError:
+            pass  # sweep already closed the socket
+
+    def recv(self, size):
+        return self.reader.recv(size)
+
+    def fileno(self):
+        return self.reader.fileno()
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
+
+@pytest.fixture(autouse=True)
+def fake_interface(monkeypatch):
+    monkeypatch.setattr(scanner, 'interface_addresses',
+                        lambda iface: (bytes.fromhex('020000000001'), socket.inet_aton('10.9.0.1')))
+
+
+def sweep(network, delays, policy=POLICY):
+    sweeper = scanner.ArpSweeper(network, iface='fake0', rate=100000, policy=policy)
+    fake = FakePacketSocket(delays)
+    sweeper.open_socket = lambda: fake
+    found = {ip for batch in sweeper.sweep() for ip, _ in batch}
+    return sweeper, fake, found
+
+
+def test_slow_hosts_are_not_cut_off_by_fast_ones():
+    delays = {f'10.9.0.{n}': 0.001 for n in range(2, 12)}
+    delays['10.9.0.20'] = 0.5
+    delays['10.9.0.21'] = 0.6
+    sweeper, fake, found = sweep('10.9.0.0/27', delays)
+    assert found == set(delays)
+    # Fast replies alone would have kept every window at min_wait
+    assert sweeper.passes == 3
+
+
+def test_empty_retry_after_a_full_window_ends_the_sweep():
+    delays = {'10.9.0.2': 0.001, '10.9.0.3': 0.001}
+    sweeper, fake, found = sweep('10.9.0.0/29', delays, dict(POLICY, retries=5))
+    assert found == set(delays)
+    # Pass 2 found nobody new with a short window, pass 3 waited max_wait and found nobody either
+    assert sweeper.passes == 3
+    # Hosts that answered are not asked again
+    assert fake.requests.count('10.9.0.2') == 1
+
+
+@pytest.mark.parametrize('rtts, floor, expected', [
+    ([], 0.0, 0.1),           # nothing measured yet: initial_wait
+    ([0.001], 0.0, 0.05),     # fast replies only: min_wait
+    ([0.1], 0.0, 0.3),        # rtt_factor x slowest reply
+    ([1.0], 0.0, 0.8),        # capped at max_wait
+    ([0.001], 0.1, 0.1),      # final pass never below initial_wait
+])
+def test_window(rtts, floor, expected):
+    sweeper = scanner.ArpSweeper('10.9.0.0/30', iface='fake0', policy=POLICY)
+    sweeper.rtts = rtts
+    sweeper.floor = floor
+    assert sweeper.window() == pytest.approx(expected)
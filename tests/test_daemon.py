@@ -0,0 +1,193 @@
+import grp
+import ipaddress
+import json
+import os
+import socket
+import stat
+import threading
+import time
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+
+def start_daemon(path, group=None):
+    daemon = scanner.ScanDaemon(path, group=group)
+    daemon.warm_up = lambda: None
+    threading.Thread(target=daemon.serve, daemon=True).start()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            return daemon
+        except OSError:
+            time.sleep(0.01)
+        finally:
+            probe.close()
+    pytest.fail("daemon did not start")
+
+
+@pytest.fixture
+def open_umask():
+    old = os.umask(0)
+    yield
+    os.umask(old)
+
+
+def test_socket_is_private_whatever_the_umask(tmp_path, open_umask):
+    path = str(tmp_path / 'daemon.sock')
+    start_daemon(path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert list(scanner.submit_job(None, path=path)) == [{'event': 'status', 'jobs': []}]
+
+
+def test_socket_group_gets_access(tmp_path, open_umask):
+    path = str(tmp_path / 'daemon.sock')
+    group = grp.getgrgid(os.getgid()).gr_name
+    start_daemon(path, group=group)
+    info = os.stat(path)
+    assert stat.S_IMODE(info.st_mode) == 0o660
+    assert info.st_gid == os.getgid()
+
+
+def test_unknown_socket_group_fails_before_binding(tmp_path):
+    path = str(tmp_path / 'daemon.sock')
+    with pytest.raises(KeyError):
+        scanner.ScanDaemon(path, group='no-such-group-ak').serve()
+    assert not os.path.exists(path)
+
+
+def test_submit_without_daemon_says_so(tmp_path, capsys):
+    path = str(tmp_path / 'daemon.sock')
+    assert list(scanner.submit_job('192.168.1.0/24', path=path)) == []
+    assert 'scan daemon is not running' in capsys.readouterr().out
+
+    # A stale socket file left by a killed daemon refuses connections
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    scanner.run_submit('192.168.1.0/24', path=path)
+    out = capsys.readouterr().out
+    assert 'scan daemon is not running' in out
+    assert 'Scan' not in out.replace('scan daemon', '')
+
+
+def test_bad_request_gets_an_error_event(tmp_path):
+    path = str(tmp_path / 'daemon.sock')
+    start_daemon(path)
+    assert list(scanner.submit_job('10.0.0.0/24', profile='nope', path=path)) == \
+        [{'event': 'error', 'error': "unknown profile 'nope'"}]
+    assert list(scanner.submit_job('10.0.0.0/24', ports='99999', path=path))[0]['event'] == 'error'
+
+
+def send_raw(path, line):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    with client, client.makefile('rb') as reader:
+        client.sendall(line + b'\n')
+        return [json.loads(reply) for reply in reader]
+
+
+@pytest.mark.parametrize('line', [b'[]', b'"x"', b'42', b'null', b'{"targets": ["10.0.0.0/24"]}', b'not json'])
+def test_malformed_request_gets_an_error_event(tmp_path, line):
+    path = str(tmp_path / 'daemon.sock')
+    daemon = start_daemon(path)
+    replies = send_raw(path, line)
+    assert len(replies) == 1 and replies[0]['event'] == 'error'
+    # The daemon is still serving
+    assert list(scanner.submit_job(None, path=path)) == [{'event': 'status', 'jobs': daemon.status()}]
+
+
+def test_second_daemon_refuses_to_take_over_a_live_socket(tmp_path, capsys):
+    path = str(tmp_path / 'daemon.sock')
+    start_daemon(path)
+    inode = os.stat(path).st_ino
+    second = scanner.ScanDaemon(path)
+    second.warm_up = lambda: pytest.fail("second daemon should not start")
+    second.serve()
+    assert 'already listening' in capsys.readouterr().out
+    assert os.stat(path).st_ino == inode
+    assert list(scanner.submit_job(None, path=path)) == [{'event': 'status', 'jobs': []}]
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    path = str(tmp_path / 'daemon.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    start_daemon(path)
+    assert list(scanner.submit_job(None, path=path)) == [{'event': 'status', 'jobs': []}]
+
+
+def test_other_file_at_socket_path_is_left_alone(tmp_path, capsys):
+    path = tmp_path / 'daemon.sock'
+    path.write_text('not a socket')
+    scanner.ScanDaemon(str(path)).serve()
+    assert 'is not a socket' in capsys.readouterr().out
+    assert path.read_text() == 'not a socket'
+
+
+class FakeScans:
+    """scan_stream stand-in: yields a record per host of the target, then holds the job open until released"""
+
+    def __init__(self, monkeypatch):
+        self.calls = []
+        self.release = threading.Event()
+        monkeypatch.setattr(scanner, 'scan_stream', self.scan_stream)
+
+    def scan_stream(self, targets, profile=None):
+        self.calls.append((targets, profile['ports']))
+        for n, ip in enumerate(ipaddress.ip_network(targets).hosts()):
+            yield scanner.DeviceRecord(str(ip), 0x0200_0000_0000 + n)
+        self.release.wait(5)
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    fake = FakeScans(monkeypatch)
+    yield fake
+    fake.release.set()
+
+
+def test_identical_jobs_share_one_scan(tmp_path, scans):
+    path = str(tmp_path / 'daemon.sock')
+    daemon = start_daemon(path)
+    first, deduplicated = daemon.submit('10.1.0.0/29')
+    assert not deduplicated
+    second, deduplicated = daemon.submit('10.1.0.0/29')
+    assert deduplicated and second is first
+    # A third submission over the socket joins too, while the scan is still running
+    threading.Timer(0.2, scans.release.set).start()
+    events = list(scanner.submit_job('10.1.0.0/29', path=path))
+    assert events[0]['deduplicated'] and events[0]['job'] == first.id
+    assert len([event for event in events if event['event'] == 'device']) == 6
+    assert scans.calls == [('10.1.0.0/29', scanner.SCAN_PROFILES['regular']['ports'])]
+
+
+def test_subnet_of_running_job_gets_only_its_hosts(tmp_path, scans):
+    path = str(tmp_path / 'daemon.sock')
+    daemon = start_daemon(path)
+    job, _ = daemon.submit('10.2.0.0/24')
+    threading.Timer(0.2, scans.release.set).start()
+    events = list(scanner.submit_job('10.2.0.64/28', path=path))
+    assert (events[0]['event'], events[0]['job'], events[0]['deduplicated']) == ('queued', job.id, True)
+    devices = [event['ip'] for event in events if event['event'] == 'device']
+    assert devices == [f'10.2.0.{n}' for n in range(64, 80)]
+    assert events[-1]['event'] == 'done' and events[-1]['devices'] == 16
+    assert len(scans.calls) == 1
+
+
+@pytest.mark.parametrize('targets, profile, ports', [
+    ('10.3.0.0/29', 'aggressive', None),
+    ('10.3.0.0/29', 'regular', '22,80'),
+    ('10.3.1.0/29', 'regular', None),
+    ('10.3.0.0/23', 'regular', None),
+])
+def test_different_profile_ports_or_range_is_not_deduplicated(tmp_path, scans, targets, profile, ports):
+    daemon = scanner.ScanDaemon(str(tmp_path / 'daemon.sock'))
+    first, _ = daemon.submit('10.3.0.0/29')
+    other, deduplicated = daemon.submit(targets, profile, ports)
+    assert not deduplicated and other is not first
+    assert daemon.queue.qsize() == 2
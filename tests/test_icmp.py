@@ -0,0 +1,116 @@
+import collections
+import os
+import socket
+import struct
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+
+class FakeRawSocket:
+    """Stands in for the raw ICMP socket: echo requests to responders come back as replies
+
+    Replies are queued on a socketpair so select() works on it. A host listed
+    in late answers its first request only when the next request is sent.
+    """
+
+    def __init__(self, responders, ttl=64, late=(), spoof_as=None):
+        self.responders = set(responders)
+        self.late = set(late)
+        self.spoof_as = spoof_as
+        self.held = {}
+        self.ttl = ttl
+        self.sent = []
+        self.sources = collections.deque()
+        self.reader, self.writer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def reply(self, ip, request):
+        ip = self.spoof_as or ip
+        icmp = b'\x00\x00\x00\x00' + request[4:]
+        ip_header = bytes([0x45, 0, 0, 0, 0, 0, 0, 0, self.ttl, 1, 0, 0]) + socket.inet_aton(ip) + bytes(4)
+        self.sources.append(ip)
+        self.writer.send(ip_header + icmp)
+
+    def sendto(self, packet, address):
+        ip = address[0]
+        self.sent.append((ip, struct.unpack_from('!HH', packet, 4)))
+        if ip in self.held:
+            self.reply(ip, self.held.pop(ip))
+        if ip in self.late:
+            self.late.discard(ip)
+            self.held[ip] = packet
+        elif ip in self.responders:
+            self.reply(ip, packet)
+
+    def recvfrom(self, size):
+        return self.reader.recv(size), (self.sources.popleft(), 0)
+
+    def fileno(self):
+        return self.reader.fileno()
+
+    def setsockopt(self, *args):
+        pass
+
+    def setblocking(self, flag):
+        pass
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
+
+@pytest.fixture
+def fake_socket(monkeypatch):
+    def install(*args, **kwargs):
+        sock = FakeRawSocket(*args, **kwargs)
+
+        def factory(family, kind, proto=0):
+            assert (family, kind, proto) == (socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+            return sock
+        monkeypatch.setattr(scanner.socket, 'socket', factory)
+        return sock
+
+    return install
+
+
+def host(index):
+    return socket.inet_ntoa(struct.pack('!I', 0x0A000000 + index))
+
+
+def test_keys_stay_unique_past_65536_hosts(fake_socket):
+    ips = [host(index) for index in range(65537)]
+    # ips[0] and ips[65536] had the same sequence number and the later one won
+    sock = fake_socket(responders={ips[0], ips[65536]})
+    results = scanner.icmp_sweep(ips, timeout=0.2, retries=0)
+    assert set(results) == {ips[0], ips[65536]}
+    keys = [key for _, key in sock.sent]
+    assert len(set(keys)) == len(ips)
+
+
+def test_reply_must_come_from_the_probed_address(fake_socket):
+    fake_socket(responders={'10.0.0.1'}, spoof_as='10.0.0.99')
+    assert scanner.icmp_sweep(['10.0.0.1'], timeout=0.1, retries=0) == {}
+
+
+def test_rtt_is_timed_from_the_first_request(fake_socket):
+    sock = fake_socket(responders={'10.0.0.1'}, late={'10.0.0.1'})
+    results = scanner.icmp_sweep(['10.0.0.1'], timeout=0.4, retries=1)
+    # The answer to request 1 arrives when request 2 goes out, one window (0.2s) later
+    assert results['10.0.0.1']['rtt'] >= 190
+    assert results['10.0.0.1']['ttl'] == 64
+    assert len(sock.sent) == 2
+
+
+def test_retries_go_only_to_silent_hosts(fake_socket):
+    sock = fake_socket(responders={'10.0.0.1'})
+    results = scanner.icmp_sweep(['10.0.0.1', '10.0.0.2'], timeout=0.2, retries=2)
+    assert set(results) == {'10.0.0.1'}
+    assert [ip for ip, _ in sock.sent] == ['10.0.0.1', '10.0.0.2', '10.0.0.2', '10.0.0.2']
+
+
+@pytest.mark.skipif(os.geteuid() != 0, reason="raw ICMP sockets need root")
+def test_loopback_echo():
+    results = scanner.icmp_sweep(['127.0.0.1', '127.0.0.2'], timeout=0.5)
+    assert set(results) == {'127.0.0.1', '127.0.0.2'}
+    assert all(reply['ttl'] == 64 for reply in results.values())
@@ -0,0 +1,63 @@
+import AK_Network_Scanner as scanner
+
+
+def devices():
+    vendors = ['Cisco', 'Apple', 'Cisco', 'Unknown', 'Apple', 'Cisco']
+    verdicts = [scanner.RISK_LEVELS['critical'] + ' | telnet', scanner.RISK_LEVELS['low'] + ' | ok',
+                scanner.RISK_LEVELS['high'] + ' | smb', 'legacy verdict', scanner.RISK_LEVELS['high'] + ' | rdp',
+                scanner.RISK_LEVELS['low'] + ' | ok']
+    ports = [(22, 23), (), (445, 22), (80,), (3389, 80, 22), ()]
+    for n, (vendor, verdict, open_ports) in enumerate(zip(vendors, verdicts, ports), 1):
+        device = scanner.DeviceRecord(f'10.0.0.{n}', 0x0200_0000_0000 + n)
+        device.vendor = vendor
+        device.ai = verdict
+        device.ports = scanner.PortSet(open_ports)
+        yield device
+
+
+def test_counters_match_result_store():
+    store, counters = scanner.ResultStore(), scanner.SummaryCounters()
+    for n, device in enumerate(devices()):
+        store.add(device)
+        # Half as records, half as output views, as run_submit feeds them
+        counters.add(device.view() if n % 2 else device)
+    assert len(counters) == len(store)
+    assert counters.risk_counts() == store.risk_counts()
+    assert counters.group_count('vendor', top=3) == store.group_count('vendor', top=3)
+    assert counters.group_count('port', top=5) == store.group_count('port', top=5)
+
+
+def test_live_display_without_keep_returns_nothing(capsys):
+    live = scanner.LiveDisplay(keep=False)
+    for device in devices():
+        live.add(device)
+    assert live.finish() is None
+    assert not isinstance(live.store, scanner.ResultStore)
+    out = capsys.readouterr().out
+    assert 'Total Devices: 6' in out
+    assert 'HIGH RISKS: 2' in out
+    assert 'Top vendors: Cisco (3), Apple (2), Unknown (1)' in out
+
+
+def test_live_display_keeps_store_by_default(capsys):
+    live = scanner.LiveDisplay()
+    for device in devices():
+        live.add(device)
+    results = live.finish()
+    assert isinstance(results, scanner.ResultStore)
+    assert sorted(view['ip'] for view in results.views()) == [f'10.0.0.{n}' for n in range(1, 7)]
+
+
+def test_run_scan_streaming_keeps_no_store(monkeypatch, tmp_path, capsys):
+    kept = []
+    original = scanner.LiveDisplay.__init__
+
+    def spy(self, keep=True):
+        kept.append(keep)
+        original(self, keep)
+
+    monkeypatch.setattr(scanner.LiveDisplay, '__init__', spy)
+    monkeypatch.setattr(scanner, 'scan_stream', lambda target, profile=None: devices())
+    assert scanner.run_scan('10.0.0.0/29', ndjson=str(tmp_path / 'out.ndjson')) is None
+    assert kept == [False]
+    assert len((tmp_path / 'out.ndjson').read_text().splitlines()) == 6
@@ -0,0 +1,168 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+GROUP_ADDRESS = '239.255.42.99'
+
+
+def dns_response(transaction_id, answers):
+    """Response carrying PTR answers [(name, target)]"""
+    body = b''
+    for name, target in answers:
+        rdata = scanner.encode_dns_name(target)
+        body += scanner.encode_dns_name(name) + struct.pack('!HHIH', 12, 0x0001, 120, len(rdata)) + rdata
+    return struct.pack('!HHHHHH', transaction_id, 0x8400, 0, len(answers), 0, 0) + body
+
+
+def read_questions(data):
+    """(transaction_id, is_response, [(name, qtype, unicast_bit)]) of a DNS message"""
+    transaction_id, flags, count = struct.unpack_from('!HHH', data, 0)
+    offset, questions = 12, []
+    for _ in range(count):
+        name, offset = scanner.read_dns_name(data, offset)
+        qtype, qclass = struct.unpack_from('!HH', data, offset)
+        offset += 4
+        questions.append((name, qtype, bool(qclass & 0x8000)))
+    return transaction_id, bool(flags & 0x8000), questions
+
+
+class Responder:
+    """mDNS (group) or LLMNR (unicast) stand-in answering PTR questions from a table
+
+    records maps a question name to its PTR target; replies go out from
+    source_ip, multicast to the group unless the query set the QU bit.
+    """
+
+    def __init__(self, bind, records, source_ip, group=None, reuse=True):
+        self.records = records
+        self.group = group
+        self.queries = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if reuse:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(bind)
+        if group:
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                                 socket.inet_aton(group[0]) + socket.inet_aton('127.0.0.1'))
+        self.sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sender.bind((source_ip, 0))
+        self.sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton('127.0.0.1'))
+        self.sock.settimeout(0.05)
+        self.running = True
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        while self.running:
+            try:
+                data, source = self.sock.recvfrom(9000)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            transaction_id, response, questions = read_questions(data)
+            if response:
+                continue
+            self.queries.append(questions)
+            answers = [(name, self.records[name]) for name, qtype, _ in questions if name in self.records]
+            if not answers:
+                continue
+            unicast = not self.group or any(qu for _, _, qu in questions)
+            self.sender.sendto(dns_response(transaction_id, answers), source if unicast else self.group)
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.sock.close()
+        self.sender.close()
+
+
+def free_udp_port():
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+@pytest.fixture
+def group():
+    group = (GROUP_ADDRESS, free_udp_port())
+    # Skip where loopback cannot carry multicast (some containers)
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        receiver.bind(('', group[1]))
+        receiver.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                            socket.inet_aton(group[0]) + socket.inet_aton('127.0.0.1'))
+        receiver.settimeout(0.5)
+        sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton('127.0.0.1'))
+        sender.sendto(b'probe', group)
+        receiver.recvfrom(16)
+    except OSError:
+        pytest.skip("no multicast on loopback")
+    finally:
+        receiver.close()
+        sender.close()
+    return group
+
+
+MDNS_RECORDS = {
+    '3.0.0.127.in-addr.arpa': 'office-printer.local',
+    '_services._dns-sd._udp.local': '_ipp._tcp.local',
+}
+
+
+def test_multicast_reverse_lookup_and_service_enumeration(group):
+    responder = Responder(('', group[1]), MDNS_RECORDS, '127.0.0.3', group=group)
+    try:
+        results = scanner.mdns_sweep(['127.0.0.3', '127.0.0.4'], timeout=0.5, group=group,
+                                     llmnr_port=free_udp_port(), interface_ip='127.0.0.1')
+    finally:
+        responder.close()
+    assert results == {'127.0.0.3': {'hostname': 'office-printer', 'services': {'_ipp._tcp'}}}
+    assert scanner.mdns_device_type(results['127.0.0.3']['services']) == 'Printer'
+    # Both reverse questions travel in one packet, plus one service enumeration
+    assert sorted(len(questions) for questions in responder.queries) == [1, 2]
+    assert not any(qu for questions in responder.queries for _, _, qu in questions)
+
+
+
+def test_busy_mdns_port_falls_back_to_unicast_answers(group):
+    # The responder holds the port exclusively, so the sweep cannot share it and asks for unicast replies
+    responder = Responder(('', group[1]), MDNS_RECORDS, '127.0.0.3', group=group, reuse=False)
+    try:
+        results = scanner.mdns_sweep(['127.0.0.3'], timeout=0.5, group=group,
+                                     llmnr_port=free_udp_port(), interface_ip='127.0.0.1')
+    finally:
+        responder.close()
+    assert results['127.0.0.3']['hostname'] == 'office-printer'
+    assert all(qu for questions in responder.queries for _, _, qu in questions)
+
+
+def test_llmnr_unicast_reverse_lookup():
+    llmnr_port = free_udp_port()
+    group = (GROUP_ADDRESS, free_udp_port())
+    responder = Responder(('127.0.0.5', llmnr_port), {'5.0.0.127.in-addr.arpa': 'desktop-7'}, '127.0.0.5')
+    try:
+        results = scanner.mdns_sweep(['127.0.0.5', '127.0.0.6'], timeout=0.5, group=group,
+                                     llmnr_port=llmnr_port, interface_ip='127.0.0.1')
+    finally:
+        responder.close()
+    assert results == {'127.0.0.5': {'hostname': 'desktop-7', 'services': set()}}
+    # One LLMNR question per host, each with its own transaction ID
+    assert responder.queries == [[('5.0.0.127.in-addr.arpa', 12, False)]]
+
+
+def test_parse_dns_records_follows_compression():
+    name = scanner.encode_dns_name('3.0.0.127.in-addr.arpa')
+    header = struct.pack('!HHHHHH', 0, 0x8400, 0, 2, 0, 0)
+    first = name + struct.pack('!HHIH', 12, 1, 120, 2) + b'\xc0\x0c'      # PTR pointing back at its own name
+    second = b'\xc0\x0c' + struct.pack('!HHIH', 1, 1, 120, 4) + socket.inet_aton('127.0.0.3')
+    records = scanner.parse_dns_records(header + first + second)
+    assert records == [('3.0.0.127.in-addr.arpa', 12, '3.0.0.127.in-addr.arpa'),
+                       ('3.0.0.127.in-addr.arpa', 1, '127.0.0.3')]
@@ -0,0 +1,43 @@
+import threading
+import time
+
+import AK_Network_Scanner as scanner
+
+
+class NoLookup:
+    def __init__(self, *args):
+        pass
+
+    def get(self, ip, default=None):
+        return default
+
+
+def test_gated_enrichment_waits_for_the_gate(monkeypatch):
+    calls = []
+    monkeypatch.setattr(scanner, 'BatchLookup', NoLookup)
+    monkeypatch.setattr(scanner, 'NmapBatch', NoLookup)
+    monkeypatch.setattr(scanner, 'build_scan_stages',
+                        lambda profile, lookups: [('tag', lambda device: calls.append(device.ip_str), 1)])
+    profile = dict(scanner.SCAN_PROFILES['regular'], stages={'tag': 1})
+    gate = threading.Event()
+    finished = []
+    hosts = [(f'10.0.0.{n}', f'02:00:00:00:00:{n:02x}') for n in range(1, 5)]
+    thread = threading.Thread(target=lambda: finished.extend(scanner.enrich_hosts([hosts], profile, gate=gate)),
+                              daemon=True)
+    thread.start()
+    time.sleep(0.3)
+    assert calls == [] and finished == []
+    gate.set()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert sorted(calls) == [ip for ip, _ in hosts]
+    assert len(finished) == len(hosts)
+
+
+def test_ungated_enrichment_runs_straight_through(monkeypatch):
+    monkeypatch.setattr(scanner, 'BatchLookup', NoLookup)
+    monkeypatch.setattr(scanner, 'NmapBatch', NoLookup)
+    monkeypatch.setattr(scanner, 'build_scan_stages', lambda profile, lookups: [('noop', lambda device: None, 2)])
+    profile = dict(scanner.SCAN_PROFILES['regular'], stages={'noop': 2})
+    devices = list(scanner.enrich_hosts([[('10.0.0.1', '02:00:00:00:00:01')]], profile))
+    assert [device.ip_str for device in devices] == ['10.0.0.1']
@@ -0,0 +1,146 @@
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+ENCODED_NAME = b'\x20' + b'CK' + b'A' * 30 + b'\x00'
+
+
+def nbstat_response(transaction_id, names, mac):
+    """Node status answer as a Windows host sends it: name table, then unit ID and statistics"""
+    table = bytes([len(names)])
+    for name, suffix, group in names:
+        table += name.encode().ljust(15, b' ') + bytes([suffix]) + struct.pack('!H', 0x8400 if group else 0x0400)
+    rdata = table + bytes.fromhex(mac.replace(':', '')) + b'\0' * 40
+    header = struct.pack('!HHHHHH', transaction_id, 0x8400, 0, 1, 0, 0)
+    return header + ENCODED_NAME + struct.pack('!HHIH', 0x0021, 0x0001, 0, len(rdata)) + rdata
+
+
+class NbstatResponder:
+    """UDP NBSTAT stand-ins on several loopback addresses sharing one port"""
+
+    def __init__(self, hosts, drop_first=()):
+        self.hosts = hosts
+        self.drop_first = set(drop_first)
+        self.queries = []
+        self.sockets = []
+        self.port = 0
+        for ip in hosts:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((ip, self.port))
+            self.port = sock.getsockname()[1]
+            self.sockets.append(sock)
+        self.running = True
+        self.threads = [threading.Thread(target=self.serve, args=(sock,), daemon=True) for sock in self.sockets]
+        for thread in self.threads:
+            thread.start()
+
+    def serve(self, sock):
+        ip = sock.getsockname()[0]
+        names, mac = self.hosts[ip]
+        sock.settimeout(0.05)
+        while self.running:
+            try:
+                data, source = sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            transaction_id = struct.unpack_from('!H', data)[0]
+            self.queries.append((ip, source, transaction_id))
+            assert data == scanner.build_nbstat_query(transaction_id)
+            if ip in self.drop_first:
+                self.drop_first.discard(ip)
+                continue
+            sock.sendto(nbstat_response(transaction_id, names, mac), source)
+
+    def close(self):
+        self.running = False
+        for thread in self.threads:
+            thread.join()
+        for sock in self.sockets:
+            sock.close()
+
+
+@pytest.fixture
+def responder():
+    hosts = {
+        '127.0.0.2': ([('DESKTOP-A1', 0x00, False), ('WORKGROUP', 0x00, True), ('DESKTOP-A1', 0x20, False)],
+                      '00:1a:2b:3c:4d:5e'),
+        '127.0.0.3': ([('FILESRV', 0x20, False), ('OFFICE', 0x00, True)], '00:11:22:33:44:55'),
+    }
+    server = NbstatResponder(hosts, drop_first={'127.0.0.3'})
+    yield server
+    server.close()
+
+
+def test_sweep_resolves_names_and_macs(responder):
+    results = scanner.netbios_sweep(['127.0.0.2', '127.0.0.3', '127.0.0.4'], timeout=1.0, port=responder.port)
+    assert set(results) == {'127.0.0.2', '127.0.0.3'}
+    assert results['127.0.0.2']['hostname'] == 'DESKTOP-A1'
+    assert results['127.0.0.2']['workgroup'] == 'WORKGROUP'
+    assert results['127.0.0.2']['mac'] == '00:1a:2b:3c:4d:5e'
+    # Falls back to the file server (0x20) name when there is no workstation name
+    assert results['127.0.0.3']['hostname'] == 'FILESRV'
+    assert results['127.0.0.3']['mac'] == '00:11:22:33:44:55'
+
+
+def test_sweep_batches_queries_from_one_socket(responder):
+    start = time.monotonic()
+    scanner.netbios_sweep(['127.0.0.2', '127.0.0.3', '127.0.0.4'], timeout=1.0, port=responder.port, retries=1)
+    elapsed = time.monotonic() - start
+    # One socket for every query, one transaction ID per host
+    assert len({source for _, source, _ in responder.queries}) == 1
+    by_host = {}
+    for ip, _, transaction_id in responder.queries:
+        by_host.setdefault(ip, set()).add(transaction_id)
+    assert len(set.union(*by_host.values())) == len(by_host)
+    # The host that answered first time is not asked again; the one that dropped a query is
+    assert sum(1 for ip, _, _ in responder.queries if ip == '127.0.0.2') == 1
+    assert sum(1 for ip, _, _ in responder.queries if ip == '127.0.0.3') == 2
+    # A silent host costs the one shared window, not a timeout of its own
+    assert elapsed < 1.5
+
+
+def test_sweep_ignores_replies_from_the_wrong_address():
+    target = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    target.bind(('127.0.0.6', 0))
+    impostor = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    impostor.bind(('127.0.0.7', 0))
+
+    def answer_from_elsewhere():
+        data, source = target.recvfrom(2048)
+        transaction_id = struct.unpack_from('!H', data)[0]
+        impostor.sendto(nbstat_response(transaction_id, [('SPOOF', 0x00, False)], '00:1a:2b:3c:4d:5e'), source)
+
+    thread = threading.Thread(target=answer_from_elsewhere, daemon=True)
+    thread.start()
+    try:
+        assert scanner.netbios_sweep(['127.0.0.6'], timeout=0.3, port=target.getsockname()[1], retries=0) == {}
+    finally:
+        thread.join()
+        target.close()
+        impostor.close()
+    assert scanner.netbios_sweep([]) == {}
+
+
+def test_parse_rejects_malformed_packets():
+    good = nbstat_response(0x1234, [('HOST', 0x00, False)], '00:1a:2b:3c:4d:5e')
+    transaction_id, info = scanner.parse_nbstat_response(good)
+    assert transaction_id == 0x1234
+    assert info['names'] == [('HOST', 0x00, False)]
+    with pytest.raises(ValueError):
+        scanner.parse_nbstat_response(good[:8])
+    with pytest.raises(ValueError):
+        scanner.parse_nbstat_response(scanner.build_nbstat_query(0x1234))
+    with pytest.raises(ValueError):
+        scanner.parse_nbstat_response(good[:60])
+
+
+def test_parse_without_unit_id_has_no_mac():
+    packet = nbstat_response(1, [('HOST', 0x00, False)], '00:00:00:00:00:00')
+    assert scanner.parse_nbstat_response(packet)[1]['mac'] is None
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+from xml.etree import ElementTree
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'nmap_two_hosts.xml')
+
+EXPECTED = {
+    '192.168.1.10': {
+        'services': ['ssh OpenSSH 9.2p1 Debian 2+deb12u2 proto', 'http nginx 1.22.1'],
+        'device_type': 'Unknown',
+        'os': 'Linux 5.X|Linux 4.X',
+    },
+    '192.168.1.20': {
+        'services': ['netbios-ssn Samba smbd 4.6.2', 'netbios-ssn Samba smbd 4.6.2',
+                     'http nginx Synology DiskStation NAS'],
+        'device_type': 'NAS/Storage',
+        'os': 'embedded|Linux 4.X',
+    },
+}
+
+# Stand-in nmap: records its arguments, writes the report up to the second
+# <host>, then holds the rest back until the gate file exists
+STUB = """#!{python}
+import os, sys, time
+with open(os.environ['NMAP_ARGV'], 'a') as log:
+    log.write(' '.join(sys.argv[1:]) + '\\n')
+report = open(os.environ['NMAP_FIXTURE'], 'rb').read()
+split = report.index(b'<hosthint>', report.index(b'</host>'))
+sys.stdout.buffer.write(report[:split])
+sys.stdout.flush()
+while not os.path.exists(os.environ['NMAP_GATE']):
+    time.sleep(0.01)
+sys.stdout.buffer.write(report[split:])
+"""
+
+
+def report():
+    with open(FIXTURE, 'rb') as handle:
+        return handle.read()
+
+
+def chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [7, 512, 1 << 20])
+def test_stream_parses_recorded_report_in_any_chunking(size):
+    assert dict(scanner.stream_nmap_xml(chunks(report(), size))) == EXPECTED
+
+
+def test_hosts_are_yielded_as_soon_as_they_close():
+    data = report()
+    first_end = data.index(b'</host>') + len(b'</host>')
+    fed = []
+
+    def stream():
+        for chunk in chunks(data, 64):
+            fed.append(len(chunk))
+            yield chunk
+
+    results = scanner.stream_nmap_xml(stream())
+    ip, _ = next(results)
+    assert ip == '192.168.1.10'
+    # Only the chunks up to the first </host> have been read
+    assert sum(fed) < first_end + 64
+    assert next(results)[0] == '192.168.1.20'
+
+
+def test_truncated_report_keeps_completed_hosts():
+    data = report()
+    # Cut inside the second host's port list, as when nmap is killed mid-report
+    cut = data.index(b'<ports>', data.index(b'</host>'))
+    assert dict(scanner.stream_nmap_xml(chunks(data[:cut], 256))) == {'192.168.1.10': EXPECTED['192.168.1.10']}
+
+
+def test_empty_and_hostless_reports():
+    assert list(scanner.stream_nmap_xml([])) == []
+    data = report()
+    header = data[:data.index(b'<hosthint>')]
+    assert list(scanner.stream_nmap_xml([header + b'<runstats/></nmaprun>'])) == []
+
+
+def test_malformed_report_raises_after_good_hosts():
+    data = report()
+    first_end = data.index(b'</host>') + len(b'</host>')
+    results = scanner.stream_nmap_xml([data[:first_end], b'<host><address addr="1.2.3.4"></host>'])
+    assert next(results)[0] == '192.168.1.10'
+    with pytest.raises(ElementTree.ParseError):
+        next(results)
+
+
+def test_host_without_ipv4_is_skipped():
+    host = b'<nmaprun><host><address addr="fe80::1" addrtype="ipv6"/></host></nmaprun>'
+    assert list(scanner.stream_nmap_xml([host])) == []
+
+
+@pytest.fixture
+def stub_nmap(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    stub = bin_dir / 'nmap'
+    stub.write_text(STUB.format(python=sys.executable))
+    stub.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bin_dir}{os.pathsep}{os.environ["PATH"]}')
+    monkeypatch.setenv('NMAP_FIXTURE', FIXTURE)
+    monkeypatch.setenv('NMAP_GATE', str(tmp_path / 'gate'))
+    monkeypatch.setenv('NMAP_ARGV', str(tmp_path / 'argv'))
+    return tmp_path
+
+
+def test_batch_delivers_each_host_before_nmap_exits(stub_nmap):
+    ips = ['192.168.1.10', '192.168.1.20', '192.168.1.30']
+    batch = scanner.NmapBatch(ips)
+    start = time.monotonic()
+    assert batch.get('192.168.1.10') == EXPECTED['192.168.1.10']
+    assert time.monotonic() - start < 5
+    # nmap is still blocked before the second host, so its result is not in yet
+    assert not batch.events['192.168.1.20'].is_set()
+    (stub_nmap / 'gate').touch()
+    assert batch.get('192.168.1.20') == EXPECTED['192.168.1.20']
+    # Hosts nmap reports as down are released when the process ends
+    assert batch.get('192.168.1.30', 'missing') == 'missing'
+    # One process for the whole batch; no -O without sweep results asking for it
+    argv = (stub_nmap / 'argv').read_text().splitlines()
+    assert len(argv) == 1
+    assert argv[0].endswith(' '.join(ips))
+    assert '-O' not in argv[0].split()
+
+
+def test_batch_requests_os_detection_for_unknown_ttl(stub_nmap):
+    (stub_nmap / 'gate').touch()
+    icmp = scanner.BatchLookup(lambda ips: {ip: {'ttl': 57, 'rtt': 1.0} for ip in ips}, ['192.168.1.10'])
+    batch = scanner.NmapBatch(['192.168.1.10'], {'icmp': icmp})
+    assert batch.get('192.168.1.10')['os'] == 'Linux 5.X|Linux 4.X'
+    assert '-O' in (stub_nmap / 'argv').read_text().split()
+
+
+def test_batch_without_nmap_returns_defaults(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATH', str(tmp_path))
+    start = time.monotonic()
+    batch = scanner.NmapBatch(['192.168.1.10'])
+    assert batch.get('192.168.1.10') is None
+    assert batch.get('192.168.1.10', {}) == {}
+    assert batch.results == {}
+    assert time.monotonic() - start < 5
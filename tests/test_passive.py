@@ -0,0 +1,166 @@
+import socket
+import struct
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+MAC = '02:00:00:00:00:2a'
+IP = '10.9.0.42'
+
+
+def ether(payload, ethertype=0x0800, src=MAC, vlan=False):
+    header = b'\xff' * 6 + bytes.fromhex(src.replace(':', ''))
+    if vlan:
+        header += struct.pack('!HH', 0x8100, 7)
+    return header + struct.pack('!H', ethertype) + payload
+
+
+def udp(payload, sport, dport, src=IP, dst='255.255.255.255'):
+    ip = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 28 + len(payload), 0, 0, 64, 17, 0,
+                     socket.inet_aton(src), socket.inet_aton(dst))
+    return ip + struct.pack('!HHHH', sport, dport, 8 + len(payload), 0) + payload
+
+
+def dhcp_request(hostname=b'laptop-7', vendor_class=b'MSFT 5.0', requested=IP):
+    bootp = bytearray(236)
+    bootp[0:3] = b'\x01\x01\x06'
+    bootp[28:34] = bytes.fromhex(MAC.replace(':', ''))
+    options = b'\x35\x01\x03' + b'\x32\x04' + socket.inet_aton(requested)
+    if hostname:
+        options += bytes([12, len(hostname)]) + hostname
+    if vendor_class:
+        options += bytes([60, len(vendor_class)]) + vendor_class
+    return bytes(bootp) + b'\x63\x82\x53\x63' + options + b'\xff'
+
+
+def mdns_answer(name=b'printer', ip=IP):
+    qname = bytes([len(name)]) + name + b'\x05local\x00'
+    return (struct.pack('!HHHHHH', 0, 0x8400, 0, 1, 0, 0) + qname +
+            struct.pack('!HHIH', 1, 0x8001, 120, 4) + socket.inet_aton(ip))
+
+
+def netbios_encode(name, suffix):
+    raw = name.encode().ljust(15, b' ') + bytes([suffix])
+    return b'\x20' + bytes(c for byte in raw for c in (0x41 + (byte >> 4), 0x41 + (byte & 0x0F))) + b'\x00'
+
+
+def nbns_registration(name='FILESRV', suffix=0x20):
+    # Opcode 5 (registration), one question and the additional record carrying the address
+    header = struct.pack('!HHHHHH', 0x1234, 5 << 11, 1, 0, 0, 1)
+    return header + netbios_encode(name, suffix) + struct.pack('!HH', 0x20, 1)
+
+
+SSDP_NOTIFY = b'NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nSERVER: Linux/5.10 UPnP/1.0 MiniDLNA/1.3\r\n\r\n'
+
+
+@pytest.fixture
+def watcher(monkeypatch):
+    monkeypatch.setattr(scanner, 'lookup_vendor_index', lambda mac: 'Test Vendor')
+    return scanner.PassiveMonitor(verbose=False)
+
+
+def test_arp_request_adds_device(watcher):
+    arp = struct.pack('!HHBBH', 1, 0x0800, 6, 4, 1) + bytes.fromhex(MAC.replace(':', '')) + \
+        socket.inet_aton(IP) + b'\0' * 6 + socket.inet_aton('10.9.0.1')
+    watcher.handle(ether(arp, ethertype=0x0806))
+    assert watcher.devices[MAC]['ip'] == IP
+    assert watcher.devices[MAC]['vendor'] == 'Test Vendor'
+    assert watcher.devices[MAC]['source'] == 'arp'
+
+
+def test_dhcp_request_hostname_and_vendor_class(watcher):
+    watcher.handle(ether(udp(dhcp_request(), 68, 67, src='0.0.0.0')))
+    device = watcher.devices[MAC]
+    assert device['ip'] == IP
+    assert device['hostname'] == 'laptop-7'
+    assert device['services'] == 'MSFT 5.0'
+    assert device['source'] == 'dhcp'
+
+
+def test_dhcp_vendor_class_does_not_replace_ssdp_server(watcher):
+    watcher.handle(ether(udp(SSDP_NOTIFY, 1900, 1900, dst='239.255.255.250')))
+    watcher.handle(ether(udp(dhcp_request(), 68, 67, src='0.0.0.0')))
+    assert watcher.devices[MAC]['services'] == 'Linux/5.10 UPnP/1.0 MiniDLNA/1.3'
+
+
+def test_vlan_tagged_frame(watcher):
+    watcher.handle(ether(udp(dhcp_request(), 68, 67, src='0.0.0.0'), vlan=True))
+    assert watcher.devices[MAC]['hostname'] == 'laptop-7'
+
+
+def test_mdns_answer_names_sender(watcher):
+    watcher.handle(ether(udp(mdns_answer(), 5353, 5353, dst='224.0.0.251')))
+    assert watcher.devices[MAC]['hostname'] == 'printer'
+    assert watcher.devices[MAC]['source'] == 'mdns'
+
+
+def test_mdns_answer_for_other_address_is_ignored(watcher):
+    watcher.handle(ether(udp(mdns_answer(ip='10.9.0.99'), 5353, 5353, dst='224.0.0.251')))
+    assert MAC not in watcher.devices
+
+
+@pytest.mark.parametrize('suffix, named', [(0x20, True), (0x00, True), (0x1C, False)])
+def test_nbns_registration(watcher, suffix, named):
+    watcher.handle(ether(udp(nbns_registration(suffix=suffix), 137, 137)))
+    assert (watcher.devices.get(MAC, {}).get('hostname') == 'FILESRV') is named
+
+
+def test_ssdp_server_header(watcher):
+    watcher.handle(ether(udp(SSDP_NOTIFY, 1900, 1900, dst='239.255.255.250')))
+    assert watcher.devices[MAC]['services'] == 'Linux/5.10 UPnP/1.0 MiniDLNA/1.3'
+    assert watcher.devices[MAC]['ip'] == IP
+
+
+@pytest.mark.parametrize('frame', [
+    b'',
+    b'\xff' * 13,
+    ether(b'\x45\x00'),
+    ether(udp(dhcp_request(), 68, 67, src='0.0.0.0'))[:14 + 14],
+    ether(udp(dhcp_request(), 68, 67, src='0.0.0.0'))[:14 + 28 + 200],
+    ether(udp(b'\x01' + b'\0' * 300, 68, 67, src='0.0.0.0')),
+    ether(udp(mdns_answer(), 5353, 5353))[:-2],
+    ether(udp(mdns_answer()[:12] + b'\xc0\x0c', 5353, 5353)),
+    ether(udp(nbns_registration()[:30], 137, 137)),
+    ether(udp(nbns_registration().replace(b'\x20', b'\x10', 1), 137, 137)),
+    ether(b'\x00' * 10, ethertype=0x0806),
+], ids=['empty', 'short-ethernet', 'short-ip', 'short-udp', 'truncated-bootp', 'no-dhcp-cookie',
+        'truncated-mdns-address', 'mdns-pointer-loop', 'truncated-nbns-name', 'bad-nbns-length', 'short-arp'])
+def test_malformed_frames_are_ignored(watcher, frame):
+    watcher.handle(frame)
+    assert watcher.packets == 1
+    assert all(device['hostname'] == 'Unknown' for device in watcher.devices.values())
+
+
+def test_truncated_dhcp_option_keeps_what_is_there(watcher):
+    payload = dhcp_request(vendor_class=None)[:-1]
+    payload = payload[:-len(b'laptop-7') - 2] + b'\x0c\x20' + b'lap'
+    watcher.handle(ether(udp(payload, 68, 67, src='0.0.0.0')))
+    assert watcher.devices[MAC]['hostname'] == 'lap'
+
+
+def write_pcap(path, frames):
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        for n, frame in enumerate(frames):
+            f.write(struct.pack('<IIII', 1700000000 + n, 0, len(frame), len(frame)) + frame)
+
+
+def test_pcap_replay(watcher, tmp_path):
+    pytest.importorskip('scapy')
+    other = '02:00:00:00:00:2b'
+    frames = [
+        ether(udp(dhcp_request(), 68, 67, src='0.0.0.0')),
+        ether(udp(SSDP_NOTIFY, 1900, 1900, src='10.9.0.43', dst='239.255.255.250'), src=other),
+        b'\x00' * 8,
+        ether(udp(mdns_answer(b'tv', '10.9.0.43'), 5353, 5353, src='10.9.0.43', dst='224.0.0.251'), src=other),
+    ] * 50
+    path = tmp_path / 'capture.pcap'
+    write_pcap(path, frames)
+    rate = watcher.replay(str(path))
+    assert rate > 0
+    assert watcher.packets == len(frames)
+    assert {mac: (d['ip'], d['hostname'], d['services']) for mac, d in watcher.devices.items()} == {
+        MAC: (IP, 'laptop-7', 'MSFT 5.0'),
+        other: ('10.9.0.43', 'tv', 'Linux/5.10 UPnP/1.0 MiniDLNA/1.3'),
+    }
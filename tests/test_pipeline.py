@@ -0,0 +1,37 @@
+import threading
+
+import AK_Network_Scanner as scanner
+
+
+def drain(pipeline, records, timeout=5):
+    """Collect pipeline output in a thread so a hung pipeline fails instead of blocking"""
+    finished = []
+    thread = threading.Thread(target=lambda: finished.extend(pipeline.run(records)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "pipeline did not finish"
+    return finished
+
+
+def test_records_pass_through_every_stage():
+    def tag(record):
+        record.hostname = f'host-{record.ip & 0xFF}'
+
+    records = [scanner.DeviceRecord(f'10.0.0.{n}', 0x0200_0000_0000 + n) for n in range(1, 21)]
+    pipeline = scanner.ScanPipeline([('tag', tag, 3), ('noop', lambda record: None, 2)], queue_size=4)
+    finished = drain(pipeline, records)
+    assert sorted(record.ip_str for record in finished) == sorted(record.ip_str for record in records)
+    assert all(record.hostname == f'host-{record.ip & 0xFF}' for record in finished)
+
+
+def test_failing_stage_drops_record_and_keeps_running(capsys):
+    def explode(record):
+        if record.ip_str.endswith('.3'):
+            raise RuntimeError('boom')
+
+    records = [scanner.DeviceRecord(f'10.0.0.{n}', n) for n in range(1, 9)]
+    # One worker per stage: if the error killed it, nothing after 10.0.0.3 would get through
+    pipeline = scanner.ScanPipeline([('explode', explode, 1), ('noop', lambda record: None, 1)])
+    finished = drain(pipeline, records)
+    assert sorted(record.ip_str for record in finished) == [f'10.0.0.{n}' for n in (1, 2, 4, 5, 6, 7, 8)]
+    assert 'Error processing device 10.0.0.3 (explode): boom' in capsys.readouterr().out
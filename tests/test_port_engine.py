@@ -0,0 +1,80 @@
+import errno
+import socket
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+
+@pytest.fixture
+def engine():
+    return scanner.PortScanEngine(concurrency=64)
+
+
+@pytest.fixture
+def listener():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+    yield server.getsockname()[1]
+    server.close()
+
+
+def closed_port():
+    probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+def test_open_and_closed_ports(engine, listener):
+    closed = closed_port()
+    results = engine.scan('127.0.0.1', [listener, closed], 0.5)
+    assert results == {listener: 'open', closed: 'closed'}
+
+
+def test_unresolvable_target_is_filtered_and_engine_survives(engine, listener):
+    assert engine.scan('no-such-host.invalid', [80, 443], 0.5) == {80: 'filtered', 443: 'filtered'}
+    assert engine.thread.is_alive()
+    assert engine.scan('127.0.0.1', [listener], 0.5) == {listener: 'open'}
+
+
+def test_socket_failure_marks_port_filtered(engine, listener, monkeypatch):
+    real_socket = socket.socket
+    failures = [1]
+
+    def flaky_socket(*args, **kwargs):
+        if failures:
+            failures.pop()
+            raise OSError(errno.EMFILE, 'Too many open files')
+        return real_socket(*args, **kwargs)
+
+    monkeypatch.setattr(scanner.socket, 'socket', flaky_socket)
+    assert engine.scan('127.0.0.1', [listener], 0.5) == {listener: 'filtered'}
+    assert engine.scan('127.0.0.1', [listener], 0.5) == {listener: 'open'}
+
+
+def test_engine_error_does_not_kill_the_thread(engine, listener, monkeypatch, capsys):
+    real_launch = engine.launch
+    calls = []
+
+    def broken_launch():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('boom')
+        real_launch()
+
+    monkeypatch.setattr(engine, 'launch', broken_launch)
+    engine.wakeup_w.send(b'\0')
+    assert engine.scan('127.0.0.1', [listener], 0.5) == {listener: 'open'}
+    assert engine.thread.is_alive()
+    assert 'Port scan engine error: boom' in capsys.readouterr().out
+
+
+def test_stalled_scan_returns_instead_of_blocking(engine, monkeypatch, capsys):
+    monkeypatch.setattr(scanner, 'PORT_SCAN_STALL', 0.2)
+    monkeypatch.setattr(engine, 'launch', lambda: None)
+    assert engine.scan('127.0.0.1', [80], 0.01) == {}
+    assert not engine.jobs
+    assert 'Port scan of 127.0.0.1 stalled' in capsys.readouterr().out
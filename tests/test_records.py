@@ -0,0 +1,105 @@
+import pickle
+from multiprocessing.reduction import ForkingPickler
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+
+@pytest.mark.parametrize('ip', ['0.0.0.0', '10.0.0.1', '192.168.255.254', '255.255.255.255'])
+def test_ip_int_round_trip(ip):
+    record = scanner.DeviceRecord(ip, 0)
+    assert isinstance(record.ip, int)
+    assert record.ip_str == ip
+    assert scanner.DeviceRecord(record.ip, 0).ip_str == ip
+
+
+@pytest.mark.parametrize('mac, expected', [
+    ('aa:bb:cc:dd:ee:ff', 'aa:bb:cc:dd:ee:ff'),
+    ('AA-BB-CC-00-11-22', 'aa:bb:cc:00:11:22'),
+    ('0011.2233.4455', '00:11:22:33:44:55'),
+    ('00:00:00:00:00:00', '00:00:00:00:00:00'),
+])
+def test_mac_int_round_trip(mac, expected):
+    record = scanner.DeviceRecord('10.0.0.1', mac)
+    assert isinstance(record.mac, int)
+    assert record.mac_str == expected
+    assert scanner.DeviceRecord('10.0.0.1', record.mac).mac_str == expected
+
+
+def test_bad_mac_is_rejected():
+    with pytest.raises(ValueError):
+        scanner.DeviceRecord('10.0.0.1', 'aa:bb:cc')
+
+
+def full_record():
+    record = scanner.DeviceRecord('192.168.1.20', '00:11:22:33:44:55')
+    record.hostname = 'nas.local'
+    record.vendor = 'Synology'
+    record.ports = scanner.PortSet([445, 22, 80])
+    record.os = 'Linux/Unix'
+    record.ai = scanner.RISK_LEVELS['critical'] + ' | SMB'
+    record.device_type = 'NAS/Storage'
+    record.services = ['ssh', 'http']
+    record.rtt = 1.25
+    return record
+
+
+def test_view_has_the_legacy_shape():
+    view = full_record().view()
+    assert list(view) == ['ip', 'mac', 'hostname', 'vendor', 'ports', 'os', 'ai', 'device_type', 'services', 'rtt']
+    assert view['ip'] == '192.168.1.20'
+    assert view['mac'] == '00:11:22:33:44:55'
+    assert view['ports'] == '22, 80, 445'
+    assert scanner.DeviceRecord('10.0.0.1', 1).view()['ports'] == 'None'
+
+
+def test_view_round_trip():
+    view = full_record().view()
+    assert scanner.DeviceRecord.from_view(view).view() == view
+    empty = scanner.DeviceRecord('10.0.0.1', 1).view()
+    assert scanner.DeviceRecord.from_view(empty).ports is scanner.NO_PORTS
+
+
+def test_portset_is_sorted_and_unique():
+    ports = scanner.PortSet([443, 22, 80, 22, 65535, 1])
+    assert list(ports) == [1, 22, 80, 443, 65535]
+    assert str(ports) == '1, 22, 80, 443, 65535'
+    assert str(scanner.NO_PORTS) == 'None'
+    assert repr(scanner.PortSet([80, 22])) == 'PortSet([22, 80])'
+
+
+def test_portset_membership_and_set_operations():
+    ports = scanner.PortSet([22, 80, 443])
+    assert 80 in ports and 8080 not in ports
+    union = ports | [8080, 22]
+    assert isinstance(union, scanner.PortSet) and list(union) == [22, 80, 443, 8080]
+    difference = ports - {80}
+    assert isinstance(difference, scanner.PortSet) and list(difference) == [22, 443]
+    assert not scanner.NO_PORTS and bool(ports)
+
+
+def test_portset_rejects_out_of_range_ports():
+    with pytest.raises(OverflowError):
+        scanner.PortSet([65536])
+
+
+@pytest.mark.parametrize('protocol', range(pickle.HIGHEST_PROTOCOL + 1))
+def test_portset_pickles(protocol):
+    ports = pickle.loads(pickle.dumps(scanner.PortSet([8080, 22]), protocol))
+    assert type(ports) is scanner.PortSet
+    assert list(ports) == [22, 8080]
+
+
+@pytest.mark.parametrize('protocol', range(2, pickle.HIGHEST_PROTOCOL + 1))
+def test_record_pickles(protocol):
+    record = pickle.loads(pickle.dumps(full_record(), protocol))
+    assert type(record.ports) is scanner.PortSet
+    assert record.view() == full_record().view()
+
+
+def test_record_crosses_a_process_queue():
+    # Shards send records back through multiprocessing queues, which use ForkingPickler
+    record = pickle.loads(ForkingPickler.dumps(full_record()))
+    assert record.view() == full_record().view()
+    assert record.ip == full_record().ip and record.mac == full_record().mac
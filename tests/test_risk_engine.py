@@ -0,0 +1,161 @@
+import itertools
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+RULE_PORTS = [21, 22, 23, 80, 135, 139, 443, 445, 3306, 3389, 5432, 5900, 5985, 5986, 8080, 8443]
+OSES = ['Windows', 'Linux/Unix', 'Unknown', 'macOS']
+
+
+def legacy_ai_analysis(ip, ports, os_type):
+    """The if-chain the rule engine replaced, verbatim except for how ports arrive
+
+    It took the display string ('22, 80' or 'None') and tested substrings, so
+    '80' matched 8080 and '443' matched 8443. It is given a list of port
+    strings here, so each test is an exact match, as the engine's are.
+    """
+    insights = []
+    risk_level = "🟢 Low"
+
+    if '445' in ports or '139' in ports:
+        insights.append("🛑 SMB/NetBIOS open — EternalBlue/SMBGhost risk")
+        risk_level = "🔴 Critical"
+
+    if '3389' in ports:
+        insights.append("🔴 RDP exposed — brute force target")
+        if risk_level == "🟢 Low":
+            risk_level = "🟠 High"
+
+    if '22' in ports:
+        insights.append("⚠️  SSH open — ensure key-based auth")
+
+    if '23' in ports:
+        insights.append("🔴 Telnet detected — unencrypted protocol!")
+        risk_level = "🔴 Critical"
+
+    if '21' in ports:
+        insights.append("⚠️  FTP open — check for anonymous access")
+
+    if '3306' in ports:
+        insights.append("⚠️  MySQL exposed — restrict access")
+
+    if '5432' in ports:
+        insights.append("⚠️  PostgreSQL open — verify permissions")
+
+    if '80' in ports and '443' not in ports:
+        insights.append("⚠️  HTTP only — no HTTPS encryption")
+
+    if '8080' in ports or '8443' in ports:
+        insights.append("ℹ️  Alt web port detected — admin panel?")
+
+    if '5900' in ports:
+        insights.append("🔴 VNC exposed — screen sharing vulnerability")
+        risk_level = "🔴 Critical"
+
+    if os_type == 'Windows':
+        if '135' in ports:
+            insights.append("⚠️  RPC open — potential attack vector")
+        if '5985' in ports or '5986' in ports:
+            insights.append("ℹ️  WinRM detected — PowerShell remoting")
+
+    if ports == 'None':
+        insights.append("🟢 No open ports — firewall active or offline")
+        risk_level = "🟢 Low"
+
+    if not insights:
+        insights.append("🔍 No major vulnerabilities detected")
+
+    return f"{risk_level} | " + ' | '.join(insights)
+
+
+@pytest.fixture(params=['per-device', 'numpy'])
+def engine_path(request, monkeypatch):
+    """Run analyse_devices() once without NumPy and once with it (skipped when not installed)"""
+    if request.param == 'numpy':
+        numpy = pytest.importorskip('numpy')
+        monkeypatch.setattr(scanner, 'optional_numpy', lambda: numpy)
+    else:
+        monkeypatch.setattr(scanner, 'optional_numpy', lambda: None)
+    return request.param
+
+
+def every_port_combination(os_type):
+    """One device per subset of the rule ports, some with a port no rule mentions as well"""
+    devices = []
+    for bits in range(1 << len(RULE_PORTS)):
+        ports = [port for i, port in enumerate(RULE_PORTS) if bits >> i & 1]
+        if bits % 7 == 3:
+            ports.append(2222)
+        device = scanner.DeviceRecord(bits, bits)
+        device.ports = scanner.PortSet(ports)
+        device.os = os_type
+        devices.append(device)
+    return devices
+
+
+def legacy_verdict(device):
+    return legacy_ai_analysis(None, [str(port) for port in device.ports] or 'None', device.os)
+
+
+@pytest.mark.parametrize('os_type', ['Windows', 'Unknown'])
+def test_compiled_rules_match_legacy_verdicts(os_type, engine_path):
+    engine = scanner.RiskEngine(scanner.RISK_RULES)
+    devices = every_port_combination(os_type)
+    counts = engine.analyse_devices(devices)
+    mismatches = [(list(device.ports), device.ai, legacy_verdict(device))
+                  for device in devices if device.ai != legacy_verdict(device)]
+    assert mismatches[:3] == []
+    # Single-device path, as the scan pipeline calls it
+    assert all(engine.analyse(device.ports, os_type) == device.ai for device in devices[::97])
+    assert counts['smb'] == sum(1 for device in devices if {139, 445} & set(device.ports))
+    assert counts['no-open-ports'] == 1
+    assert counts['windows-rpc'] == (len(devices) // 2 if os_type == 'Windows' else 0)
+
+
+def mixed_devices():
+    """Devices varying in ports, OS and service text, for a pack with every kind of condition"""
+    port_choices = [(), (22,), (80,), (80, 443), (445, 3389), (22, 80, 8080), (5900, 2222)]
+    service_choices = ['N/A', 'OpenSSH 7.2', 'Apache httpd 2.4', 'openssh 9.6', '']
+    devices = []
+    for n, (ports, os_type, services) in enumerate(itertools.product(port_choices, OSES, service_choices)):
+        device = scanner.DeviceRecord(n, n)
+        device.ports = scanner.PortSet(ports)
+        device.os = os_type
+        device.services = services
+        devices.append(device)
+    return devices
+
+
+PACK = scanner.RISK_RULES + [
+    {'name': 'old-openssh', 'any_ports': [22], 'services': r'OpenSSH [1-7]\.', 'severity': 'high',
+     'insight': "🟠 Outdated OpenSSH"},
+    {'name': 'web-pair', 'all_ports': [80, 8080], 'os': ['Linux/Unix', 'macOS'], 'severity': 'medium',
+     'insight': "🟡 Two web servers"},
+    {'name': 'apache', 'services': 'apache', 'insight': "ℹ️  Apache"},
+]
+
+
+def test_vectorised_path_matches_per_device_path(monkeypatch):
+    numpy = pytest.importorskip('numpy')
+    engine = scanner.RiskEngine(PACK)
+    vectorised, per_device = mixed_devices(), mixed_devices()
+    monkeypatch.setattr(scanner, 'optional_numpy', lambda: numpy)
+    vectorised_counts = engine.analyse_devices(vectorised)
+    monkeypatch.setattr(scanner, 'optional_numpy', lambda: None)
+    per_device_counts = engine.analyse_devices(per_device)
+    assert [device.ai for device in vectorised] == [device.ai for device in per_device]
+    assert vectorised_counts == per_device_counts
+    assert vectorised_counts['old-openssh'] > 0 and vectorised_counts['web-pair'] > 0
+
+
+def test_pack_rules_per_device(engine_path):
+    engine = scanner.RiskEngine(PACK)
+    devices = mixed_devices()
+    engine.analyse_devices(devices)
+    for device in devices:
+        assert device.ai == engine.analyse(device.ports, device.os, device.services)
+        old_ssh = 22 in device.ports and device.services == 'OpenSSH 7.2'
+        assert ("Outdated OpenSSH" in device.ai) is old_ssh
+        if old_ssh and not {445, 5900} & set(device.ports):
+            assert device.ai.startswith(scanner.RISK_LEVELS['high'])
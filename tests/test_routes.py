@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+# /proc/net/route: destinations, gateways and masks are little-endian hex
+ROUTES = """Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT
+wlan0\t00000000\t0101A8C0\t0003\t0\t0\t600\t00000000\t0\t0\t0
+eth0\t00000000\t010010AC\t0003\t0\t0\t100\t00000000\t0\t0\t0
+wlan0\t0001A8C0\t00000000\t0001\t0\t0\t600\t00FFFFFF\t0\t0\t0
+docker0\t000011AC\t00000000\t0000\t0\t0\t0\t0000FFFF\t0\t0\t0
+eth0\t000010AC\t00000000\t0001\t0\t0\t100\t0000FFFF\t0\t0\t0
+"""
+
+
+@pytest.fixture
+def routes(monkeypatch):
+    monkeypatch.setattr(scanner, 'open', lambda path: io.StringIO(ROUTES), raising=False)
+
+
+def address(text):
+    return int.from_bytes(bytes(int(part) for part in text.split('.')), 'big')
+
+
+def test_default_route_with_lowest_metric(routes):
+    assert scanner.route_interface(0) == 'eth0'
+    assert scanner.route_interface(address('8.8.8.8')) == 'eth0'
+
+
+def test_most_specific_route_wins(routes):
+    assert scanner.route_interface(address('192.168.1.40')) == 'wlan0'
+    assert scanner.route_interface(address('172.16.3.4')) == 'eth0'
+
+
+def test_routes_that_are_down_are_skipped(routes):
+    assert scanner.route_interface(address('172.17.0.2')) == 'eth0'
+
+
+def test_loopback_and_missing_table(monkeypatch):
+    assert scanner.route_interface(address('127.0.0.5')) == 'lo'
+
+    def missing(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(scanner, 'open', missing, raising=False)
+    assert scanner.route_interface(address('10.0.0.1')) == scanner.interface
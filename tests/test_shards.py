@@ -0,0 +1,42 @@
+import os
+import threading
+
+import AK_Network_Scanner as scanner
+
+
+def records(shard):
+    for n in range(5):
+        yield scanner.DeviceRecord(f'10.0.{shard}.{n + 1}', shard << 8 | n)
+
+
+def collect(func, shards, workers, timeout=20):
+    """run_sharded output, collected in a thread so a hang fails the test instead of blocking it"""
+    found = []
+    thread = threading.Thread(target=lambda: found.extend(scanner.run_sharded(func, shards, workers)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "run_sharded did not return"
+    return found
+
+
+def test_every_shard_is_merged():
+    found = collect(records, list(range(6)), workers=3)
+    assert sorted(record.ip_str for record in found) == \
+        sorted(f'10.0.{shard}.{n}' for shard in range(6) for n in range(1, 6))
+
+
+def test_dead_shard_process_is_reported_not_waited_for(monkeypatch, capsys):
+    monkeypatch.setattr(scanner, 'SHARD_POLL', 0.1)
+
+    def dies_on_shard_1(shard):
+        if shard == 1:
+            # Gone without its end marker, as when killed or out of memory
+            os._exit(9)
+        yield from records(shard)
+
+    # Worker 0 runs shards 0 and 2, worker 1 runs shards 1 and 3
+    found = collect(dies_on_shard_1, [0, 1, 2, 3], workers=2)
+    assert sorted(record.ip_str for record in found) == \
+        sorted(f'10.0.{shard}.{n}' for shard in (0, 2) for n in range(1, 6))
+    out = capsys.readouterr().out
+    assert 'Shard process shard-1 died (exit code 9); no results for 1, 3' in out
@@ -0,0 +1,145 @@
+import socket
+import threading
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+SYSDESCR = 'Linux printer-01 5.15.0-91-generic #101-Ubuntu SMP x86_64'
+SYSOBJECTID = '1.3.6.1.4.1.8072.3.2.10'
+
+
+def get_response(request_id, community, varbinds, error_status=0):
+    """GetResponse as an agent sends it; varbinds is [(oid, encoded value)]"""
+    body = b''.join(scanner.ber_tlv(0x30, scanner.ber_oid(oid) + value) for oid, value in varbinds)
+    pdu = scanner.ber_tlv(0xA2, scanner.ber_integer(request_id) + scanner.ber_integer(error_status) +
+                          scanner.ber_integer(0) + scanner.ber_tlv(0x30, body))
+    return scanner.ber_tlv(0x30, scanner.ber_integer(1) + scanner.ber_tlv(0x04, community.encode()) + pdu)
+
+
+def read_get(data):
+    """(request_id, community, [oid]) from a GetRequest"""
+    _, message, _ = scanner.ber_read(data, 0)
+    _, _, offset = scanner.ber_read(message, 0)
+    _, community, offset = scanner.ber_read(message, offset)
+    tag, pdu, _ = scanner.ber_read(message, offset)
+    assert tag == 0xA0
+    _, request_id, offset = scanner.ber_read(pdu, 0)
+    offset = scanner.ber_read(pdu, scanner.ber_read(pdu, offset)[2])[2]
+    _, varbinds, _ = scanner.ber_read(pdu, offset)
+    oids, offset = [], 0
+    while offset < len(varbinds):
+        _, varbind, offset = scanner.ber_read(varbinds, offset)
+        _, oid, _ = scanner.ber_read(varbind, 0)
+        oids.append(scanner.ber_decode_oid(oid))
+    return int.from_bytes(request_id, 'big', signed=True), community.decode(), oids
+
+
+class SnmpAgent:
+    """UDP SNMPv2c stand-ins on loopback addresses sharing one port
+
+    agents maps ip -> (community, sysName, error_status). A wrong community is
+    dropped without a reply, as real agents do.
+    """
+
+    def __init__(self, agents):
+        self.agents = agents
+        self.requests = []
+        self.sockets = []
+        self.port = 0
+        for ip in agents:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((ip, self.port))
+            self.port = sock.getsockname()[1]
+            sock.settimeout(0.05)
+            self.sockets.append(sock)
+        self.running = True
+        self.threads = [threading.Thread(target=self.serve, args=(sock,), daemon=True) for sock in self.sockets]
+        for thread in self.threads:
+            thread.start()
+
+    def serve(self, sock):
+        ip = sock.getsockname()[0]
+        community, name, error_status = self.agents[ip]
+        values = {
+            scanner.SNMP_OIDS['sysDescr']: scanner.ber_tlv(0x04, SYSDESCR.encode()),
+            scanner.SNMP_OIDS['sysObjectID']: scanner.ber_oid(SYSOBJECTID),
+            scanner.SNMP_OIDS['sysName']: scanner.ber_tlv(0x04, name.encode() + b'\n'),
+        }
+        while self.running:
+            try:
+                data, source = sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            request_id, asked, oids = read_get(data)
+            self.requests.append((ip, source, asked))
+            if asked != community:
+                continue
+            varbinds = [(oid, values.get(oid, b'\x80\x00')) for oid in oids]
+            sock.sendto(get_response(request_id, asked, varbinds, error_status), source)
+
+    def close(self):
+        self.running = False
+        for thread in self.threads:
+            thread.join()
+        for sock in self.sockets:
+            sock.close()
+
+
+@pytest.fixture
+def agents():
+    server = SnmpAgent({
+        '127.0.0.2': ('public', 'printer-01', 0),
+        '127.0.0.3': ('s3cret', 'core-switch', 0),
+        '127.0.0.4': ('public', 'locked-down', 16),   # authorizationError
+    })
+    yield server
+    server.close()
+
+
+def test_sweep_reads_sysdescr_sysname_and_sysobjectid(agents):
+    results = scanner.snmp_sweep(['127.0.0.2'], timeout=0.5, port=agents.port)
+    assert results == {'127.0.0.2': {'sysDescr': SYSDESCR, 'sysObjectID': SYSOBJECTID,
+                                     'sysName': 'printer-01', 'community': 'public'}}
+    assert scanner.os_from_sysdescr(results['127.0.0.2']['sysDescr']) == 'Linux/Unix'
+
+
+def test_wrong_community_gets_no_result(agents):
+    results = scanner.snmp_sweep(['127.0.0.2', '127.0.0.3'], timeout=0.5, port=agents.port)
+    assert set(results) == {'127.0.0.2'}
+
+
+def test_second_community_is_used_when_the_first_fails(agents):
+    results = scanner.snmp_sweep(['127.0.0.2', '127.0.0.3'], communities=['public', 's3cret'],
+                                 timeout=0.5, port=agents.port)
+    assert results['127.0.0.2']['community'] == 'public'
+    assert results['127.0.0.3']['community'] == 's3cret'
+    assert results['127.0.0.3']['sysName'] == 'core-switch'
+    # Every request goes out from the one sweep socket
+    assert len({source for _, source, _ in agents.requests}) == 1
+
+
+def test_error_status_is_not_a_result(agents):
+    assert scanner.snmp_sweep(['127.0.0.4'], timeout=0.3, port=agents.port) == {}
+
+
+def test_parse_response_value_types():
+    response = get_response(-5, 'public', [
+        ('1.3.6.1.2.1.1.3.0', scanner.ber_tlv(0x43, (123456).to_bytes(3, 'big'))),
+        ('1.3.6.1.2.1.1.7.0', scanner.ber_integer(72)),
+        ('1.3.6.1.2.1.1.9.0', b'\x80\x00'),
+    ])
+    request_id, values = scanner.parse_snmp_response(response)
+    assert request_id == -5
+    assert values == {'1.3.6.1.2.1.1.3.0': '123456', '1.3.6.1.2.1.1.7.0': '72'}
+
+
+def test_parse_rejects_requests_and_truncated_packets():
+    request = scanner.build_snmp_get(7, 'public', list(scanner.SNMP_OIDS.values()))
+    with pytest.raises(ValueError):
+        scanner.parse_snmp_response(request)
+    response = get_response(7, 'public', [(scanner.SNMP_OIDS['sysName'], scanner.ber_tlv(0x04, b'host'))])
+    with pytest.raises((ValueError, IndexError)):
+        scanner.parse_snmp_response(response[:-3])
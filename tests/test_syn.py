@@ -0,0 +1,131 @@
+import socket
+import struct
+import time
+
+import pytest
+
+import AK_Network_Scanner as scanner
+
+SOURCE = '10.0.0.254'
+
+
+class FakeTcpNetwork:
+    """Stands in for the engine's raw TCP sockets: the first one created transmits, the second receives
+
+    SYNs to a port in open_ports get a SYN-ACK, to closed_ports an RST, to
+    anything else nothing. Replies (or injected packets) are queued on a
+    socketpair that the receive thread blocks on.
+    """
+
+    def __init__(self, open_ports=(), closed_ports=(), bad_cookie=False):
+        self.open_ports = set(open_ports)
+        self.closed_ports = set(closed_ports)
+        self.bad_cookie = bad_cookie
+        self.sent = []
+        self.created = 0
+        self.reader, self.writer = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+
+    def __call__(self, family, kind, proto=0):
+        assert (family, kind, proto) == (socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
+        self.created += 1
+        return self
+
+    def inject(self, ip, sport, dport, ack, flags):
+        ip_header = bytes([0x45, 0, 0, 40, 0, 0, 0, 0, 64, 6, 0, 0]) + socket.inet_aton(ip) + socket.inet_aton(SOURCE)
+        self.writer.send(ip_header + struct.pack('!HHIIBBHHH', sport, dport, 1, ack, 5 << 4, flags, 1024, 0, 0))
+
+    def sendto(self, packet, address):
+        sport, dport, seq = struct.unpack_from('!HHI', packet)
+        self.sent.append((address[0], dport))
+        ack = (seq + 1 + (7 if self.bad_cookie else 0)) & 0xFFFFFFFF
+        if dport in self.open_ports:
+            self.inject(address[0], dport, sport, ack, 0x12)
+        elif dport in self.closed_ports:
+            self.inject(address[0], dport, sport, ack, 0x14)
+
+    def recv(self, size):
+        packet = self.reader.recv(size)
+        if not packet:
+            raise OSError("closed")
+        return packet
+
+    def setsockopt(self, *args):
+        pass
+
+    def close(self):
+        self.writer.close()
+        self.reader.close()
+
+
+@pytest.fixture
+def network(monkeypatch):
+    fakes = []
+
+    def install(**kwargs):
+        fake = FakeTcpNetwork(**kwargs)
+        fakes.append(fake)
+        monkeypatch.setattr(scanner.socket, 'socket', fake)
+        monkeypatch.setattr(scanner, 'source_ip_for', lambda ip: SOURCE)
+        engine = scanner.SynScanEngine(rate=100000)
+        assert fake.created == 2
+        return fake, engine
+
+    yield install
+    for fake in fakes:
+        fake.writer.close()
+
+
+def settle(engine, received, timeout=2):
+    """Wait for the receive thread to have taken in that many replies"""
+    deadline = time.monotonic() + timeout
+    while engine.received < received and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_open_closed_filtered(network):
+    fake, engine = network(open_ports={22, 80}, closed_ports={23, 443})
+    states = engine.scan('10.0.0.1', [21, 22, 23, 80, 443, 8080], wait=0.3)
+    assert states == {21: 'filtered', 22: 'open', 23: 'closed', 80: 'open', 443: 'closed', 8080: 'filtered'}
+    assert sorted(port for _, port in fake.sent) == [21, 22, 23, 80, 443, 8080]
+    assert scanner.open_ports(states) == scanner.PortSet([22, 80])
+
+
+def test_reply_without_the_cookie_is_ignored(network):
+    fake, engine = network(open_ports={22}, closed_ports={23}, bad_cookie=True)
+    states = engine.scan('10.0.0.1', [22, 23], wait=0.3)
+    assert states == {22: 'filtered', 23: 'filtered'}
+    assert engine.received == 0
+
+
+def test_reply_from_another_host_is_ignored(network):
+    fake, engine = network()
+    states = engine.watch('10.0.0.1', [22])
+    # A valid cookie for 10.0.0.2:22 must not mark 10.0.0.1:22
+    fake.inject('10.0.0.1', 22, engine.sport, engine.cookie(socket.inet_aton('10.0.0.2'), 22) + 1, 0x12)
+    fake.inject('10.0.0.2', 22, engine.sport, engine.cookie(socket.inet_aton('10.0.0.2'), 22) + 1, 0x12)
+    settle(engine, 1)
+    time.sleep(0.05)
+    engine.unwatch('10.0.0.1', states)
+    assert states == {22: 'filtered'}
+
+
+def test_late_and_unasked_replies_are_not_kept(network):
+    fake, engine = network(open_ports={22})
+    assert engine.scan('10.0.0.1', [22], wait=0.3) == {22: 'open'}
+    # Valid cookies, but nobody is waiting: a straggler for the finished scan and a port never asked about
+    for ip, port in [('10.0.0.1', 22), ('10.0.0.1', 9999), ('10.0.0.3', 80)]:
+        fake.inject(ip, port, engine.sport, engine.cookie(socket.inet_aton(ip), port) + 1, 0x12)
+    settle(engine, 4)
+    assert engine.received == 4
+    assert engine.pending == {}
+
+
+def test_concurrent_scans_of_one_host_each_get_their_ports(network):
+    fake, engine = network(open_ports={22, 80})
+    first = engine.watch('10.0.0.1', [22, 25])
+    second = engine.scan('10.0.0.1', [80, 22], wait=0.3)
+    engine.unwatch('10.0.0.1', first)
+    assert second == {80: 'open', 22: 'open'}
+    # The first watcher saw the reply to 22 as well; 25 was never sent
+    assert first == {22: 'open', 25: 'filtered'}
+    assert engine.pending == {}